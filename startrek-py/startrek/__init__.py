@@ -33,11 +33,13 @@ from .net import *
 from .socket import *
 from .port import *
 
-from .arrival import ArrivalShip, ArrivalHall
-from .departure import DepartureShip, DepartureHall
-from .dock import Dock, LockedDock
+from .arrival import ArrivalShip, ArrivalHall, BoundedArrivalHall
+from .departure import RttEstimator, DepartureShip, DepartureHall, TimedDepartureHall
+from .dock import Dock, LockedDock, TimedDock
+from .compressor import Compressor
 from .stardocker import StarPorter
 from .stargate import StarGate
+from .starshard import ShardRouter, Shard, ShardGate, ShardSupervisor
 
 
 name = "StarTrek"
@@ -49,7 +51,7 @@ __all__ = [
     'SocketAddress',
     'AddressPairObject',
 
-    'PairMap', 'AbstractPairMap', 'HashPairMap',
+    'PairMap', 'AbstractPairMap', 'HashPairMap', 'FlatPairMap',
     'AddressPairMap',
 
     #
@@ -67,8 +69,9 @@ __all__ = [
     'SocketReader', 'SocketWriter',
     'SocketHelper',
 
-    'BaseChannel',
+    'ReceiveSizer', 'BaseChannel',
     'BaseHub', 'BaseConnection', 'ActiveConnection',
+    'ChannelSelector',
 
     #
     #   Port
@@ -83,7 +86,9 @@ __all__ = [
     #   Star Port
     #
 
-    'ArrivalShip', 'ArrivalHall', 'DepartureShip', 'DepartureHall',
-    'Dock', 'LockedDock',
+    'ArrivalShip', 'ArrivalHall', 'BoundedArrivalHall',
+    'RttEstimator', 'DepartureShip', 'DepartureHall', 'TimedDepartureHall',
+    'Dock', 'LockedDock', 'TimedDock', 'Compressor',
     'StarPorter', 'StarGate',
+    'ShardRouter', 'Shard', 'ShardGate', 'ShardSupervisor',
 ]
@@ -31,6 +31,7 @@
 import time
 import weakref
 from abc import ABC
+from collections import OrderedDict
 from typing import Optional, Any, Set, Dict, MutableMapping
 
 from .types import Timestamp
@@ -65,6 +66,11 @@ class ArrivalShip(Arrival, ABC):
         else:
             return ShipStatus.ASSEMBLING
 
+    @property
+    def size(self) -> int:
+        """ bytes held by this ship, override for memory budget of the hall """
+        return 0
+
 
 class ArrivalHall:
     """ Memory cache for Arrivals """
@@ -146,3 +152,168 @@ class ArrivalHall:
                 # long time ago
                 self.__finished_times.pop(sn, None)
         return count
+
+
+class BoundedArrivalHall(ArrivalHall):
+    """
+        Arrival Hall with Memory Caps
+        ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+        Assembling ships are kept in LRU order, which is also the order of
+        their expired times, so purging expired ships needs no scanning;
+        when the entries or bytes exceed the limits, the least recently
+        touched assemblies will be evicted.
+    """
+
+    MAX_ENTRIES = 4096             # assembling ships
+    MAX_BYTES = 64 * 1024 * 1024   # bytes held by assembling ships
+    MAX_FINISHED = 65536           # finished SN
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None, max_finished: int = None):
+        super().__init__()
+        self.__max_entries = self.MAX_ENTRIES if max_entries is None else max_entries
+        self.__max_bytes = self.MAX_BYTES if max_bytes is None else max_bytes
+        self.__max_finished = self.MAX_FINISHED if max_finished is None else max_finished
+        self.__arrivals: Dict[Any, Arrival] = OrderedDict()          # sn => Arrival (LRU order)
+        self.__sizes: Dict[Any, int] = {}                            # sn => bytes
+        self.__finished_times: Dict[Any, Timestamp] = OrderedDict()  # sn => timestamp (time order)
+        self.__bytes = 0
+        # counters
+        self.__dropped = 0   # ships too large for the budget
+        self.__evicted = 0   # incomplete assemblies removed for the limits
+        self.__expired = 0   # incomplete assemblies removed for timeout
+
+    @property
+    def count(self) -> int:
+        """ count of assembling ships """
+        return len(self.__arrivals)
+
+    @property
+    def size(self) -> int:
+        """ bytes held by assembling ships """
+        return self.__bytes
+
+    @property
+    def dropped(self) -> int:
+        return self.__dropped
+
+    @property
+    def evicted(self) -> int:
+        return self.__evicted
+
+    @property
+    def expired(self) -> int:
+        return self.__expired
+
+    # noinspection PyMethodMayBeStatic
+    def _get_size(self, ship: Arrival) -> int:
+        """ Get bytes held by the ship """
+        if isinstance(ship, ArrivalShip):
+            return ship.size
+        return 0
+
+    # Override
+    def assemble_arrival(self, ship: Arrival) -> Optional[Arrival]:
+        # 1. check ship ID (SN)
+        sn = ship.sn
+        if sn is None:
+            # separated package ship must have SN for assembling
+            # we consider it to be a ship carrying a whole package here
+            return ship
+        # 2. check cached ship
+        arrivals = self.__arrivals
+        cached = arrivals.get(sn)
+        if cached is None:
+            # check whether the task as already finished
+            timestamp = self.__finished_times.get(sn, 0)
+            if timestamp > 0:
+                # task already finished
+                return None
+            # 3. new arrival, try assembling to check whether a fragment
+            completed = ship.assemble(ship=ship)
+            if completed is None:
+                # it's a fragment, waiting for more fragments
+                size = self._get_size(ship=ship)
+                if size > self.__max_bytes:
+                    # too large to be cached
+                    self.__dropped += 1
+                    return None
+                arrivals[sn] = ship
+                self.__resize(sn=sn, size=size)
+                self.__evict(keep=sn)
+            # else, it's a completed package
+        else:
+            # 3. cached ship found, try assembling (insert as fragment)
+            #    to check whether all fragments received
+            completed = cached.assemble(ship=ship)
+            if completed is None:
+                # it's not completed yet, update expired time
+                # and wait for more fragments.
+                cached.touch(now=time.time())
+                arrivals.move_to_end(sn)
+                self.__resize(sn=sn, size=self._get_size(ship=cached))
+                self.__evict(keep=sn)
+            else:
+                # all fragments received, remove cached ship
+                self.__remove(sn=sn)
+                # mark finished time
+                self.__finish(sn=sn, now=time.time())
+        return completed
+
+    def __resize(self, sn, size: int):
+        old = self.__sizes.get(sn, 0)
+        self.__sizes[sn] = size
+        self.__bytes += size - old
+
+    def __remove(self, sn) -> Optional[Arrival]:
+        self.__bytes -= self.__sizes.pop(sn, 0)
+        return self.__arrivals.pop(sn, None)
+
+    def __finish(self, sn, now: Timestamp):
+        finished = self.__finished_times
+        finished.pop(sn, None)
+        finished[sn] = now
+        while len(finished) > self.__max_finished:
+            finished.popitem(last=False)
+
+    def __evict(self, keep):
+        """ Remove least recently touched assemblies until under the limits """
+        arrivals = self.__arrivals
+        while len(arrivals) > self.__max_entries or self.__bytes > self.__max_bytes:
+            sn = next(iter(arrivals))
+            if sn == keep:
+                # the current one is the last one (most recently touched),
+                # drop it if it's still too large
+                if self.__bytes > self.__max_bytes:
+                    self.__remove(sn=sn)
+                    self.__dropped += 1
+                break
+            self.__remove(sn=sn)
+            self.__evicted += 1
+
+    # Override
+    def purge(self, now: Timestamp = 0) -> int:
+        if now <= 0:
+            now = time.time()
+        count = 0
+        # 1. seeking expired tasks from the least recently touched one
+        arrivals = self.__arrivals
+        while len(arrivals) > 0:
+            sn = next(iter(arrivals))
+            ship = arrivals[sn]
+            if ship.get_status(now=now) != ShipStatus.EXPIRED:
+                # the rest ones are touched later
+                break
+            self.__remove(sn=sn)
+            self.__expired += 1
+            count += 1
+        # 2. seeking neglected finished times
+        ago = now - 3600
+        finished = self.__finished_times
+        while len(finished) > 0:
+            sn = next(iter(finished))
+            if finished[sn] >= ago:
+                # the rest ones are finished later
+                break
+            finished.pop(sn, None)
+        return count
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+#
+#   Star Trek: Interstellar Transport
+#
+#                                Written in 2026 by Moky <albert.moky@gmail.com>
+#
+# ==============================================================================
+# MIT License
+#
+# Copyright (c) 2021 Albert Moky
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ==============================================================================
+
+
+import zlib
+from typing import Optional, Iterable, Union
+
+
+class Compressor:
+    """
+        Payload Compressor
+        ~~~~~~~~~~~~~~~~~~
+
+        Deflating the payloads not smaller than the threshold (zlib),
+        the result will be dropped if it doesn't save any byte;
+        inflating the chunks one by one, and stopping as soon as
+        the output exceeds 'max_size' (zip bomb).
+    """
+
+    LEVEL = 6         # 1 (fastest) ~ 9 (smallest)
+    THRESHOLD = 256   # bytes, too small to be worth it
+    MAX_SIZE = 1 << 26  # 64 MB, max length of inflated data
+
+    def __init__(self, level: int = LEVEL, threshold: int = THRESHOLD, max_size: int = MAX_SIZE):
+        super().__init__()
+        assert -1 <= level <= 9, 'compress level error: %d' % level
+        self.__level = level
+        self.__threshold = threshold
+        self.__max_size = max_size
+        # statistics
+        self.__deflated = 0   # count of payloads deflated
+        self.__bytes_in = 0   # total length before deflating
+        self.__bytes_out = 0  # total length after deflating
+
+    def __str__(self) -> str:
+        cname = self.__class__.__name__
+        return '<%s level=%d threshold=%d deflated=%d ratio=%.3f />' % (
+            cname, self.__level, self.__threshold, self.__deflated, self.ratio
+        )
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    @property
+    def level(self) -> int:
+        return self.__level
+
+    @property
+    def threshold(self) -> int:
+        return self.__threshold
+
+    @property
+    def max_size(self) -> int:
+        return self.__max_size
+
+    @property
+    def deflated(self) -> int:
+        """ count of payloads deflated """
+        return self.__deflated
+
+    @property
+    def ratio(self) -> float:
+        """ total length after deflating / before """
+        if self.__bytes_in == 0:
+            return 1.0
+        return self.__bytes_out / self.__bytes_in
+
+    def compress(self, data: Union[bytes, bytearray], force: bool = False) -> Optional[bytes]:
+        """
+        Deflate the payload
+
+        :param data:  payload
+        :param force: ignore the threshold
+        :return: None on payload too small, or not compressible
+        """
+        size = len(data)
+        if size < self.__threshold and not force:
+            return None
+        result = zlib.compress(data, self.__level)
+        if len(result) >= size and not force:
+            # not compressible (e.g.: encrypted data)
+            return None
+        self.__deflated += 1
+        self.__bytes_in += size
+        self.__bytes_out += len(result)
+        return result
+
+    def decompress(self, chunks: Iterable[Union[bytes, bytearray, memoryview]]) -> Optional[bytes]:
+        """
+        Inflate the chunks of deflated data one by one
+
+        :param chunks: parts of deflated data in order
+        :return: None on data error, or inflated data too large
+        """
+        return self.inflate(chunks=chunks, max_size=self.__max_size)
+
+    @classmethod
+    def inflate(cls, chunks: Iterable[Union[bytes, bytearray, memoryview]], max_size: int) -> Optional[bytes]:
+        """ Inflate the chunks one by one, None on error or longer than 'max_size' """
+        inflater = zlib.decompressobj()
+        output = bytearray()
+        try:
+            for item in chunks:
+                output.extend(inflater.decompress(item, max_size + 1 - len(output)))
+                if len(output) > max_size or inflater.unconsumed_tail:
+                    # too large (zip bomb?)
+                    return None
+            output.extend(inflater.flush())
+        except zlib.error:
+            return None
+        if not inflater.eof or len(output) > max_size:
+            return None
+        return bytes(output)
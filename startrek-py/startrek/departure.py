@@ -28,10 +28,13 @@
 # SOFTWARE.
 # ==============================================================================
 
+import bisect
+import heapq
 import time
 import weakref
 from abc import ABC
-from typing import Optional, Any, List, Dict, MutableMapping
+from collections import deque
+from typing import Optional, Any, List, Dict, Deque, Tuple, MutableMapping
 
 from .types import Timestamp
 
@@ -39,6 +42,83 @@ from .port import ShipStatus
 from .port import Arrival, Departure
 
 
+class RttEstimator:
+    """
+        Round Trip Time Estimator
+        ~~~~~~~~~~~~~~~~~~~~~~~~~
+
+        Smoothed RTT & RTT variation of one peer, and the retransmission
+        timeout derived from them (RFC 6298):
+
+            RTTVAR = 3/4 * RTTVAR + 1/4 * |SRTT - R|
+            SRTT   = 7/8 * SRTT   + 1/8 * R
+            RTO    = SRTT + max(G, 4 * RTTVAR)
+    """
+
+    RTO_INITIAL = 1.0   # seconds, before the first sample
+    RTO_MIN = 0.2
+    RTO_MAX = 60.0
+
+    GRANULARITY = 0.01  # clock granularity (G)
+
+    def __init__(self):
+        super().__init__()
+        self.__srtt: Optional[float] = None
+        self.__rttvar = 0.0
+        self.__rto = self.RTO_INITIAL
+        # statistics
+        self.__samples = 0
+        self.__backoffs = 0
+
+    def __str__(self) -> str:
+        cname = self.__class__.__name__
+        return '<%s srtt=%s rttvar=%.3f rto=%.3f samples=%d backoffs=%d />'\
+               % (cname, self.__srtt, self.__rttvar, self.__rto, self.__samples, self.__backoffs)
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    @property
+    def srtt(self) -> Optional[float]:
+        """ smoothed round trip time, None before the first sample """
+        return self.__srtt
+
+    @property
+    def rttvar(self) -> float:
+        return self.__rttvar
+
+    @property
+    def rto(self) -> float:
+        """ retransmission timeout """
+        return self.__rto
+
+    @property
+    def samples(self) -> int:
+        return self.__samples
+
+    @property
+    def backoffs(self) -> int:
+        return self.__backoffs
+
+    def update(self, rtt: float):
+        """ Update with a new RTT sample (from a task responded without retransmission) """
+        srtt = self.__srtt
+        if srtt is None:
+            self.__srtt = rtt
+            self.__rttvar = rtt / 2
+        else:
+            self.__rttvar = 0.75 * self.__rttvar + 0.25 * abs(srtt - rtt)
+            self.__srtt = 0.875 * srtt + 0.125 * rtt
+        self.__samples += 1
+        rto = self.__srtt + max(self.GRANULARITY, 4 * self.__rttvar)
+        self.__rto = min(max(rto, self.RTO_MIN), self.RTO_MAX)
+
+    def backoff(self):
+        """ Double the RTO after timeout, until the next sample """
+        self.__backoffs += 1
+        self.__rto = min(self.__rto * 2, self.RTO_MAX)
+
+
 # noinspection PyAbstractClass
 class DepartureShip(Departure, ABC):
 
@@ -50,6 +130,10 @@ class DepartureShip(Departure, ABC):
     # if response timeout.
     RETRIES = 2
 
+    # With adaptive timeout, the task will be retransmitted at most 8 times
+    # without any response.
+    MAX_RETRANSMITS = 8
+
     def __init__(self, priority: int = 0, max_tries: int = None):  # max_tries = 1 + RETRIES
         super().__init__()
         # task priority, smaller is faster
@@ -58,18 +142,90 @@ class DepartureShip(Departure, ABC):
         self.__expired = 0
         # how many times to try sending
         self.__tries = (1 + self.RETRIES) if max_tries is None else max_tries
+        # adaptive timeout
+        self.__estimator: Optional[RttEstimator] = None
+        self.__lifetime = 0   # EXPIRES for each try
+        self.__deadline = 0   # give up after this time
+        self.__sent_time = 0  # last time sent
+        self.__sent_count = 0
+        self.__retransmits = 0  # resent without any response
+        self.__rto = 0.0      # timeout of last sending
+        self.__progressed = 0  # last time responded partially
 
     @property
     def priority(self) -> int:
         return self.__priority
 
+    @property
+    def expired(self) -> Timestamp:
+        """ time to retry if no response received (0 means not sent yet) """
+        return self.__expired
+
+    @property
+    def estimator(self) -> Optional[RttEstimator]:
+        """ RTT estimator of the porter, None means fixed timeout (EXPIRES) """
+        return self.__estimator
+
+    @estimator.setter
+    def estimator(self, rtt: Optional[RttEstimator]):
+        self.__estimator = rtt
+
     # Override
     def touch(self, now: Timestamp):
         assert self.__tries > 0, 'touch error, tries=%d' % self.__tries
-        # decrease counter
-        self.__tries -= 1
-        # update retried time
-        self.__expired = now + self.EXPIRES
+        # responded partially since last sent?
+        answered = self.__sent_count > 0 and self.__progressed >= self.__sent_time
+        self.__sent_time = now
+        self.__sent_count += 1
+        estimator = self.__estimator
+        if estimator is None or self.__tries == 1 and self.__deadline == 0:
+            # decrease counter
+            self.__tries -= 1
+            # update retried time
+            self.__expired = now + self.EXPIRES
+            return
+        # adaptive timeout with exponential backoff,
+        # keep retrying until the lifetime (EXPIRES for each try) used up
+        if self.__deadline == 0:
+            self.__lifetime = self.EXPIRES * self.__tries
+            self.__deadline = now + self.__lifetime
+        rto = estimator.rto
+        if answered:
+            # the rest fragments are resent, but the peer is still responding,
+            # so it's not a timeout
+            pass
+        elif self.__sent_count > 1:
+            self.__retransmits += 1
+            # response timeout, back off the timer of the peer (RFC 6298, 5.5),
+            # unless another task has done it since this one sent
+            if rto <= self.__rto:
+                estimator.backoff()
+                rto = estimator.rto
+            rto = max(rto, min(self.__rto * 2, estimator.RTO_MAX))
+        self.__rto = rto
+        expired = now + rto
+        if expired >= self.__deadline:
+            # the last try
+            expired = self.__deadline
+            self.__tries = 0
+        elif self.__retransmits >= self.MAX_RETRANSMITS:
+            # retransmitted too many times, waiting for the last response
+            self.__tries = 0
+        self.__expired = expired
+
+    def _progress(self, now: Timestamp):
+        """ Call it when a response acked part of the fragments """
+        self.__progressed = now
+        if self.__deadline > 0:
+            # still responding, extend the lifetime and give it more tries
+            self.__deadline = max(self.__deadline, now + self.__lifetime)
+            self.__retransmits = 0
+            self.__tries = max(self.__tries, 1)
+
+    def rtt_sample(self, now: Timestamp) -> Optional[float]:
+        """ Round trip time of this task, None if it was sent more than once (Karn) """
+        if self.__sent_count == 1:
+            return now - self.__sent_time
 
     # Override
     def get_status(self, now: Timestamp) -> ShipStatus:
@@ -300,3 +456,201 @@ class DepartureHall:
                 # long time ago
                 self.__finished_times.pop(sn, None)
         return count
+
+
+class TimedDepartureHall(DepartureHall):
+    """
+        Departure Hall with Timer
+        ~~~~~~~~~~~~~~~~~~~~~~~~~
+
+        New ships are waiting in the FIFO queues of their priorities,
+        and the ships waiting for responses are scheduled in a heap
+        by their expired times, so it needs not to check every ship
+        for the next timeout task.
+    """
+
+    def __init__(self):
+        # skip the containers of DepartureHall, they are not used here
+        super(DepartureHall, self).__init__()
+        # all departure ships
+        self.__all_departures = weakref.WeakSet()
+        # new ships waiting to send out
+        self.__new_departures: Dict[int, Deque[Departure]] = {}  # priority => Deque[Departure]
+        self.__priorities: List[int] = []
+        # ships waiting for responses
+        self.__timer: List[Tuple[Timestamp, int, Any]] = []  # heap of (expired, seq, SN)
+        self.__timeout: List[Tuple[int, int, Any]] = []      # heap of (priority, seq, SN)
+        self.__seq = 0
+        # index
+        self.__map: Dict[Any, Departure] = {}                # SN => ship
+        self.__schedules: Dict[Any, Tuple[int, int]] = {}    # SN => (priority, seq)
+        self.__finished_times: Dict[Any, Timestamp] = {}     # SN => timestamp
+        self.__finished_queue: Deque[Tuple[Timestamp, Any]] = deque()  # (timestamp, SN)
+
+    # Override
+    def add_departure(self, ship: Departure) -> bool:
+        # 1. check duplicated
+        if ship in self.__all_departures:
+            return False
+        else:
+            self.__all_departures.add(ship)
+        # 2. append to the queue with same priority
+        priority = ship.priority
+        queue = self.__new_departures.get(priority)
+        if queue is None:
+            queue = deque()
+            self.__new_departures[priority] = queue
+            bisect.insort(self.__priorities, priority)
+        queue.append(ship)
+        return True
+
+    # Override
+    def check_response(self, ship: Arrival) -> Optional[Departure]:
+        sn = ship.sn
+        assert sn is not None, 'Ship SN not found: %s' % ship
+        # check whether this task has already finished
+        timestamp = self.__finished_times.get(sn)
+        if timestamp is not None and timestamp > 0:
+            # task already finished
+            return None
+        # check departure task
+        outgo = self.__map.get(sn)
+        if outgo is not None and outgo.check_response(ship=ship):
+            # all fragments sent, departure task finished
+            # remove it and clear mapping when SN exists
+            self.__remove_ship(ship=outgo, sn=sn)
+            # mark finished time
+            self.__finish(sn=sn, now=time.time())
+            return outgo
+
+    def __finish(self, sn, now: Timestamp):
+        self.__finished_times[sn] = now
+        self.__finished_queue.append((now, sn))
+
+    def __remove_ship(self, ship: Departure, sn):
+        # the scheduled items in the heaps will be ignored after mapping removed
+        self.__map.pop(sn, None)
+        self.__schedules.pop(sn, None)
+        self.__all_departures.discard(ship)
+
+    def __schedule(self, ship: Departure, priority: int, sn, now: Timestamp):
+        self.__seq += 1
+        seq = self.__seq
+        self.__schedules[sn] = (priority, seq)
+        if isinstance(ship, DepartureShip):
+            expired = ship.expired
+        else:
+            expired = now + DepartureShip.EXPIRES
+        heapq.heappush(self.__timer, (expired, seq, sn))
+
+    # Override
+    def next_departure(self, now: Timestamp) -> Optional[Departure]:
+        # task.__expired == 0
+        task = self.__next_new_departure(now=now)
+        if task is None:
+            # task.__expired < now
+            task = self.__next_timeout_departure(now=now)
+        return task
+
+    def __next_new_departure(self, now: Timestamp) -> Optional[Departure]:
+        priorities = self.__priorities
+        while len(priorities) > 0:
+            prior = priorities[0]
+            queue = self.__new_departures.get(prior)
+            if queue is None or len(queue) == 0:
+                # this priority is empty
+                self.__new_departures.pop(prior, None)
+                priorities.pop(0)
+                continue
+            # get first ship
+            outgo = queue.popleft()
+            outgo.touch(now=now)
+            sn = outgo.sn
+            if outgo.is_important and sn is not None:
+                # this task needs response,
+                # schedule it with expired time and build index for it
+                self.__map[sn] = outgo
+                self.__schedule(ship=outgo, priority=outgo.priority, sn=sn, now=now)
+            else:
+                # disposable ship needs no response,
+                # remove it immediately
+                self.__all_departures.discard(outgo)
+            return outgo
+
+    def __expire(self, now: Timestamp) -> int:
+        """ Move expired ships to the timeout heap, sorted by priority;
+            return count of finished ships removed """
+        timer = self.__timer
+        timeout = self.__timeout
+        schedules = self.__schedules
+        count = 0
+        while len(timer) > 0 and timer[0][0] <= now:
+            _, seq, sn = heapq.heappop(timer)
+            item = schedules.get(sn)
+            if item is None or item[1] != seq:
+                # removed or rescheduled
+                continue
+            ship = self.__map.get(sn)
+            if ship.get_status(now=now) == ShipStatus.DONE:
+                # task done, remove it from memory cache
+                self.__remove_ship(ship=ship, sn=sn)
+                self.__finish(sn=sn, now=now)
+                count += 1
+            else:
+                heapq.heappush(timeout, (item[0], seq, sn))
+        return count
+
+    def __next_timeout_departure(self, now: Timestamp) -> Optional[Departure]:
+        timeout = self.__timeout
+        schedules = self.__schedules
+        # 1. move expired ships to the timeout heap
+        self.__expire(now=now)
+        # 2. seeking timeout task with the smallest priority
+        while len(timeout) > 0:
+            prior, seq, sn = heapq.heappop(timeout)
+            item = schedules.get(sn)
+            if item is None or item[1] != seq:
+                # removed or rescheduled
+                continue
+            ship = self.__map.get(sn)
+            status = ship.get_status(now=now)
+            if status == ShipStatus.TIMEOUT:
+                # response timeout, needs retry now.
+                # update expired time and move to next priority
+                ship.touch(now=now)
+                self.__schedule(ship=ship, priority=(prior + 1), sn=sn, now=now)
+                return ship
+            elif status == ShipStatus.FAILED:
+                # try too many times and still missing response,
+                # task failed, remove this ship.
+                self.__remove_ship(ship=ship, sn=sn)
+                return ship
+            elif status == ShipStatus.DONE:
+                # task done, remove it from memory cache
+                self.__remove_ship(ship=ship, sn=sn)
+                self.__finish(sn=sn, now=now)
+            else:
+                # not expired yet, check it again later
+                self.__schedule(ship=ship, priority=prior, sn=sn, now=now)
+
+    # Override
+    def purge(self, now: Timestamp = 0) -> int:
+        if now <= 0:
+            now = time.time()
+        # 1. seeking finished tasks in the expired ones,
+        #    others will be checked when they expire
+        count = self.__expire(now=now)
+        # 2. rebuild the timer when too many items were ignored
+        if len(self.__timer) > (len(self.__schedules) << 1) + 64:
+            alive = [item for item in self.__timer if self.__schedules.get(item[2], (0, 0))[1] == item[1]]
+            heapq.heapify(alive)
+            self.__timer = alive
+        # 3. seeking neglected finished times, in the order they finished
+        ago = now - 3600
+        queue = self.__finished_queue
+        while len(queue) > 0 and queue[0][0] < ago:
+            when, sn = queue.popleft()
+            if self.__finished_times.get(sn) == when:
+                # long time ago
+                self.__finished_times.pop(sn, None)
+        return count
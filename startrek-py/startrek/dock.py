@@ -33,8 +33,8 @@ from typing import Optional
 
 from .types import Timestamp
 
-from .arrival import Arrival, ArrivalHall
-from .departure import Departure, DepartureHall
+from .arrival import Arrival, ArrivalHall, BoundedArrivalHall
+from .departure import Departure, DepartureHall, TimedDepartureHall
 
 
 """
@@ -150,3 +150,20 @@ class LockedDock(Dock):
             self.__next_purge_time = now + 30
         with self.__lock:
             return super().purge(now=now)
+
+
+class TimedDock(LockedDock):
+    """
+        Dock for heavy traffic,
+        the arrival ships are limited by memory caps, and
+        the departure ships waiting for responses are scheduled by a timer,
+        set it via 'StarPorter._create_dock()'
+    """
+
+    # Override
+    def _create_arrival_hall(self) -> ArrivalHall:
+        return BoundedArrivalHall()
+
+    # Override
+    def _create_departure_hall(self) -> DepartureHall:
+        return TimedDepartureHall()
@@ -29,8 +29,10 @@
 # ==============================================================================
 
 from abc import ABC  # , abstractmethod
+from typing import Optional
 
-from ..skywalker import PrimeMetronome
+from ..types import Timestamp, Duration
+from ..skywalker import TimingWheel
 
 from .machine import S, C, U, T
 from .base import BaseMachine
@@ -38,6 +40,13 @@ from .base import BaseMachine
 
 # noinspection PyAbstractClass
 class AutoMachine(BaseMachine[C, T, S], ABC):
+    """
+        Auto Machine
+        ~~~~~~~~~~~~
+
+        Ticked by the timing wheel of the event loop which starts it,
+        override '_next_deadline()' to be ticked only when needed.
+    """
 
     # @property  # Override
     # @abstractmethod
@@ -47,28 +56,79 @@ class AutoMachine(BaseMachine[C, T, S], ABC):
     #         f'Not implemented: {type(self).__module__}.{type(self).__name__}.context getter'
     #     )
 
+    def __init__(self):
+        super().__init__()
+        self.__timer = None
+        self.__ticking = False  # started and not paused
+
+    # noinspection PyMethodMayBeStatic
+    def _create_timer(self):  # -> TimingWheel
+        """ Override for user-customized timer (e.g.: PrimeMetronome()) """
+        return TimingWheel.current()
+
+    @property  # protected
+    def timer(self):  # -> TimingWheel
+        timer = self.__timer
+        if timer is None:
+            timer = self._create_timer()
+            self.__timer = timer
+        return timer
+
+    # noinspection PyMethodMayBeStatic
+    def _next_deadline(self, now: Timestamp) -> Optional[Timestamp]:
+        """
+        Get the time when the transitions of current state need to be evaluated again
+
+        :param now: current time
+        :return: None for ticking periodically
+        """
+        return None
+
+    def wakeup(self, when: Timestamp = 0):
+        """ Evaluate the transitions at the time (as soon as possible if 0) """
+        if not self.__ticking:
+            # stopped or paused
+            return
+        timer = self.timer
+        if isinstance(timer, TimingWheel):
+            timer.schedule(ticker=self, when=when)
+
+    # Override
+    async def tick(self, now: Timestamp, elapsed: Duration):
+        await super().tick(now=now, elapsed=elapsed)
+        deadline = self._next_deadline(now=now)
+        if deadline is not None:
+            self.wakeup(when=deadline)
+
+    # protected
+    def _start_timer(self):
+        """ Start ticking periodically, override to tick at deadlines only """
+        self.timer.add_ticker(ticker=self)
+
     # Override
     async def start(self) -> bool:
         ok = await super().start()
-        timer = PrimeMetronome()
-        timer.add_ticker(ticker=self)
+        if ok:
+            self.__ticking = True
+            self._start_timer()
         return ok
 
     # Override
     async def stop(self) -> bool:
-        timer = PrimeMetronome()
-        timer.remove_ticker(ticker=self)
+        self.__ticking = False
+        self.timer.remove_ticker(ticker=self)
         return await super().stop()
 
     # Override
     async def pause(self) -> bool:
-        timer = PrimeMetronome()
-        timer.remove_ticker(ticker=self)
+        self.__ticking = False
+        self.timer.remove_ticker(ticker=self)
         return await super().pause()
 
     # Override
     async def resume(self) -> bool:
         ok = await super().resume()
-        timer = PrimeMetronome()
-        timer.add_ticker(ticker=self)
+        if ok:
+            self.__ticking = True
+            self._start_timer()
         return ok
@@ -67,6 +67,10 @@ class BaseState(State[C, T], ABC):
     def index(self) -> int:
         return self.__index
 
+    @property
+    def transitions(self) -> List[Transition[C]]:
+        return self.__transitions
+
     def add_transition(self, transition: Transition[C]):
         assert transition not in self.__transitions, 'transition exists: %s' % transition
         self.__transitions.append(transition)
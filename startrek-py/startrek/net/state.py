@@ -31,10 +31,11 @@
 import weakref
 from abc import ABC, abstractmethod
 from enum import IntEnum
-from typing import Union
+from typing import Optional, Union
 
-from ..types import Timestamp
-from ..fsm import Context, BaseTransition, BaseState, BaseMachine
+from ..types import Timestamp, Duration
+from ..skywalker import TimingWheel
+from ..fsm import Context, BaseTransition, BaseState, AutoMachine
 
 from .connection import Connection, TimedConnection
 
@@ -69,12 +70,23 @@ from .connection import Connection, TimedConnection
 """
 
 
-class StateMachine(BaseMachine, Context):
-    """ Connection State Machine """
+class StateMachine(AutoMachine, Context):
+    """
+        Connection State Machine
+        ~~~~~~~~~~~~~~~~~~~~~~~~
+
+        Ticked by the timing wheel only when:
+            1. the deadline of current state reached;
+            2. the connection woke it up (data received or sent,
+               channel changed or lost);
+        so an idle connection costs nothing until its next deadline.
+    """
 
     def __init__(self, connection: Connection):
         super().__init__()
         self.__conn_ref = weakref.ref(connection)
+        self.__previous = None  # state before ticking
+        self.__woken = False    # wakeup() called while ticking
         # init states
         builder = self._create_state_builder()
         self.add_state(state=builder.get_default_state())
@@ -96,6 +108,42 @@ class StateMachine(BaseMachine, Context):
     def connection(self) -> Connection:
         return self.__conn_ref()
 
+    # Override
+    def wakeup(self, when: Timestamp = 0):
+        """ Evaluate the transitions at the time (on next tick if 0) """
+        if when <= 0:
+            self.__woken = True
+        super().wakeup(when=when)
+
+    # Override
+    def _start_timer(self):
+        if isinstance(self.timer, TimingWheel):
+            # not ticked periodically, evaluate the current state on next tick,
+            # then it will be scheduled by the deadline
+            self.wakeup()
+        else:
+            super()._start_timer()
+
+    # Override
+    async def tick(self, now: Timestamp, elapsed: Duration):
+        self.__woken = False
+        previous = self.current_state
+        await super().tick(now=now, elapsed=elapsed)
+        self.__previous = previous
+
+    # Override
+    def _next_deadline(self, now: Timestamp) -> Optional[Timestamp]:
+        current = self.current_state
+        if current is not self.__previous or self.__woken:
+            # state changed, or woken up by the enter/exit events,
+            # evaluate the new state on next tick
+            return 0
+        elif isinstance(current, ConnectionState):
+            # None means waiting for events, nothing to schedule
+            return current.next_time(ctx=self, now=now)
+        else:
+            return None
+
 
 class StateOrder(IntEnum):
     """ Connection State Order """
@@ -121,6 +169,18 @@ class StateTransition(BaseTransition[StateMachine], ABC):
             f'Not implemented: {type(self).__module__}.{type(self).__name__}.evaluate()'
         )
 
+    # noinspection PyMethodMayBeStatic
+    def next_time(self, ctx: StateMachine, now: Timestamp) -> Optional[Timestamp]:
+        """
+        Get the time when this transition may become true without any event
+
+        :param ctx: state machine
+        :param now: current time
+        :return: 0 for evaluating on every tick (default),
+                 None for waiting for events (data received/sent, alive changed)
+        """
+        return 0
+
 
 class ConnectionState(BaseState[StateMachine, StateTransition]):
     """
@@ -184,6 +244,20 @@ class ConnectionState(BaseState[StateMachine, StateTransition]):
         else:
             return True
 
+    def next_time(self, ctx: StateMachine, now: Timestamp) -> Optional[Timestamp]:
+        """ Get the earliest time of the transitions """
+        deadline = None
+        for trans in self.transitions:
+            assert isinstance(trans, StateTransition), 'transition error: %s' % trans
+            when = trans.next_time(ctx, now=now)
+            if when is None:
+                continue
+            elif when <= 0:
+                return 0
+            elif deadline is None or when < deadline:
+                deadline = when
+        return deadline
+
     # Override
     async def on_enter(self, old, ctx: StateMachine, now: Timestamp):
         self.__time = now
@@ -372,6 +446,14 @@ class ReadyExpiredTransition(StateTransition):
         # long time no response, change state to 'maintain_expired'
         return not conn.is_received_recently(now=now)
 
+    # Override
+    def next_time(self, ctx: StateMachine, now: Timestamp) -> Optional[Timestamp]:
+        conn = ctx.connection
+        if isinstance(conn, TimedConnection):
+            # expired if nothing received before this time
+            return conn.last_received_time + conn.EXPIRES
+        return 0
+
 
 class ReadyErrorTransition(StateTransition):
     """ Ready -> Error """
@@ -382,6 +464,11 @@ class ReadyErrorTransition(StateTransition):
         # connection lost, change state to 'error
         return conn is None or not conn.alive
 
+    # Override
+    def next_time(self, ctx: StateMachine, now: Timestamp) -> Optional[Timestamp]:
+        # waiting for connection status changed
+        return None
+
 
 class ExpiredMaintainingTransition(StateTransition):
     """ Expired -> Maintaining """
@@ -396,6 +483,11 @@ class ExpiredMaintainingTransition(StateTransition):
         # sent recently, change state to 'maintaining'
         return conn.is_sent_recently(now=now)
 
+    # Override
+    def next_time(self, ctx: StateMachine, now: Timestamp) -> Optional[Timestamp]:
+        # waiting for data sent
+        return None
+
 
 class ExpiredErrorTransition(StateTransition):
     """ Expired -> Error """
@@ -410,6 +502,14 @@ class ExpiredErrorTransition(StateTransition):
         # long time no response, change state to 'error'
         return conn.is_not_received_long_time_ago(now=now)
 
+    # Override
+    def next_time(self, ctx: StateMachine, now: Timestamp) -> Optional[Timestamp]:
+        conn = ctx.connection
+        if isinstance(conn, TimedConnection):
+            # error if nothing received before this time
+            return conn.last_received_time + (conn.EXPIRES << 3)
+        return 0
+
 
 class MaintainingReadyTransition(StateTransition):
     """ Maintaining -> Ready """
@@ -424,6 +524,11 @@ class MaintainingReadyTransition(StateTransition):
         # received recently, change state to 'ready'
         return conn.is_received_recently(now=now)
 
+    # Override
+    def next_time(self, ctx: StateMachine, now: Timestamp) -> Optional[Timestamp]:
+        # waiting for data received
+        return None
+
 
 class MaintainingExpiredTransition(StateTransition):
     """ Maintaining -> Expired """
@@ -438,6 +543,14 @@ class MaintainingExpiredTransition(StateTransition):
         # long time no sending, change state to 'maintain_expired'
         return not conn.is_sent_recently(now=now)
 
+    # Override
+    def next_time(self, ctx: StateMachine, now: Timestamp) -> Optional[Timestamp]:
+        conn = ctx.connection
+        if isinstance(conn, TimedConnection):
+            # expired if nothing sent before this time
+            return conn.last_sent_time + conn.EXPIRES
+        return 0
+
 
 class MaintainingErrorTransition(StateTransition):
     """ Maintaining -> Error """
@@ -453,6 +566,14 @@ class MaintainingErrorTransition(StateTransition):
         # long time no response, change state to 'error'
         return conn.is_not_received_long_time_ago(now=now)
 
+    # Override
+    def next_time(self, ctx: StateMachine, now: Timestamp) -> Optional[Timestamp]:
+        conn = ctx.connection
+        if isinstance(conn, TimedConnection):
+            # error if nothing received before this time
+            return conn.last_received_time + (conn.EXPIRES << 3)
+        return 0
+
 
 class ErrorDefaultTransition(StateTransition):
     """ Error -> Default """
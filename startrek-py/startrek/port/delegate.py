@@ -98,3 +98,12 @@ class PorterDelegate(ABC):
         raise NotImplementedError(
             f'Not implemented: {type(self).__module__}.{type(self).__name__}.porter_status_changed()'
         )
+
+    async def porter_drained(self, porter: Porter):
+        """
+        Callback when the waiting queue drained below the low watermark,
+        the producer can continue sending data now
+
+        :param porter:   connection docker
+        """
+        pass
@@ -26,6 +26,7 @@
 from .ticker import Singleton
 from .ticker import Ticker
 from .ticker import Metronome, PrimeMetronome
+from .ticker import TimingWheel
 
 from .runner import Processor, Handler, Runnable
 from .runner import Runner
@@ -39,6 +40,7 @@ __all__ = [
 
     'Ticker',
     'Metronome', 'PrimeMetronome',
+    'TimingWheel',
 
     'Processor', 'Handler', 'Runnable',
     'Runner',
@@ -23,12 +23,13 @@
 # SOFTWARE.
 # ==============================================================================
 
+import asyncio
 import threading
 import time
 import traceback
-from weakref import WeakSet
+from weakref import WeakSet, WeakKeyDictionary
 from abc import ABC, abstractmethod
-from typing import Set
+from typing import Optional, Set, List
 
 from ..types import Timestamp, Duration
 from ..utils import Logging
@@ -125,6 +126,194 @@ class Metronome(Runner, Logging):
         return True
 
 
+class TimingWheel(Logging):
+    """
+        Timing Wheel
+        ~~~~~~~~~~~~
+
+        Driving tickers on the event loop which they are running in,
+        instead of a daemon thread with its own loop.
+
+        Tickers are hashed into the slots of the wheel by their next tick time,
+        so each step evaluates only the tickers due in the current slot.
+        A ticker added by 'add_ticker()' will be ticked periodically,
+        unless it schedules its next deadline by 'schedule()' while ticking.
+
+        The wheel runs on the loop which it's bound to (or the first one which
+        schedules a ticker), tickers may be scheduled from other threads.
+    """
+
+    SLOTS = 512
+
+    def __init__(self, interval: Duration = Runner.INTERVAL_SLOW, slots: int = SLOTS,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        super().__init__()
+        assert interval > 0 and slots > 0, 'timing wheel error: %s, %d' % (interval, slots)
+        self.__interval = interval
+        self.__loop = loop
+        self.__lock = threading.Lock()
+        self.__slots: List[WeakSet] = [WeakSet() for _ in range(slots)]
+        self.__deadlines = WeakKeyDictionary()  # Ticker => (Timestamp, slot index)
+        self.__last_times = WeakKeyDictionary()  # Ticker => Timestamp
+        self.__periodic = WeakSet()             # Ticker
+        self.__fired = WeakSet()                # Ticker scheduled while ticking
+        self.__position = self.__index(when=time.time()) - 1  # index of last step
+        self.__task: Optional[asyncio.Task] = None
+
+    @property
+    def interval(self) -> Duration:
+        return self.__interval
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """ event loop driving this wheel """
+        return self.__loop
+
+    @property
+    def count(self) -> int:
+        """ count of scheduled tickers """
+        with self.__lock:
+            return len(self.__deadlines)
+
+    def __index(self, when: Timestamp) -> int:
+        return int(when / self.__interval)
+
+    def add_ticker(self, ticker: Ticker):
+        """ Tick periodically """
+        with self.__lock:
+            self.__periodic.add(ticker)
+            self.__put(ticker=ticker, when=time.time() + self.__interval)
+        self.__start()
+
+    def remove_ticker(self, ticker: Ticker):
+        with self.__lock:
+            self.__periodic.discard(ticker)
+            self.__fired.discard(ticker)
+            self.__last_times.pop(ticker, None)
+            old = self.__deadlines.pop(ticker, None)
+            if old is not None:
+                slots = self.__slots
+                slots[old[1] % len(slots)].discard(ticker)
+
+    def schedule(self, ticker: Ticker, when: Timestamp):
+        """ Tick at the time (or a little later), replace the previous deadline """
+        with self.__lock:
+            self.__put(ticker=ticker, when=when)
+        self.__start()
+
+    def __put(self, ticker: Ticker, when: Timestamp):
+        deadlines = self.__deadlines
+        slots = self.__slots
+        old = deadlines.get(ticker)
+        if old is not None:
+            slots[old[1] % len(slots)].discard(ticker)
+        # the passed slots won't be checked again until next round,
+        # so put the overdue ticker into the next slot
+        index = max(self.__index(when=when), self.__position + 1)
+        deadlines[ticker] = (when, index)
+        slots[index % len(slots)].add(ticker)
+        self.__fired.discard(ticker)
+        if ticker not in self.__last_times:
+            # elapsed time of the first tick counts from now
+            self.__last_times[ticker] = time.time()
+
+    def __start(self):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        loop = self.__loop
+        if loop is None:
+            if running is None:
+                # no event loop to bind yet,
+                # the wheel will start when scheduling on a loop
+                return
+            loop = self.__loop = running
+        if running is loop:
+            self.__run_task()
+        elif not loop.is_closed():
+            # scheduled from another thread
+            loop.call_soon_threadsafe(self.__run_task)
+
+    def __run_task(self):
+        # called on the loop thread only
+        task = self.__task
+        if task is None or task.done():
+            self.__task = self.__loop.create_task(self.__run())
+
+    async def __run(self):
+        while self.count > 0:
+            await asyncio.sleep(self.__interval)
+            await self.step(now=time.time())
+
+    async def step(self, now: Timestamp) -> int:
+        """
+        Drive tickers due in the passed slots
+
+        :param now: current time
+        :return: count of tickers ticked
+        """
+        slots = self.__slots
+        size = len(slots)
+        deadlines = self.__deadlines
+        fired = self.__fired
+        # 1. collect due tickers
+        with self.__lock:
+            start = self.__position + 1
+            end = self.__index(when=now)
+            if end - start >= size:
+                # a whole round passed
+                start = end - size + 1
+            self.__position = end
+            due = []
+            for index in range(start, end + 1):
+                bucket = slots[index % size]
+                if len(bucket) == 0:
+                    continue
+                for ticker in list(bucket):
+                    when, _ = deadlines.get(ticker, (None, 0))
+                    if when is not None and when <= now:
+                        bucket.discard(ticker)
+                        deadlines.pop(ticker, None)
+                        fired.add(ticker)
+                        due.append(ticker)
+        # 2. drive them
+        last_times = self.__last_times
+        periodic = self.__periodic
+        for ticker in due:
+            # elapsed since the previous tick of this ticker, not the previous step
+            last = last_times.get(ticker, now)
+            last_times[ticker] = now
+            try:
+                await ticker.tick(now=now, elapsed=now - last)
+            except Exception as error:
+                self.error('drive ticker error: %s, %s', error, ticker)
+                traceback.print_exc()
+            # 3. tick again in next interval if not scheduled while ticking
+            with self.__lock:
+                if ticker in fired:
+                    fired.discard(ticker)
+                    if ticker in periodic:
+                        self.__put(ticker=ticker, when=now + self.__interval)
+        return len(due)
+
+    #
+    #   Wheels for event loops
+    #
+
+    __wheels = WeakKeyDictionary()  # AbstractEventLoop => TimingWheel
+
+    @classmethod
+    def current(cls):  # -> TimingWheel
+        """ Get timing wheel for current event loop """
+        loop = asyncio.get_event_loop()
+        wheel = cls.__wheels.get(loop)
+        if wheel is None:
+            wheel = cls(loop=loop)
+            cls.__wheels[loop] = wheel
+        return wheel
+
+
 #
 #   Singleton for Prime Metronome
 #
@@ -31,11 +31,13 @@
 from .helpers import SocketReader, SocketWriter
 from .helpers import SocketHelper
 
+from .sizer import ReceiveSizer
 from .base_channel import BaseChannel
 
 from .base_conn import BaseConnection
 from .active_conn import ActiveConnection
 
+from .selector import ChannelSelector
 from .base_hub import BaseHub
 
 
@@ -44,8 +46,8 @@ __all__ = [
     'SocketReader', 'SocketWriter',
     'SocketHelper',
 
-    'BaseChannel',
+    'ReceiveSizer', 'BaseChannel',
 
     'BaseConnection', 'ActiveConnection',
-    'BaseHub',
+    'ChannelSelector', 'BaseHub',
 ]
@@ -38,6 +38,7 @@ from ..net import Channel, ChannelStatus
 
 from .helpers import SocketReader, SocketWriter
 from .helpers import SocketHelper
+from .sizer import ReceiveSizer
 
 
 class BaseChannel(AddressPairObject, Channel, ABC):
@@ -47,11 +48,18 @@ class BaseChannel(AddressPairObject, Channel, ABC):
         # inner socket
         self.__sock: Optional[socket.socket] = None
         self.__closed = None
+        # cached socket states
+        self.__bound = False
+        self.__connected = False
+        self.__readable: Optional[bool] = None  # updated by readiness poller
+        self.__writable = True                  # False after buffer overflow
         # create socket helper
         self.__helper = self._create_helper()
         # create socket reader/writer
         self.__reader = self._create_reader()
         self.__writer = self._create_writer()
+        # create receive buffer sizer
+        self.__sizer = self._create_sizer()
 
     #
     #   Socket Channel Controllers
@@ -79,6 +87,16 @@ class BaseChannel(AddressPairObject, Channel, ABC):
     def writer(self) -> SocketWriter:
         return self.__writer
 
+    # noinspection PyMethodMayBeStatic
+    def _create_sizer(self) -> Optional[ReceiveSizer]:
+        """ Override to read with adaptive buffer size, None means the hub's MSS """
+        return None
+
+    @property
+    def receive_sizer(self) -> Optional[ReceiveSizer]:
+        """ adaptive buffer size & reading statistics """
+        return self.__sizer
+
     # noinspection PyMethodMayBeStatic
     def _create_helper(self) -> SocketHelper:
         return SocketHelper()
@@ -96,6 +114,11 @@ class BaseChannel(AddressPairObject, Channel, ABC):
         """ inner socket """
         return self.__sock
 
+    @property
+    def selectable(self) -> bool:
+        """ whether the inner socket can be watched by a ChannelSelector """
+        return True
+
     async def set_socket(self, sock: Optional[socket.socket]) -> Optional[socket.socket]:
         """ set inner socket for this channel """
         # 1. replace with new socket
@@ -106,6 +129,7 @@ class BaseChannel(AddressPairObject, Channel, ABC):
         else:
             self.__sock = None
             self.__closed = True
+        self._update_state()
         # 2. close old socket
         if old is not None and old is not sock:
             helper = self.socket_helper
@@ -113,6 +137,38 @@ class BaseChannel(AddressPairObject, Channel, ABC):
         # 3. return old socket
         return old
 
+    def _update_state(self):
+        """ Refresh cached states of the inner socket, after it's bound/connected/replaced """
+        sock = self.__sock
+        if sock is None:
+            self.__bound = False
+            self.__connected = False
+        else:
+            helper = self.socket_helper
+            self.__bound = helper.is_bound(sock=sock)
+            self.__connected = helper.is_connected(sock=sock)
+        self.__readable = None
+        self.__writable = True
+
+    def _clear_state(self):
+        """ Forget cached states of the inner socket, after a socket error """
+        self.__bound = False
+        self.__connected = False
+        self.__readable = None
+        self.__writable = True
+
+    def _consume_readiness(self):
+        """ Data was read after selected, wait for the next selector event """
+        if self.__readable:
+            self.__readable = False
+
+    def update_readiness(self, readable: Optional[bool] = None, writable: Optional[bool] = None):
+        """ Update cached readiness of the inner socket (by readiness poller or I/O results) """
+        if readable is not None:
+            self.__readable = readable
+        if writable is not None:
+            self.__writable = writable
+
     #
     #   States
     #
@@ -123,15 +179,10 @@ class BaseChannel(AddressPairObject, Channel, ABC):
         if is_closed is None:
             # initializing
             return ChannelStatus.INIT
-        elif is_closed:
-            # closed
-            return ChannelStatus.CLOSED
-        sock = self.sock
-        helper = self.socket_helper
-        if sock is None or helper.is_closed(sock=sock):
+        elif is_closed or self.closed:
             # closed
             return ChannelStatus.CLOSED
-        elif helper.is_connected(sock=sock) or helper.is_bound(sock=sock):
+        elif self.__connected or self.__bound or self.bound:
             # normal
             return ChannelStatus.ALIVE
         else:
@@ -147,45 +198,58 @@ class BaseChannel(AddressPairObject, Channel, ABC):
         elif is_closed:
             # closed
             return True
-        sock = self.sock
-        helper = self.socket_helper
-        return sock is None or helper.is_closed(sock=sock)
+        sock = self.__sock
+        # checking flag of socket object, no syscall
+        return sock is None or self.socket_helper.is_closed(sock=sock)
 
     @property  # Override
     def bound(self) -> bool:
-        sock = self.sock
-        helper = self.socket_helper
-        return sock is not None and helper.is_bound(sock=sock)
+        if self.__bound:
+            # a socket won't be unbound until closed
+            return not self.closed
+        sock = self.__sock
+        if sock is None or self.closed:
+            return False
+        # not bound yet? check again, UDP socket may be bound implicitly by sending
+        bound = self.socket_helper.is_bound(sock=sock)
+        self.__bound = bound
+        return bound
 
     @property  # Override
     def connected(self) -> bool:
-        sock = self.sock
-        helper = self.socket_helper
-        return sock is not None and helper.is_connected(sock=sock)
+        # updated when the socket set or connected
+        return self.__connected and not self.closed
 
     @property  # Override
     def alive(self) -> bool:
-        return (not self.closed) and (self.connected or self.bound)
+        if self.closed:
+            return False
+        elif self.__connected or self.__bound:
+            # cached states
+            return True
+        return self.bound
 
     @property
     def available(self) -> bool:
-        sock = self.sock
-        helper = self.socket_helper
-        if sock is None or helper.is_closed(sock=sock):
+        if not self.alive:
             return False
-        elif helper.is_bound(sock=sock) or helper.is_connected(sock=sock):
-            # alive, check reading buffer
-            return helper.is_available(sock=sock)
+        readable = self.__readable
+        if readable is None:
+            # not watched by readiness poller, check reading buffer
+            return self.socket_helper.is_available(sock=self.__sock)
+        return readable
 
     @property
     def vacant(self) -> bool:
-        sock = self.sock
-        helper = self.socket_helper
-        if sock is None or helper.is_closed(sock=sock):
+        if not self.alive:
             return False
-        elif helper.is_bound(sock=sock) or helper.is_connected(sock=sock):
-            # alive, check writing buffer
-            return helper.is_vacant(sock=sock)
+        elif self.__writable:
+            # nothing blocked in the last writing
+            return True
+        # buffer was full, check writing buffer again
+        writable = self.socket_helper.is_vacant(sock=self.__sock)
+        self.__writable = writable
+        return writable
 
     @property  # Override
     def blocking(self) -> bool:
@@ -229,6 +293,7 @@ class BaseChannel(AddressPairObject, Channel, ABC):
         ok = helper.bind(sock=sock, local=address)
         assert ok, 'failed to bind socket: %s' % str(address)
         self._local = address
+        self._update_state()
         return sock
 
     # Override
@@ -246,6 +311,7 @@ class BaseChannel(AddressPairObject, Channel, ABC):
         ok = await helper.connect(sock=sock, remote=address)
         assert ok, 'failed to connect socket: %s' % str(address)
         self._remote = address
+        self._update_state()
         return sock
 
     # Override
@@ -266,31 +332,51 @@ class BaseChannel(AddressPairObject, Channel, ABC):
     # Override
     async def read(self, max_len: int) -> Optional[bytes]:
         try:
-            return await self.reader.read(max_len=max_len)
+            data = await self.reader.read(max_len=max_len)
         except OSError as error:
+            # socket error, the cached states are not trusted now
+            self._clear_state()
             await self.close()
             raise error
+        self._consume_readiness()
+        return data
 
     # Override
     async def write(self, data: bytes) -> int:
         try:
-            return await self.writer.write(data=data)
+            sent = await self.writer.write(data=data)
         except OSError as error:
+            # socket error, the cached states are not trusted now
+            self._clear_state()
             await self.close()
             raise error
+        if sent < len(data):
+            # buffer overflow
+            self.__writable = False
+        return sent
 
     # Override
     async def receive(self, max_len: int) -> Tuple[Optional[bytes], Optional[SocketAddress]]:
         try:
-            return await self.reader.receive(max_len=max_len)
+            data, remote = await self.reader.receive(max_len=max_len)
         except OSError as error:
+            # socket error, the cached states are not trusted now
+            self._clear_state()
             await self.close()
             raise error
+        self._consume_readiness()
+        return data, remote
 
     # Override
     async def send(self, data: bytes, target: SocketAddress) -> int:
         try:
-            return await self.writer.send(data=data, target=target)
+            sent = await self.writer.send(data=data, target=target)
         except OSError as error:
+            # socket error, the cached states are not trusted now
+            self._clear_state()
             await self.close()
             raise error
+        if sent < len(data):
+            # buffer overflow
+            self.__writable = False
+        return sent
@@ -30,7 +30,7 @@
 
 import time
 import weakref
-from typing import Optional
+from typing import Optional, List
 
 from ..types import Timestamp, Duration
 from ..types import SocketAddress, AddressPairObject
@@ -117,7 +117,11 @@ class BaseConnection(AddressPairObject, Connection, TimedConnection, StateDelega
                 await old.close()
             except Exception as error:
                 self.error('connection error: %s, %s', error, old)
-        # 3. return old channel
+        # 3. channel changed, evaluate the transitions on next tick
+        fsm = self.fsm
+        if fsm is not None:
+            fsm.wakeup()
+        # 4. return old channel
         return old
 
     #
@@ -205,6 +209,10 @@ class BaseConnection(AddressPairObject, Connection, TimedConnection, StateDelega
     # Override
     async def received_data(self, data: bytes):
         self.__last_received_time = time.time()  # update received time
+        fsm = self.fsm
+        if fsm is not None:
+            # evaluate the transitions on next tick
+            fsm.wakeup()
         delegate = self.delegate
         if delegate is not None:
             await delegate.connection_received(data=data, connection=self)
@@ -220,9 +228,17 @@ class BaseConnection(AddressPairObject, Connection, TimedConnection, StateDelega
         sent = await channel.send(data=data, target=target)
         if sent > 0:
             # update sent time
-            self.__last_sent_time = time.time()
+            self._update_sent_time(now=time.time())
         return sent
 
+    # protected
+    def _update_sent_time(self, now: Timestamp):
+        self.__last_sent_time = now
+        fsm = self.fsm
+        if fsm is not None:
+            # evaluate the transitions on next tick
+            fsm.wakeup()
+
     # Override
     async def send_data(self, data: bytes) -> int:
         # try to send data
@@ -245,6 +261,41 @@ class BaseConnection(AddressPairObject, Connection, TimedConnection, StateDelega
                 await delegate.connection_failed(error=error, data=data, connection=self)
         return sent
 
+    async def send_stream(self, fragments: List[bytes]) -> int:
+        """
+        Write fragments into the stream with one call
+
+        :param fragments: outgo data
+        :return: count of bytes sent, -1 on error
+        """
+        # try to send data
+        error = None
+        sent = -1
+        try:
+            sent = await self._send(data=b''.join(fragments), target=self.remote_address)
+            if sent < 0:  # == -1:
+                raise OSError('failed to send: %d fragment(s) to %s' % (len(fragments), self.remote_address))
+        except OSError as e:
+            error = e
+            # socket error, close current channel
+            await self._set_channel(channel=None)
+        # callback for each fragment
+        delegate = self.delegate
+        if delegate is None:
+            return sent
+        elif error is not None:
+            for data in fragments:
+                await delegate.connection_failed(error=error, data=data, connection=self)
+            return sent
+        rest = sent
+        for data in fragments:
+            if rest <= 0:
+                break
+            size = min(rest, len(data))
+            await delegate.connection_sent(sent=size, data=data, connection=self)
+            rest -= size
+        return sent
+
     #
     #   States
     #
@@ -257,13 +308,9 @@ class BaseConnection(AddressPairObject, Connection, TimedConnection, StateDelega
 
     # Override
     async def tick(self, now: Timestamp, elapsed: Duration):
-        if self.__channel_ref is None:
-            # not initialized
-            return
-        fsm = self.fsm
-        if fsm is not None:
-            # drive state machine forward
-            await fsm.tick(now=now, elapsed=elapsed)
+        # the state machine is ticked by the timing wheel at its deadlines,
+        # and woken up by the I/O events, no need to poll it here
+        pass
 
     #
     #   Timed Connection
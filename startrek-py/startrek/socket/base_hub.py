@@ -42,6 +42,8 @@ from ..net import Channel, ChannelStatus
 from ..net import Connection, ConnectionDelegate
 
 from .base_conn import BaseConnection
+from .base_channel import BaseChannel
+from .selector import ChannelSelector
 
 
 class ConnectionPool(AddressPairMap[Connection]):
@@ -82,17 +84,52 @@ class BaseHub(Hub, Logging):
     """
     MSS = 1472  # 1500 - 20 - 8
 
+    CLEANUP_INTERVAL = 1.0  # seconds between checking all channels in readiness-driven mode
+
     def __init__(self, delegate: ConnectionDelegate):
         super().__init__()
         self.__delegate = weakref.ref(delegate)
         self.__connection_pool = self._create_connection_pool()
-        self.__last_time_drive_connection = time.time()
+        self.__selector = self._create_selector()
+        self.__last_time_cleanup_channels = 0
         self.__lock = threading.Lock()
 
     # noinspection PyMethodMayBeStatic
     def _create_connection_pool(self):
         return ConnectionPool()
 
+    # noinspection PyMethodMayBeStatic
+    def _create_selector(self) -> Optional[ChannelSelector]:
+        """
+        Override to return a ChannelSelector for readiness-driven mode,
+        then only the channels ready for reading will be driven in process();
+        default is None, which means trying to receive from all channels.
+        """
+        return None
+
+    @property  # protected
+    def selector(self) -> Optional[ChannelSelector]:
+        return self.__selector
+
+    def _watch_channel(self, channel: Optional[Channel]):
+        """ Register the channel to the selector, call it after the channel cached """
+        selector = self.__selector
+        if selector is not None and channel is not None:
+            selector.register(channel=channel)
+
+    def _unwatch_channel(self, channel: Optional[Channel]):
+        """ Unregister the channel from the selector, call it after the channel removed """
+        selector = self.__selector
+        if selector is not None and channel is not None:
+            selector.unregister(channel=channel)
+
+    def close_selector(self):
+        """ Stop watching all channels, call it when the hub shuts down """
+        selector = self.__selector
+        if selector is not None:
+            self.__selector = None
+            selector.close()
+
     @property
     def delegate(self) -> ConnectionDelegate:
         return self.__delegate()
@@ -221,6 +258,30 @@ class BaseHub(Hub, Logging):
         except Exception as error:
             self.error('channel error: %s, %s', error, channel)
 
+    async def _channel_error(self, error: OSError, channel: Channel):
+        """ remove and close the error channel """
+        remote = channel.remote_address
+        local = channel.local_address
+        delegate = self.delegate
+        if delegate is None or remote is None:
+            # UDP channel may not connected
+            # so no connection for it
+            cached = self._remove_channel(channel=channel, remote=remote, local=local)
+        else:
+            # remove channel and callback with connection
+            conn = self._get_connection(remote=remote, local=local)
+            cached = self._remove_channel(channel=channel, remote=remote, local=local)
+            if conn is not None:
+                await delegate.connection_error(error=error, connection=conn)
+        # channel lost, let the connection go on
+        self._wakeup_connection(remote=remote, local=local)
+        # close removed/error channels
+        if cached is None or cached is Channel:
+            pass
+        else:
+            await self._close_channel(channel=cached)
+        await self._close_channel(channel=channel)
+
     async def _drive_channel(self, channel: Channel) -> bool:
         cs = channel.status
         if cs == ChannelStatus.INIT:
@@ -233,27 +294,14 @@ class BaseHub(Hub, Logging):
         # cs == alive
         try:
             # try to receive
-            data, remote = await channel.receive(max_len=self.MSS)
-        except OSError as error:
-            remote = channel.remote_address
-            local = channel.local_address
-            delegate = self.delegate
-            if delegate is None or remote is None:
-                # UDP channel may not connected
-                # so no connection for it
-                cached = self._remove_channel(channel=channel, remote=remote, local=local)
+            sizer = channel.receive_sizer if isinstance(channel, BaseChannel) else None
+            if sizer is None:
+                data, remote = await channel.receive(max_len=self.MSS)
             else:
-                # remove channel and callback with connection
-                conn = self._get_connection(remote=remote, local=local)
-                cached = self._remove_channel(channel=channel, remote=remote, local=local)
-                if conn is not None:
-                    await delegate.connection_error(error=error, connection=conn)
-            # close removed/error channels
-            if cached is None or cached is Channel:
-                pass
-            else:
-                await self._close_channel(channel=cached)
-            await self._close_channel(channel=channel)
+                data, remote = await channel.receive(max_len=sizer.size)
+                sizer.record(received=0 if data is None else len(data))
+        except OSError as error:
+            await self._channel_error(error=error, channel=channel)
             return False
         if remote is None or data is None or len(data) == 0:
             # received nothing
@@ -274,15 +322,15 @@ class BaseHub(Hub, Logging):
                 count += 1
         return count
 
-    async def _drive_connections(self, connections: Iterable[Connection]):
-        now = time.time()
-        elapsed = now - self.__last_time_drive_connection
-        for conn in connections:
-            # drive connection to go on
-            await conn.tick(now=now, elapsed=elapsed)
-            # NOTICE: let the delegate to decide whether close an error connection
-            #         or just remove it.
-        self.__last_time_drive_connection = now
+    def _wakeup_connection(self, remote: Optional[SocketAddress], local: Optional[SocketAddress]):
+        """ Wake up the state machine of the connection when its channel lost """
+        if remote is None:
+            return
+        conn = self._get_connection(remote=remote, local=local)
+        if isinstance(conn, BaseConnection):
+            fsm = conn.fsm
+            if fsm is not None:
+                fsm.wakeup()
 
     async def _cleanup_channels(self, channels: Iterable[Channel]):
         for sock in channels:
@@ -300,6 +348,8 @@ class BaseHub(Hub, Logging):
             else:
                 # should not happen
                 await self._close_channel(channel=cached)
+            # channel lost, let the connection go on
+            self._wakeup_connection(remote=sock.remote_address, local=sock.local_address)
 
     async def _cleanup_connections(self, connections: Iterable[Connection]):
         # NOTICE: multi connections may share same channel (UDP Hub)
@@ -322,13 +372,22 @@ class BaseHub(Hub, Logging):
 
     # Override
     async def process(self) -> bool:
-        # 1. drive all channels to receive data
-        channels = self._all_channels()
-        count = await self._drive_channels(channels=channels)
-        # 2. drive all connections to move on
-        connections = self._all_connections()
-        await self._drive_connections(connections=connections)
-        # 3. cleanup closed channels and connections
+        selector = self.__selector
+        if selector is None:
+            # 1. drive all channels to receive data
+            channels = self._all_channels()
+            count = await self._drive_channels(channels=channels)
+        else:
+            # 1. readiness-driven mode,
+            #    drive the channels which have data to be read only
+            count = await self._drive_channels(channels=selector.ready_channels())
+            now = time.time()
+            if now - self.__last_time_cleanup_channels < self.CLEANUP_INTERVAL:
+                return count > 0
+            channels = self._all_channels()
+            self.__last_time_cleanup_channels = now
+        # 2. cleanup closed channels and connections,
+        #    the connections are driven by their state machines on the timing wheel
         await self._cleanup_channels(channels=channels)
-        await self._cleanup_connections(connections=connections)
+        await self._cleanup_connections(connections=self._all_connections())
         return count > 0
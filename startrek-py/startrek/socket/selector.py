@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+#
+#   Star Trek: Interstellar Transport
+#
+#                                Written in 2026 by Moky <albert.moky@gmail.com>
+#
+# ==============================================================================
+# MIT License
+#
+# Copyright (c) 2021 Albert Moky
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ==============================================================================
+
+import selectors
+import threading
+import weakref
+from typing import Optional, Set, List
+
+from ..net import Channel
+
+from .base_channel import BaseChannel
+
+
+class ChannelSelector:
+    """
+        Readiness Poller
+        ~~~~~~~~~~~~~~~~
+
+        Watching the inner sockets of channels with the system selector
+        (epoll/kqueue/poll/select), so the hub needs only to drive the channels
+        which are ready for reading, instead of trying all of them one by one.
+
+        Channels are registered/unregistered by the hub when they are cached/removed,
+        the ones which cannot be watched (unknown channel, socket not set yet,
+        or socket drained by others) will be polled on each tick as before.
+    """
+
+    def __init__(self, selector: Optional[selectors.BaseSelector] = None):
+        super().__init__()
+        if selector is None:
+            selector = selectors.DefaultSelector()
+        self.__selector = selector
+        self.__others: Set[Channel] = set()  # channels polled without selector
+        self.__lock = threading.Lock()  # channels may be registered in the accepting thread
+
+    def register(self, channel: Channel):
+        """ Start watching the channel """
+        with self.__lock:
+            self.__watch(channel=channel)
+
+    def unregister(self, channel: Channel):
+        """ Stop watching the channel """
+        with self.__lock:
+            self.__others.discard(channel)
+            self.__forget(channel=channel)
+
+    def __watch(self, channel: Channel) -> bool:
+        sock = _watchable_socket(channel=channel)
+        if sock is None:
+            # cannot watch it now, poll it instead
+            self.__others.add(channel)
+            return False
+        selector = self.__selector
+        if selector.get_map() is None:
+            # selector closed
+            return False
+        self.__others.discard(channel)
+        key = selector.get_map().get(sock.fileno())
+        if key is not None:
+            stale = key.data()
+            if stale is channel and key.fileobj is sock:
+                # watching already
+                return True
+            # the file descriptor may be reused by a new socket,
+            # while the closed one is still waiting for removing
+            selector.unregister(key.fileobj)
+            if stale is not None and stale is not channel:
+                self.__others.add(stale)
+        selector.register(sock, selectors.EVENT_READ, weakref.ref(channel))
+        # not ready until selected
+        channel.update_readiness(readable=False)
+        return True
+
+    def __forget(self, channel: Channel):
+        selector = self.__selector
+        keys = selector.get_map()
+        if keys is None:
+            # selector closed
+            return
+        sock = channel.sock if isinstance(channel, BaseChannel) else None
+        key = None
+        if sock is not None:
+            try:
+                key = selector.get_key(sock)
+            except (KeyError, ValueError):
+                key = None
+        if key is None:
+            # socket closed or replaced, search it
+            for item in keys.values():
+                if item.data() is channel:
+                    key = item
+                    break
+        if key is not None and key.data() is channel:
+            try:
+                selector.unregister(key.fileobj)
+            except (KeyError, ValueError):
+                pass
+
+    def select(self, timeout: Optional[float] = 0) -> List[Channel]:
+        """
+        Get channels ready for reading
+
+        :param timeout: seconds to wait, 0 means checking without blocking
+        :return: ready channels
+        """
+        ready = []
+        try:
+            events = self.__selector.select(timeout=timeout)
+        except (OSError, ValueError):
+            # selector error, try again next time
+            return ready
+        for key, _ in events:
+            channel = key.data()
+            if channel is not None:
+                channel.update_readiness(readable=True)
+                ready.append(channel)
+        return ready
+
+    def ready_channels(self) -> List[Channel]:
+        """
+        Get the ready channels, and the ones cannot be watched
+
+        :return: channels to be driven
+        """
+        ready = self.select(timeout=0)
+        if len(self.__others) > 0:
+            with self.__lock:
+                # socket set now? watch it
+                others = [channel for channel in list(self.__others) if not self.__watch(channel=channel)]
+            ready.extend(others)
+        return ready
+
+    def close(self):
+        """ Stop watching all sockets """
+        with self.__lock:
+            self.__others.clear()
+            self.__selector.close()
+
+
+def _watchable_socket(channel: Channel):
+    if not isinstance(channel, BaseChannel) or not channel.selectable:
+        return None
+    sock = channel.sock
+    if sock is None:
+        # socket not set yet
+        return None
+    try:
+        if sock.fileno() < 0:
+            # socket closed
+            return None
+    except OSError:
+        return None
+    return sock
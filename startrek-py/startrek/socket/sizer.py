@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+#
+#   Star Trek: Interstellar Transport
+#
+#                                Written in 2026 by Moky <albert.moky@gmail.com>
+#
+# ==============================================================================
+# MIT License
+#
+# Copyright (c) 2021 Albert Moky
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ==============================================================================
+
+
+from typing import List
+
+
+class ReceiveSizer:
+    """
+        Adaptive Receive Buffer Size
+        ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+        Guessing the buffer size for the next read of a stream channel:
+        grows quickly while the reads filled the buffer (bulk transfer),
+        and shrinks slowly after two reads in a row came out much smaller.
+    """
+
+    MINIMUM = 512
+    INITIAL = 2048
+    MAXIMUM = 65536  # 64 KB
+
+    INDEX_INCREMENT = 2  # x4
+    INDEX_DECREMENT = 1  # /2
+
+    def __init__(self, minimum: int = MINIMUM, initial: int = INITIAL, maximum: int = MAXIMUM):
+        super().__init__()
+        assert 0 < minimum <= initial <= maximum, 'buffer size error: %d, %d, %d' % (minimum, initial, maximum)
+        self.__table = _size_table(minimum=minimum, maximum=maximum)
+        self.__index = _size_index(table=self.__table, size=initial)
+        self.__shrinking = False  # last read was small
+        # statistics
+        self.__reads = 0
+        self.__bytes = 0
+        self.__grows = 0
+        self.__shrinks = 0
+
+    def __str__(self) -> str:
+        cname = self.__class__.__name__
+        return '<%s size=%d reads=%d bytes=%d grows=%d shrinks=%d />' % (cname, self.size, self.__reads, self.__bytes,
+                                                                         self.__grows, self.__shrinks)
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    @property
+    def size(self) -> int:
+        """ buffer size for next read """
+        return self.__table[self.__index]
+
+    @property
+    def reads(self) -> int:
+        """ count of reads recorded """
+        return self.__reads
+
+    @property
+    def bytes(self) -> int:
+        """ total bytes received """
+        return self.__bytes
+
+    @property
+    def grows(self) -> int:
+        return self.__grows
+
+    @property
+    def shrinks(self) -> int:
+        return self.__shrinks
+
+    def record(self, received: int):
+        """ Update the buffer size with length of data received in last read """
+        if received <= 0:
+            # nothing to read, no hint for the size
+            return
+        self.__reads += 1
+        self.__bytes += received
+        table = self.__table
+        index = self.__index
+        if received >= table[index]:
+            # buffer filled, there may be more data waiting
+            self.__shrinking = False
+            if index < len(table) - 1:
+                self.__index = min(index + self.INDEX_INCREMENT, len(table) - 1)
+                self.__grows += 1
+        elif index > 0 and received <= table[max(0, index - self.INDEX_DECREMENT)]:
+            # much smaller than the buffer, shrink on the second time
+            if self.__shrinking:
+                self.__shrinking = False
+                self.__index = max(index - self.INDEX_DECREMENT, 0)
+                self.__shrinks += 1
+            else:
+                self.__shrinking = True
+        else:
+            self.__shrinking = False
+
+
+def _size_table(minimum: int, maximum: int) -> List[int]:
+    """ doubling from minimum to maximum """
+    table = []
+    size = minimum
+    while size < maximum:
+        table.append(size)
+        size <<= 1
+    table.append(maximum)
+    return table
+
+
+def _size_index(table: List[int], size: int) -> int:
+    """ index of the first one not less than size """
+    for index in range(len(table)):
+        if table[index] >= size:
+            return index
+    return len(table) - 1
@@ -31,15 +31,16 @@
 import time
 import weakref
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Optional, List, Tuple, Dict
 
 from .types import Timestamp
 from .types import SocketAddress, AddressPairObject
 from .net import Connection
-from .port import Arrival, Departure, ShipStatus
+from .port import Arrival, Departure, ShipStatus, DeparturePriority
 from .port import Porter, PorterStatus, PorterDelegate
 from .port.docker import status_from_state
 
+from .departure import DepartureShip, RttEstimator
 from .dock import Dock, LockedDock
 
 
@@ -55,20 +56,46 @@ class StarPorter(AddressPairObject, Porter, ABC):
             - _check_arrival(ship)
     """
 
+    # max bytes of outgo tasks gathered in one processing,
+    # 0 means sending one task each time
+    SEND_BUDGET = 16 * 1024
+
+    # watermarks of the outgo tasks waiting to be sent (bytes & ships),
+    # new tasks will be refused after reaching any high watermark, until
+    # the waiting queue drained below the low watermarks; 0 means no limit
+    HIGH_WATERMARK = 1024 * 1024
+    LOW_WATERMARK = 256 * 1024
+    HIGH_WATERMARK_COUNT = 4096
+    LOW_WATERMARK_COUNT = 1024
+
     def __init__(self, remote: SocketAddress, local: Optional[SocketAddress]):
         super().__init__(remote=remote, local=local)
         self.__dock = self._create_dock()
+        self.__estimator = self._create_estimator()
         self.__delegate_ref = None
         self.__conn_ref = None
-        # remaining data to be sent
-        self.__last_outgo: Optional[Departure] = None
-        self.__last_fragments: List[bytes] = []
+        # remaining tasks with data to be sent
+        self.__remaining: List[Tuple[Departure, List[bytes]]] = []
+        # outgo tasks not sent yet
+        self.__waiting: Dict[Departure, int] = {}  # ship => length of data
+        self.__waiting_bytes = 0
+        self.__writable = True
 
     # noinspection PyMethodMayBeStatic
     def _create_dock(self) -> Dock:
         """ Override for user-customized dock """
         return LockedDock()
 
+    # noinspection PyMethodMayBeStatic
+    def _create_estimator(self) -> Optional[RttEstimator]:
+        """ Override for user-customized estimator, None means fixed timeout for retrying """
+        return RttEstimator()
+
+    @property
+    def rtt_estimator(self) -> Optional[RttEstimator]:
+        """ round trip time statistics of the remote peer """
+        return self.__estimator
+
     #
     #   Docker Event Handler
     #
@@ -140,12 +167,79 @@ class StarPorter(AddressPairObject, Porter, ABC):
         return '<%s remote="%s" local="%s" status="%s">\n%s\n</%s module="%s">'\
                % (cname, self._remote, self._local, self.status, self.connection, cname, mod)
 
+    #
+    #   Backpressure
+    #
+
+    @property
+    def writable(self) -> bool:
+        """ False after the waiting queue reached the high watermark """
+        return self.__writable
+
+    @property
+    def waiting_bytes(self) -> int:
+        """ length of data waiting to be sent """
+        return self.__waiting_bytes
+
+    @property
+    def waiting_count(self) -> int:
+        """ count of tasks waiting to be sent """
+        return len(self.__waiting)
+
     # Override
     async def send_ship(self, ship: Departure) -> bool:
-        return self.__dock.add_departure(ship=ship)
+        """ Add outgo task, return False when the waiting queue is full (would block) """
+        if not self.__writable and ship.priority > DeparturePriority.URGENT:
+            return False
+        return await self._dock_departure(ship=ship)
+
+    async def _dock_departure(self, ship: Departure) -> bool:
+        """ Add outgo task without checking the watermarks, for responses """
+        if isinstance(ship, DepartureShip) and ship.estimator is None:
+            # retry with the adaptive timeout
+            ship.estimator = self.__estimator
+        if not self.__dock.add_departure(ship=ship):
+            # duplicated
+            return False
+        size = 0
+        for fra in ship.fragments:
+            size += len(fra)
+        self.__waiting[ship] = size
+        self.__waiting_bytes += size
+        if self.__writable and self.__over_high_watermark():
+            self.__writable = False
+        return True
+
+    def __over_high_watermark(self) -> bool:
+        high = self.HIGH_WATERMARK
+        if 0 < high <= self.__waiting_bytes:
+            return True
+        high = self.HIGH_WATERMARK_COUNT
+        return 0 < high <= len(self.__waiting)
+
+    def __below_low_watermark(self) -> bool:
+        return self.__waiting_bytes <= self.LOW_WATERMARK and len(self.__waiting) <= self.LOW_WATERMARK_COUNT
+
+    async def _release_departure(self, ship: Departure):
+        """ Remove task from the waiting queue after sent out (or failed) """
+        size = self.__waiting.pop(ship, None)
+        if size is None:
+            # released already (e.g.: a retry of important task)
+            return
+        self.__waiting_bytes -= size
+        if self.__writable or not self.__below_low_watermark():
+            return
+        self.__writable = True
+        delegate = self.delegate
+        if delegate is not None:
+            # callback for producers to continue
+            await delegate.porter_drained(porter=self)
 
     # Override
     async def process_received(self, data: bytes):
+        if isinstance(data, memoryview):
+            # view of a receive buffer, which will be reused after processed
+            data = self._received_view(view=data)
         # 1. get income ship from received data
         ships = self._get_arrivals(data=data)
         if ships is None or len(ships) == 0:
@@ -162,6 +256,17 @@ class StarPorter(AddressPairObject, Porter, ABC):
             if delegate is not None:
                 await delegate.porter_received(ship=income, porter=self)
 
+    # noinspection PyMethodMayBeStatic
+    def _received_view(self, view: memoryview) -> bytes:
+        """
+        Copy the received data out of the (pooled) receive buffer,
+        override to parse the view directly if the arrivals can keep the buffer
+
+        :param view: received data
+        :return: data for getting arrivals
+        """
+        return view.tobytes()
+
     @abstractmethod
     def _get_arrivals(self, data: bytes) -> List[Arrival]:
         """
@@ -197,6 +302,11 @@ class StarPorter(AddressPairObject, Porter, ABC):
         if linked is None:
             # linked departure task not found, or not finished yet
             return None
+        estimator = self.__estimator
+        if estimator is not None and isinstance(linked, DepartureShip):
+            rtt = linked.rtt_sample(now=time.time())
+            if rtt is not None:
+                estimator.update(rtt=rtt)
         # all fragments responded, task finished
         delegate = self.delegate
         if delegate is not None:
@@ -219,10 +329,68 @@ class StarPorter(AddressPairObject, Porter, ABC):
     async def close(self):
         await self.set_connection(conn=None)
 
+    # noinspection PyMethodMayBeStatic
+    async def _send_fragments(self, fragments: List[bytes], conn: Connection) -> Tuple[int, int]:
+        """
+        Send fragments of outgo task one by one
+
+        :param fragments: data waiting to be sent
+        :param conn:      connection ready for sending data
+        :return: count of fragments sent, and the length of partially sent data in the next fragment
+        """
+        index = 0
+        for fra in fragments:
+            sent = await conn.send_data(data=fra)
+            if sent < len(fra):
+                # buffer overflow?
+                return index, max(sent, 0)
+            # assert sent == len(fra), 'length of fragment error: %d, %d' % (sent, len(fra))
+            index += 1
+        return index, 0
+
     #
     #  Processor
     #
 
+    async def _gather_departures(self, now: Timestamp) -> Tuple[List[Tuple[Departure, List[bytes]]], int]:
+        """
+        Get outgo tasks ready to be sent together, within the send budget
+
+        :param now: current timestamp
+        :return: outgo tasks with fragments, and count of failed tasks
+        """
+        tasks = []
+        failed = 0
+        total = 0
+        budget = self.SEND_BUDGET
+        while True:
+            outgo = self._next_departure(now=now)
+            if outgo is None:
+                # nothing to do now
+                break
+            elif outgo.get_status(now=now) == ShipStatus.FAILED:
+                failed += 1
+                delegate = self.delegate
+                if delegate is not None:
+                    # callback for mission failed
+                    error = TimeoutError('Request timeout')
+                    await delegate.porter_failed(error=error, ship=outgo, porter=self)
+                await self._release_departure(ship=outgo)
+                # task timeout, process next one
+                continue
+            fragments = outgo.fragments
+            if len(fragments) == 0:
+                # all fragments of this task have been sent already
+                await self._release_departure(ship=outgo)
+                continue
+            tasks.append((outgo, fragments))
+            for fra in fragments:
+                total += len(fra)
+            if total >= budget:
+                # budget used up, the rest tasks will be sent next time
+                break
+        return tasks, failed
+
     # Override
     async def process(self) -> bool:
         #
@@ -238,70 +406,60 @@ class StarPorter(AddressPairObject, Porter, ABC):
         #
         #  2. get data waiting to be sent out
         #
-        outgo = self.__last_outgo
-        fragments = self.__last_fragments
-        if outgo is not None and len(fragments) > 0:
-            # got remaining fragments from last outgo task
-            self.__last_outgo = None
-            self.__last_fragments = []
+        tasks = self.__remaining
+        if len(tasks) > 0:
+            # got remaining fragments from last outgo tasks
+            self.__remaining = []
         else:
-            # get next outgo task
-            now = time.time()
-            outgo = self._next_departure(now=now)
-            if outgo is None:
-                # nothing to do now, return false to let the thread have a rest
-                return False
-            elif outgo.get_status(now=now) == ShipStatus.FAILED:
-                delegate = self.delegate
-                if delegate is not None:
-                    # callback for mission failed
-                    error = TimeoutError('Request timeout')
-                    await delegate.porter_failed(error=error, ship=outgo, porter=self)
-                # task timeout, return True to process next one
-                return True
-            else:
-                # get fragments from outgo task
-                fragments = outgo.fragments
-                if len(fragments) == 0:
-                    # all fragments of this task have been sent already
-                    # return True to process next one
-                    return True
+            # get next outgo tasks
+            tasks, failed = await self._gather_departures(now=time.time())
+            if len(tasks) == 0:
+                # return True to process next one if some tasks failed,
+                # else return false to let the thread have a rest
+                return failed > 0
         #
-        #  3. process fragments of outgo task
+        #  3. process fragments of outgo tasks together
         #
+        fragments = []
+        for item in tasks:
+            fragments.extend(item[1])
         index = 0
         sent = 0
         try:
-            for fra in fragments:
-                sent = await conn.send_data(data=fra)
-                if sent < len(fra):
-                    # buffer overflow?
-                    break
-                else:
-                    # assert sent == len(fra), 'length of fragment error: %d, %d' % (sent, len(fra))
-                    index += 1
-                    sent = 0  # clear counter
+            index, sent = await self._send_fragments(fragments=fragments, conn=conn)
             if index < len(fragments):
                 # task failed
                 error = ConnectionError('only %d/%d fragments sent.' % (index, len(fragments)))
             else:
-                # task done
-                if outgo.is_important:
-                    # this task needs response,
-                    # so we cannot call 'porter_sent()' immediately
-                    # until the remote responded.
-                    pass
-                else:
-                    delegate = self.delegate
-                    if delegate is not None:
-                        await delegate.porter_sent(ship=outgo, porter=self)
-                return True
+                error = None
         except Exception as e:
             # socket error, callback
             error = e
         #
-        #  4. remove sent fragments
+        #  4. check sent tasks
         #
+        delegate = self.delegate
+        while len(tasks) > 0:
+            outgo, fragments = tasks[0]
+            if index < len(fragments):
+                break
+            # task done
+            tasks.pop(0)
+            index -= len(fragments)
+            await self._release_departure(ship=outgo)
+            if outgo.is_important:
+                # this task needs response,
+                # so we cannot call 'porter_sent()' immediately
+                # until the remote responded.
+                pass
+            elif delegate is not None:
+                await delegate.porter_sent(ship=outgo, porter=self)
+        if error is None:
+            return True
+        #
+        #  5. remove sent fragments
+        #
+        outgo, fragments = tasks[0]
         while index > 0:
             fragments.pop(0)
             index -= 1
@@ -310,16 +468,15 @@ class StarPorter(AddressPairObject, Porter, ABC):
             last = fragments.pop(0)
             fragments.insert(0, last[sent:])
         #
-        #  5. store remaining data
+        #  6. store remaining data
         #
-        self.__last_outgo = outgo
-        self.__last_fragments = fragments
+        self.__remaining = tasks
         #
-        #  6. callback for error
+        #  7. callback for error, each task not sent completely
         #
-        delegate = self.delegate
         if delegate is not None:
-            # await delegate.porter_failed(error=error, ship=outgo, porter=self)
-            await delegate.porter_error(error=error, ship=outgo, porter=self)
+            for outgo, _ in tasks:
+                # await delegate.porter_failed(error=error, ship=outgo, porter=self)
+                await delegate.porter_error(error=error, ship=outgo, porter=self)
         # task error
         return False
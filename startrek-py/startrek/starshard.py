@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+#
+#   Star Trek: Interstellar Transport
+#
+#                                Written in 2021 by Moky <albert.moky@gmail.com>
+#
+# ==============================================================================
+# MIT License
+#
+# Copyright (c) 2021 Albert Moky
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ==============================================================================
+
+import asyncio
+import os
+import signal
+import socket
+import struct
+import traceback
+from abc import ABC, abstractmethod
+from typing import Optional, Any, List, Dict, Tuple
+
+from .types import SocketAddress
+from .utils import Logging
+from .port import Porter, PorterDelegate
+
+from .stargate import StarGate
+
+
+"""
+    Sharded Gates
+    ~~~~~~~~~~~~~
+
+    The supervisor forks N worker processes, each of them binds the same
+    address with 'SO_REUSEPORT' and runs its own hub & gate on its own loop.
+
+    The kernel decides which worker accepts a connection (or receives the
+    datagrams) from a remote address, so the worker claims the address to
+    all the other shards when it creates a porter for it, and releases the
+    address when the porter removed; when a worker has no porter for the
+    remote address, the payload will be forwarded to the owner via an arrow
+    (e.g.: 'ipx.SharedMemoryArrow').
+
+                 +----------+             +----------+
+                 |  Gate 0  | ==(arrow)=> |  Gate 1  |
+                 |  Hub  0  | <=(arrow)== |  Hub  1  |
+                 +----------+             +----------+
+                       :                        :
+                       :.... (SO_REUSEPORT) ....:
+                                    :
+                                 Address
+"""
+
+
+class ShardRouter:
+    """ Owners of remote addresses, learned from the claims of all shards """
+
+    def __init__(self):
+        super().__init__()
+        self.__owners: Dict[SocketAddress, int] = {}
+
+    @property
+    def count(self) -> int:
+        """ count of remote addresses claimed """
+        return len(self.__owners)
+
+    def get_shard(self, remote: SocketAddress) -> Optional[int]:
+        """ Get index of the shard which accepted the remote address """
+        return self.__owners.get(remote)
+
+    def set_shard(self, remote: SocketAddress, index: int):
+        self.__owners[remote] = index
+
+    def remove_shard(self, remote: SocketAddress, index: int) -> bool:
+        """ Remove the owner if it's still the shard """
+        if self.__owners.get(remote) == index:
+            self.__owners.pop(remote, None)
+            return True
+        return False
+
+
+class Shard:
+    """
+        Shard for one worker process
+        ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+        Arrows are half-duplex pipes ('send(obj) -> int', 'receive() -> obj'),
+        'outboxes[i]' goes to shard i, 'inboxes[i]' comes from shard i.
+    """
+
+    MAX_ARRIVALS = 256  # max parcels received in one process()
+
+    def __init__(self, index: int, inboxes: List[Any], outboxes: List[Any], router: ShardRouter = None):
+        super().__init__()
+        self.__index = index
+        self.__router = ShardRouter() if router is None else router
+        self.__inboxes = [arrow for arrow in inboxes if arrow is not None]
+        self.__outboxes = outboxes
+
+    @property
+    def index(self) -> int:
+        return self.__index
+
+    @property
+    def router(self) -> ShardRouter:
+        return self.__router
+
+    def get_owner(self, remote: SocketAddress) -> Optional[int]:
+        """ Get index of the shard which accepted the remote address, None if unknown """
+        return self.__router.get_shard(remote=remote)
+
+    def claim(self, remote: SocketAddress, local: Optional[SocketAddress]) -> int:
+        """ Tell all the other shards that the remote address belongs to this one """
+        self.__router.set_shard(remote=remote, index=self.__index)
+        return self.__broadcast(kind=PARCEL_CLAIM, remote=remote, local=local)
+
+    def release(self, remote: SocketAddress, local: Optional[SocketAddress]) -> int:
+        """ Tell all the other shards that the remote address was removed from this one """
+        if not self.__router.remove_shard(remote=remote, index=self.__index):
+            return 0
+        return self.__broadcast(kind=PARCEL_RELEASE, remote=remote, local=local)
+
+    def __broadcast(self, kind: int, remote: SocketAddress, local: Optional[SocketAddress]) -> int:
+        try:
+            # payload: index of this shard
+            payload = self.__index.to_bytes(2, 'big')
+            parcel = pack_parcel(payload=payload, remote=remote, local=local, kind=kind)
+        except (OSError, ValueError):
+            # not an IP address
+            return 0
+        count = 0
+        for index, arrow in enumerate(self.__outboxes):
+            if arrow is None or index == self.__index:
+                continue
+            if arrow.send(parcel) >= 0:
+                count += 1
+        return count
+
+    def forward(self, target: int, payload: bytes,
+                remote: SocketAddress, local: Optional[SocketAddress]) -> bool:
+        """ Send the payload to the shard which owns the remote address """
+        arrow = self.__outboxes[target]
+        if arrow is None:
+            return False
+        try:
+            parcel = pack_parcel(payload=payload, remote=remote, local=local)
+        except (OSError, ValueError):
+            # not an IP address
+            return False
+        return arrow.send(parcel) >= 0
+
+    def receive(self, max_count: int = MAX_ARRIVALS) -> List[Tuple[bytes, SocketAddress, Optional[SocketAddress]]]:
+        """ Get parcels forwarded from other shards, and update owners with the claims """
+        router = self.__router
+        parcels = []
+        for arrow in self.__inboxes:
+            while len(parcels) < max_count:
+                data = arrow.receive()
+                if data is None:
+                    break
+                item = unpack_parcel(data=data)
+                if item is None:
+                    continue
+                kind, payload, remote, local = item
+                if kind == PARCEL_DATA:
+                    parcels.append((payload, remote, local))
+                elif kind == PARCEL_CLAIM:
+                    router.set_shard(remote=remote, index=payload_index(payload=payload, default=-1))
+                elif kind == PARCEL_RELEASE:
+                    router.remove_shard(remote=remote, index=payload_index(payload=payload, default=-1))
+        return parcels
+
+
+#
+#   Parcel: [kind (1 byte)] + [flags (1 byte)] +
+#           [remote IP (16 bytes)] + [remote port (2 bytes)] +
+#           [local IP (16 bytes)] + [local port (2 bytes)] + [payload]
+#
+
+PARCEL_DATA = 0
+PARCEL_CLAIM = 1
+PARCEL_RELEASE = 2
+
+_REMOTE_V4 = 0x01
+_LOCAL_SET = 0x02
+_LOCAL_V4 = 0x04
+
+_PARCEL_HEAD = struct.Struct('>BB16sH16sH')
+
+
+def _pack_ip(host: str) -> Tuple[bytes, bool]:
+    """ Get (16 bytes, is IPv4) of the IP address """
+    if ':' in host:
+        return socket.inet_pton(socket.AF_INET6, host), False
+    return socket.inet_pton(socket.AF_INET, host).ljust(16, b'\0'), True
+
+
+def _unpack_ip(data: bytes, v4: bool) -> str:
+    if v4:
+        return socket.inet_ntop(socket.AF_INET, data[:4])
+    return socket.inet_ntop(socket.AF_INET6, data)
+
+
+def pack_parcel(payload: bytes, remote: SocketAddress, local: Optional[SocketAddress],
+                kind: int = PARCEL_DATA) -> bytes:
+    """ Build parcel with IP addresses, raise OSError on host is not an IP address """
+    remote_ip, v4 = _pack_ip(host=remote[0])
+    flags = _REMOTE_V4 if v4 else 0
+    if local is None:
+        local_ip, local_port = bytes(16), 0
+    else:
+        local_ip, v4 = _pack_ip(host=local[0])
+        local_port = local[1]
+        flags |= _LOCAL_SET | (_LOCAL_V4 if v4 else 0)
+    head = _PARCEL_HEAD.pack(kind, flags, remote_ip, remote[1], local_ip, local_port)
+    return head + payload
+
+
+def unpack_parcel(data: bytes) -> Optional[Tuple[int, bytes, SocketAddress, Optional[SocketAddress]]]:
+    """ Get (kind, payload, remote, local) from parcel """
+    if not isinstance(data, (bytes, bytearray)) or len(data) < _PARCEL_HEAD.size:
+        return None
+    kind, flags, remote_ip, remote_port, local_ip, local_port = _PARCEL_HEAD.unpack_from(data)
+    try:
+        remote = (_unpack_ip(data=remote_ip, v4=(flags & _REMOTE_V4) != 0), remote_port)
+        if flags & _LOCAL_SET:
+            local = (_unpack_ip(data=local_ip, v4=(flags & _LOCAL_V4) != 0), local_port)
+        else:
+            local = None
+    except (OSError, ValueError):
+        return None
+    return kind, bytes(data[_PARCEL_HEAD.size:]), remote, local
+
+
+def payload_index(payload: bytes, default: int) -> int:
+    """ Shard index in the payload of claim/release parcel """
+    if len(payload) != 2:
+        return default
+    return int.from_bytes(payload, 'big')
+
+
+# noinspection PyAbstractClass
+class ShardGate(StarGate, ABC):
+    """
+        Star Gate for a worker process
+        ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+        Remote addresses of the porters created here will be claimed to
+        the other shards; data for a remote address without local porter
+        will be forwarded to the shard owning it, and the forwarded data
+        will be sent here.
+    """
+
+    def __init__(self, delegate: PorterDelegate):
+        super().__init__(delegate=delegate)
+        self.__shard: Optional[Shard] = None
+
+    @property
+    def shard(self) -> Optional[Shard]:
+        return self.__shard
+
+    @shard.setter
+    def shard(self, worker: Optional[Shard]):
+        self.__shard = worker
+
+    # Override
+    def _set_porter(self, porter: Porter,
+                    remote: SocketAddress, local: Optional[SocketAddress]) -> Optional[Porter]:
+        cached = super()._set_porter(porter=porter, remote=remote, local=local)
+        shard = self.__shard
+        if shard is not None:
+            # the kernel delivers this remote address here
+            shard.claim(remote=remote, local=local)
+        return cached
+
+    # Override
+    def _remove_porter(self, porter: Optional[Porter],
+                       remote: SocketAddress, local: Optional[SocketAddress]) -> Optional[Porter]:
+        cached = super()._remove_porter(porter=porter, remote=remote, local=local)
+        shard = self.__shard
+        if shard is not None:
+            shard.release(remote=remote, local=local)
+        return cached
+
+    # Override
+    async def send_data(self, payload: bytes,
+                        remote: SocketAddress, local: Optional[SocketAddress]) -> bool:
+        shard = self.__shard
+        if shard is not None and self._get_porter(remote=remote, local=local) is None:
+            owner = shard.get_owner(remote=remote)
+            if owner is not None and owner != shard.index:
+                # the peer was accepted by another worker
+                return shard.forward(target=owner, payload=payload, remote=remote, local=local)
+        return await super().send_data(payload=payload, remote=remote, local=local)
+
+    # Override
+    async def process(self) -> bool:
+        count = 0
+        shard = self.__shard
+        if shard is not None:
+            count = await self._drive_shard(shard=shard)
+        busy = await super().process()
+        return busy or count > 0
+
+    async def _drive_shard(self, shard: Shard) -> int:
+        """ Send the data forwarded from other shards """
+        parcels = shard.receive()
+        for payload, remote, local in parcels:
+            # not forwarding again
+            ok = await super().send_data(payload=payload, remote=remote, local=local)
+            if not ok:
+                self.warning('failed to deliver forwarded data: %d byte(s) -> %s', len(payload), remote)
+        return len(parcels)
+
+
+class ShardSupervisor(Logging, ABC):
+    """
+        Supervisor
+        ~~~~~~~~~~
+
+        Forks worker processes, and creates arrows between each two of them.
+
+        @abstract methods:
+            - _create_arrow(source, target)
+            - _run_worker(shard)
+    """
+
+    def __init__(self, count: int = None):
+        super().__init__()
+        if count is None:
+            count = os.cpu_count() or 1
+        assert count > 0, 'shards count error: %d' % count
+        self.__count = count
+        self.__workers: List[int] = []  # pid
+        self.__arrows: List[Any] = []
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    @property
+    def workers(self) -> List[int]:
+        return self.__workers
+
+    @abstractmethod
+    def _create_arrow(self, source: int, target: int):  # -> ipx.Arrow
+        """
+        Create half-duplex pipe from source shard to target shard
+
+        :param source: index of sender shard
+        :param target: index of receiver shard
+        :return: arrow shared between processes
+        """
+        raise NotImplementedError(
+            f'Not implemented: {type(self).__module__}.{type(self).__name__}._create_arrow()'
+        )
+
+    # noinspection PyMethodMayBeStatic
+    def _destroy_arrow(self, arrow):
+        """ Override to release the shared resources after all workers stopped """
+        pass
+
+    @abstractmethod
+    async def _run_worker(self, shard: Shard):
+        """
+        Run hub (bound with 'reuse_port') & gate in the worker process
+
+        :param shard: shard for this worker
+        """
+        raise NotImplementedError(
+            f'Not implemented: {type(self).__module__}.{type(self).__name__}._run_worker()'
+        )
+
+    def start(self):
+        """ Fork all worker processes """
+        count = self.__count
+        arrows = [[None if src == dst else self._create_arrow(source=src, target=dst)
+                   for dst in range(count)] for src in range(count)]
+        self.__arrows = [item for row in arrows for item in row if item is not None]
+        for index in range(count):
+            inboxes = [arrows[src][index] for src in range(count)]
+            shard = Shard(index=index, inboxes=inboxes, outboxes=arrows[index])
+            pid = os.fork()
+            if pid == 0:
+                # child process
+                os._exit(self.__work(shard=shard))
+            self.info('worker %d started: pid=%d', index, pid)
+            self.__workers.append(pid)
+
+    def __work(self, shard: Shard) -> int:
+        try:
+            asyncio.run(self._run_worker(shard=shard))
+            return 0
+        except Exception as error:
+            self.error('worker %d error: %s', shard.index, error)
+            traceback.print_exc()
+            return 1
+
+    def stop(self):
+        """ Terminate all worker processes """
+        for pid in self.__workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError as error:
+                self.error('failed to stop worker: pid=%d, %s', pid, error)
+
+    def join(self):
+        """ Wait for all worker processes """
+        workers = self.__workers
+        while len(workers) > 0:
+            pid = workers.pop(0)
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        # all workers stopped
+        arrows = self.__arrows
+        self.__arrows = []
+        for item in arrows:
+            self._destroy_arrow(arrow=item)
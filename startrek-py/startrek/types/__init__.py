@@ -29,7 +29,7 @@
 # ==============================================================================
 
 from .pair import SocketAddress, AddressPairObject
-from .mapping import PairMap, AbstractPairMap, HashPairMap, AddressPairMap
+from .mapping import PairMap, AbstractPairMap, HashPairMap, FlatPairMap, AddressPairMap
 
 Timestamp = float
 Duration = float
@@ -42,7 +42,7 @@ __all__ = [
     'SocketAddress',
     'AddressPairObject',
 
-    'PairMap', 'AbstractPairMap', 'HashPairMap',
+    'PairMap', 'AbstractPairMap', 'HashPairMap', 'FlatPairMap',
     'AddressPairMap',
 
 ]
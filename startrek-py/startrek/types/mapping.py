@@ -30,7 +30,7 @@
 
 import weakref
 from abc import ABC, abstractmethod
-from typing import TypeVar, Generic, Optional, Set, Iterable, MutableMapping
+from typing import TypeVar, Generic, Optional, Set, Tuple, Dict, Iterable, MutableMapping
 
 from .pair import SocketAddress
 
@@ -203,7 +203,123 @@ class HashPairMap(AbstractPairMap[K, V]):
         return item if old is None else old
 
 
-class AddressPairMap(HashPairMap[SocketAddress, V]):
+class FlatPairMap(PairMap[K, V]):
+    """
+        Pair Map with Flat Keys
+        ~~~~~~~~~~~~~~~~~~~~~~~
+
+        Items are mapped by tuple keys (key1, key2) in one table, with a secondary
+        index by key1 for searching any item of the remote (or local) address;
+        the items getter returns a snapshot, which will be rebuilt only after
+        the map changed, so it's cheap to be called in each loop.
+    """
+
+    def __init__(self, default: K):
+        super().__init__()
+        self.__default = default  # default key
+        self.__map: Dict[Tuple[K, K], V] = {}       # (K, K) => V
+        self.__index: Dict[K, Dict[K, V]] = {}      # K => (K => V)
+        self.__items: Dict[V, int] = {}             # V => count of mapped keys
+        self.__version = 0
+        self.__snapshot: Tuple[V, ...] = ()
+        self.__snapshot_version = 0
+
+    @property
+    def version(self) -> int:
+        """ increased after each mutation """
+        return self.__version
+
+    @property  # Override
+    def items(self) -> Iterable[V]:
+        if self.__snapshot_version != self.__version:
+            self.__snapshot = tuple(self.__items)
+            self.__snapshot_version = self.__version
+        return self.__snapshot
+
+    def _keys(self, remote: Optional[K], local: Optional[K]) -> Tuple[K, K]:
+        if remote is None:
+            assert local is not None, 'local & remote addresses should not empty at the same time'
+            return local, self.__default
+        elif local is None:
+            return remote, self.__default
+        else:
+            return remote, local
+
+    # Override
+    def get(self, remote: Optional[K], local: Optional[K]) -> Optional[V]:
+        table = self.__map
+        if remote is not None and local is not None:
+            # mapping: (remote, local) => Connection
+            item = table.get((remote, local))
+            if item is not None:
+                return item
+            # take any Connection connected to remote
+            return table.get((remote, self.__default))
+        # mapping: (remote, None) => Connection
+        # mapping: (local, None) => Connection
+        key1, key2 = self._keys(remote=remote, local=local)
+        item = table.get((key1, key2))
+        if item is not None:
+            # take the item with empty key2
+            return item
+        # take any Connection connected to remote / bound to local
+        index = self.__index.get(key1)
+        if index is not None:
+            for item in index.values():
+                return item
+
+    # Override
+    def set(self, item: Optional[V], remote: Optional[K], local: Optional[K]) -> Optional[V]:
+        if item is None:
+            return self.__pop(keys=self._keys(remote=remote, local=local))
+        key1, key2 = self._keys(remote=remote, local=local)
+        old = self.__map.get((key1, key2))
+        self.__map[(key1, key2)] = item
+        if old is not None:
+            # release first, an equal item will take its place
+            self.__release(item=old)
+        self.__items[item] = self.__items.get(item, 0) + 1
+        index = self.__index.get(key1)
+        if index is None:
+            self.__index[key1] = {key2: item}
+        else:
+            index[key2] = item
+        self.__version += 1
+        return old
+
+    # Override
+    def remove(self, item: Optional[V], remote: Optional[K], local: Optional[K]) -> Optional[V]:
+        old = self.__pop(keys=self._keys(remote=remote, local=local))
+        if item is not None and item != old:
+            # the key held another object (or nothing),
+            # drop the given item from the values too (as HashPairMap did)
+            if self.__items.pop(item, None) is not None:
+                self.__version += 1
+        return item if old is None else old
+
+    def __pop(self, keys: Tuple[K, K]) -> Optional[V]:
+        old = self.__map.pop(keys, None)
+        if old is None:
+            return None
+        self.__release(item=old)
+        key1, key2 = keys
+        index = self.__index.get(key1)
+        if index is not None:
+            index.pop(key2, None)
+            if len(index) == 0:
+                self.__index.pop(key1, None)
+        self.__version += 1
+        return old
+
+    def __release(self, item: V):
+        count = self.__items.get(item, 0) - 1
+        if count > 0:
+            self.__items[item] = count
+        else:
+            self.__items.pop(item, None)
+
+
+class AddressPairMap(FlatPairMap[SocketAddress, V]):
 
     AnyAddress = ('0.0.0.0', 0)
 
@@ -0,0 +1,102 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+    Pair Map Benchmark
+    ~~~~~~~~~~~~~~~~~~
+
+    Cost of lookup & iteration against the count of peers:
+        1. HashPairMap (nested weak tables, copying the set for each 'items')
+        2. FlatPairMap (tuple keys, snapshot rebuilt only after mutation)
+"""
+
+import time
+
+import sys
+import os
+
+curPath = os.path.abspath(os.path.dirname(__file__))
+rootPath = os.path.split(curPath)[0]
+sys.path.append(rootPath)
+
+from startrek.types import AddressPairObject
+from startrek.types import HashPairMap, FlatPairMap
+
+
+LOCAL = ('0.0.0.0', 9394)
+ANY = ('0.0.0.0', 0)
+
+LOOPS = 50
+
+
+def remote_address(index: int):
+    return '10.%d.%d.%d' % ((index >> 16) & 0xFF, (index >> 8) & 0xFF, index & 0xFF), 10000 + index % 50000
+
+
+def fill(pair_map, count: int) -> list:
+    objects = []
+    for index in range(count):
+        remote = remote_address(index=index)
+        item = AddressPairObject(remote=remote, local=LOCAL)
+        pair_map.set(item=item, remote=remote, local=LOCAL)
+        objects.append(item)
+    return objects
+
+
+def bench_get(pair_map, count: int) -> float:
+    remotes = [remote_address(index=index) for index in range(count)]
+    start = time.time()
+    for remote in remotes:
+        pair_map.get(remote=remote, local=LOCAL)
+        pair_map.get(remote=remote, local=None)
+    return (time.time() - start) / (count * 2)
+
+
+def bench_items(pair_map) -> float:
+    # 3 times for each loop: channels & connections in hub, porters in gate
+    start = time.time()
+    for _ in range(LOOPS):
+        for _ in range(3):
+            for _ in pair_map.items:
+                pass
+    return (time.time() - start) / LOOPS
+
+
+def bench_churn(pair_map, count: int) -> float:
+    # one peer replaced in each loop
+    start = time.time()
+    for index in range(LOOPS):
+        remote = remote_address(index=count + index)
+        item = AddressPairObject(remote=remote, local=LOCAL)
+        pair_map.set(item=item, remote=remote, local=LOCAL)
+        for _ in range(3):
+            for _ in pair_map.items:
+                pass
+        pair_map.remove(item=item, remote=remote, local=LOCAL)
+    return (time.time() - start) / LOOPS
+
+
+def main():
+    print('%8s %12s %12s %12s %12s %12s %12s' % ('peers',
+                                                 'hash get', 'flat get',
+                                                 'hash loop', 'flat loop',
+                                                 'hash churn', 'flat churn'))
+    print('%8s %12s %12s %12s %12s %12s %12s' % ('', '(us)', '(us)', '(ms)', '(ms)', '(ms)', '(ms)'))
+    for count in [1000, 10000, 50000]:
+        hash_map = HashPairMap(default=ANY)
+        flat_map = FlatPairMap(default=ANY)
+        objects = fill(hash_map, count=count) + fill(flat_map, count=count)
+        g1 = bench_get(hash_map, count=count)
+        g2 = bench_get(flat_map, count=count)
+        i1 = bench_items(hash_map)
+        i2 = bench_items(flat_map)
+        c1 = bench_churn(hash_map, count=count)
+        c2 = bench_churn(flat_map, count=count)
+        print('%8d %12.3f %12.3f %12.3f %12.3f %12.3f %12.3f' % (count, g1 * 1e6, g2 * 1e6,
+                                                                 i1 * 1000, i2 * 1000,
+                                                                 c1 * 1000, c2 * 1000))
+        assert len(objects) == count * 2
+
+
+if __name__ == '__main__':
+    main()
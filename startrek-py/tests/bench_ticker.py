@@ -0,0 +1,124 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+    Ticker Benchmark
+    ~~~~~~~~~~~~~~~~
+
+    Cost of one tick against the count of auto machines:
+        1. Metronome   (copying the whole set, ticking all machines)
+        2. TimingWheel (machines ticking periodically)
+        3. TimingWheel (machines with deadlines, only the due ones ticked)
+"""
+
+import asyncio
+import random
+import time
+from weakref import WeakSet
+
+import sys
+import os
+
+curPath = os.path.abspath(os.path.dirname(__file__))
+rootPath = os.path.split(curPath)[0]
+sys.path.append(rootPath)
+
+from startrek.fsm import BaseTransition, BaseState, AutoMachine
+from startrek.skywalker import TimingWheel
+
+
+class IdleTransition(BaseTransition):
+
+    # Override
+    def evaluate(self, ctx, now: float) -> bool:
+        return now > ctx.expired
+
+
+class IdleState(BaseState):
+
+    async def on_enter(self, old, ctx, now: float):
+        pass
+
+    async def on_exit(self, new, ctx, now: float):
+        pass
+
+    async def on_pause(self, ctx, now: float):
+        pass
+
+    async def on_resume(self, ctx, now: float):
+        pass
+
+
+class IdleMachine(AutoMachine):
+
+    def __init__(self, timer, expired: float, deadline: bool):
+        super().__init__()
+        self.__timer = timer
+        self.expired = expired
+        self.__deadline = deadline
+        state = IdleState(index=0)
+        state.add_transition(transition=IdleTransition(target=0))
+        self.add_state(state=state)
+
+    @property  # Override
+    def context(self):
+        return self
+
+    # Override
+    def _create_timer(self):
+        return self.__timer
+
+    # Override
+    def _next_deadline(self, now: float):
+        if self.__deadline:
+            return self.expired
+
+
+STEPS = 20
+
+
+async def bench_metronome(count: int) -> float:
+    tickers = WeakSet()
+    now = time.time()
+    machines = [IdleMachine(timer=None, expired=now + 3600, deadline=False) for _ in range(count)]
+    for item in machines:
+        tickers.add(item)
+    start = time.time()
+    for _ in range(STEPS):
+        for item in set(tickers):
+            await item.tick(now=now, elapsed=0.1)
+    return (time.time() - start) / STEPS
+
+
+async def bench_wheel(count: int, deadline: bool) -> float:
+    wheel = TimingWheel()
+    now = time.time()
+    machines = []
+    for _ in range(count):
+        # deadlines spread in the next minute
+        expired = now + random.uniform(1, 60)
+        item = IdleMachine(timer=wheel, expired=expired, deadline=deadline)
+        machines.append(item)
+        await item.start()
+        if deadline:
+            item.wakeup(when=expired)
+    start = time.time()
+    for index in range(STEPS):
+        await wheel.step(now=now + (index + 1) * wheel.interval)
+    elapsed = (time.time() - start) / STEPS
+    for item in machines:
+        await item.stop()
+    return elapsed
+
+
+async def main():
+    print('%10s %14s %14s %14s' % ('machines', 'metronome(ms)', 'periodic(ms)', 'deadline(ms)'))
+    for count in [1000, 10000, 50000]:
+        t1 = await bench_metronome(count=count)
+        t2 = await bench_wheel(count=count, deadline=False)
+        t3 = await bench_wheel(count=count, deadline=True)
+        print('%10d %14.3f %14.3f %14.3f' % (count, t1 * 1000, t2 * 1000, t3 * 1000))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
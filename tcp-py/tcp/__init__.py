@@ -31,6 +31,8 @@
 from startrek import *
 
 from .startrek import PlainArrival, PlainDeparture, PlainPorter
+from .framing import StreamBuffer, FramedDeparture, FramedPorter
+from .framing import VarintFramedPorter, LengthFramedPorter, DelimiterFramedPorter
 from .channel import StreamChannel, StreamChannelReader, StreamChannelWriter
 from .hub import StreamHub, ServerHub, ClientHub
 
@@ -44,7 +46,7 @@ __all__ = [
     'SocketAddress',
     'AddressPairObject',
 
-    'PairMap', 'AbstractPairMap', 'HashPairMap',
+    'PairMap', 'AbstractPairMap', 'HashPairMap', 'FlatPairMap',
     'AddressPairMap',
 
     #
@@ -57,17 +59,20 @@ __all__ = [
 
     'SocketReader', 'SocketWriter',
     'SocketHelper',
-    'BaseChannel',
+    'ReceiveSizer', 'BaseChannel',
     'BaseHub', 'BaseConnection', 'ActiveConnection',
+    'ChannelSelector',
 
     'Ship', 'Arrival', 'Departure',
     'ShipStatus', 'DeparturePriority',
     'Porter', 'PorterStatus', 'PorterDelegate',
     'Gate',
 
-    'ArrivalShip', 'ArrivalHall', 'DepartureShip', 'DepartureHall',
-    'Dock', 'LockedDock',
+    'ArrivalShip', 'ArrivalHall', 'BoundedArrivalHall',
+    'RttEstimator', 'DepartureShip', 'DepartureHall', 'TimedDepartureHall',
+    'Dock', 'LockedDock', 'TimedDock', 'Compressor',
     'StarPorter', 'StarGate',
+    'ShardRouter', 'Shard', 'ShardGate', 'ShardSupervisor',
 
 
     ################
@@ -77,6 +82,8 @@ __all__ = [
     ################
 
     'PlainArrival', 'PlainDeparture', 'PlainPorter',
+    'StreamBuffer', 'FramedDeparture', 'FramedPorter',
+    'VarintFramedPorter', 'LengthFramedPorter', 'DelimiterFramedPorter',
     'StreamChannel', 'StreamChannelReader', 'StreamChannelWriter',
     'StreamHub', 'ServerHub', 'ClientHub',
 ]
@@ -35,7 +35,7 @@ from typing import Optional, Tuple
 from startrek import SocketAddress
 from startrek import SocketReader, SocketWriter
 from startrek import SocketHelper
-from startrek import BaseChannel
+from startrek import BaseChannel, ReceiveSizer
 
 
 class ChannelChecker:
@@ -127,6 +127,13 @@ class Controller:
         if isinstance(channel, BaseChannel):
             return channel.sock
 
+    def _is_available(self, sock: socket.socket) -> bool:
+        """ Check reading buffer, via the readiness cached in channel if possible """
+        channel = self.channel
+        if isinstance(channel, BaseChannel):
+            return channel.available
+        return self.socket_helper.is_available(sock=sock)
+
 
 class StreamChannelReader(Controller, SocketReader):
 
@@ -134,7 +141,7 @@ class StreamChannelReader(Controller, SocketReader):
         helper = self.socket_helper
         if helper.is_closed(sock=sock):
             raise ConnectionError('socket closed')
-        elif not helper.is_available(sock=sock):
+        elif not self._is_available(sock=sock):
             # TODO: check 'broken pipe'
             return None
         # elif helper.is_blocking(sock=sock):
@@ -263,3 +270,7 @@ class StreamChannel(BaseChannel):
     # Override
     def _create_writer(self) -> SocketWriter:
         return StreamChannelWriter(channel=self)
+
+    # Override
+    def _create_sizer(self) -> Optional[ReceiveSizer]:
+        return ReceiveSizer()
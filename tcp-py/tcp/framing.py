@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+#
+#   TCP: Transmission Control Protocol
+#
+#                                Written in 2021 by Moky <albert.moky@gmail.com>
+#
+# ==============================================================================
+# MIT License
+#
+# Copyright (c) 2021 Albert Moky
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ==============================================================================
+
+from abc import ABC, abstractmethod
+from typing import Optional, List, Tuple
+
+from startrek.types import SocketAddress, Timestamp
+from startrek.utils import Logging
+from startrek import Arrival, Departure, DeparturePriority
+from startrek import Compressor
+
+from .startrek import PlainDeparture, PlainPorter
+
+
+class StreamBuffer:
+    """
+        Stream Buffer
+        ~~~~~~~~~~~~~
+
+        Received chunks are appended to the tail, frames are taken from the head,
+        and the consumed bytes are dropped in one compacting after all frames taken,
+        so a large frame arriving in many chunks will not be copied again and again.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.__buffer = bytearray()
+        self.__offset = 0  # start of the unconsumed data
+
+    @property
+    def size(self) -> int:
+        """ length of the unconsumed data """
+        return len(self.__buffer) - self.__offset
+
+    def append(self, data: bytes):
+        self.__buffer.extend(data)
+
+    def get_byte(self, index: int) -> int:
+        return self.__buffer[self.__offset + index]
+
+    def get_bytes(self, start: int, end: int) -> bytes:
+        offset = self.__offset
+        with memoryview(self.__buffer) as view:
+            return view[offset + start:offset + end].tobytes()
+
+    def find(self, sub: bytes, start: int = 0, end: int = None) -> int:
+        """ position of the sub bytes from the head, -1 on not found """
+        offset = self.__offset
+        end = len(self.__buffer) if end is None else offset + end
+        pos = self.__buffer.find(sub, offset + start, end)
+        return pos if pos < 0 else pos - offset
+
+    def take(self, length: int, skip: int = 0) -> bytes:
+        """ Consume 'skip + length' bytes from the head, return the last 'length' bytes """
+        data = self.get_bytes(start=skip, end=skip + length)
+        self.__offset += skip + length
+        return data
+
+    def skip(self, length: int):
+        self.__offset += length
+
+    def compact(self):
+        """ Drop the consumed bytes """
+        offset = self.__offset
+        if offset > 0:
+            del self.__buffer[:offset]
+            self.__offset = 0
+
+    def clear(self):
+        self.__buffer.clear()
+        self.__offset = 0
+
+
+class FramedDeparture(PlainDeparture):
+    """ Plain departure which will be framed again before sending, when the frame format changed """
+
+    def __init__(self, payload: bytes, priority: int, needs_respond: bool,
+                 fragments: List[bytes], flagged: bool):
+        super().__init__(payload=payload, priority=priority, needs_respond=needs_respond, fragments=fragments)
+        self.__fragments = fragments
+        self.__flagged = flagged
+
+    @property
+    def flagged(self) -> bool:
+        """ whether the frame starts with a flag byte """
+        return self.__flagged
+
+    @property  # Override
+    def fragments(self) -> List[bytes]:
+        return self.__fragments
+
+    def reframe(self, fragments: List[bytes], flagged: bool):
+        self.__fragments = fragments
+        self.__flagged = flagged
+
+
+class FramedPorter(PlainPorter, Logging, ABC):
+    """
+        Framed Porter
+        ~~~~~~~~~~~~~
+
+        Split the stream into frames, and each frame will be a plain arrival;
+        the connection will be closed when a frame exceeds 'max_frame' bytes.
+
+        If a compressor is created, the porter offers compression to the peer
+        with a control frame 'ZIP?', a peer with compressor too will reply 'ZIP!',
+        and every frame after the reply starts with a flag byte
+        (0x00 = raw, 0x01 = deflated); so each direction is negotiated alone,
+        and peers without compressor just ignore the offer.
+        Control frames are packed in the space payloads cannot use
+        (e.g.: a reserved bit of the length), so any payload can be sent;
+        the framing without such space cannot offer compression.
+
+        @abstract methods:
+            - _get_frames(buffer)
+            - _pack_frame(payload)
+    """
+
+    MAX_FRAME = 1 << 20  # 1 MB
+
+    def __init__(self, remote: SocketAddress, local: Optional[SocketAddress], max_frame: int = None):
+        super().__init__(remote=remote, local=local)
+        self.__max_frame = self.MAX_FRAME if max_frame is None else max_frame
+        self.__buffer = StreamBuffer()
+        self.__compressor = self._create_compressor()
+        self.__offered = False  # offer sent
+        self.__accepting = False  # offer received, reply needed
+        self.__accept_ship: Optional[Departure] = None  # reply waiting to be sent
+        self.__flagging = False  # sending frames with flag byte (after reply sent)
+        self.__flagged = False  # receiving frames with flag byte (after reply received)
+
+    @property
+    def max_frame(self) -> int:
+        return self.__max_frame
+
+    # noinspection PyMethodMayBeStatic
+    def _create_compressor(self) -> Optional[Compressor]:
+        """ Override for deflating payloads, None means never offering compression """
+        return None
+
+    @property
+    def compressor(self) -> Optional[Compressor]:
+        return self.__compressor
+
+    @property
+    def deflatable(self) -> bool:
+        """ compression accepted, frames sent with flag byte """
+        return self.__flagging
+
+    @abstractmethod
+    def _get_frames(self, buffer: StreamBuffer) -> List[Tuple[bytes, bool]]:
+        """
+        Take all completed frames out of the buffer
+
+        :param buffer: received data
+        :return: payloads, with flags for control frames
+        :raise OverflowError: frame too large
+        """
+        raise NotImplementedError(
+            f'Not implemented: {type(self).__module__}.{type(self).__name__}._get_frames()'
+        )
+
+    @abstractmethod
+    def _pack_frame(self, payload: bytes) -> List[bytes]:
+        """
+        Build the frame for payload
+
+        :param payload: data to be sent
+        :return: frame parts (the payload will not be copied)
+        """
+        raise NotImplementedError(
+            f'Not implemented: {type(self).__module__}.{type(self).__name__}._pack_frame()'
+        )
+
+    # noinspection PyMethodMayBeStatic
+    def _pack_control(self, payload: bytes) -> Optional[List[bytes]]:
+        """
+        Build the control frame, which cannot be mistaken for a payload frame
+
+        :param payload: control data
+        :return: None on no space for control frames
+        """
+        return None
+
+    def __frame(self, payload: bytes, flagged: bool) -> List[bytes]:
+        if not flagged:
+            return self._pack_frame(payload=payload)
+        data = self.__compressor.compress(data=payload)
+        if data is None:
+            return self._pack_frame(payload=RAW_FLAG + payload)
+        else:
+            return self._pack_frame(payload=DEFLATED_FLAG + data)
+
+    # Override
+    def _create_departure(self, payload: bytes, priority: int, needs_respond: bool) -> Departure:
+        flagging = self.__flagging
+        fragments = self.__frame(payload=payload, flagged=flagging)
+        return FramedDeparture(payload=payload, priority=priority, needs_respond=needs_respond,
+                               fragments=fragments, flagged=flagging)
+
+    # Override
+    def _next_departure(self, now: Timestamp) -> Optional[Departure]:
+        # departures are taken out in the order of sending,
+        # so the frame format is decided here, not when they were created
+        ship = super()._next_departure(now=now)
+        if isinstance(ship, FramedDeparture):
+            self.__prepare_departure(ship=ship)
+        return ship
+
+    def __prepare_departure(self, ship: FramedDeparture):
+        flagging = self.__flagging
+        if ship.flagged == flagging:
+            fragments = ship.fragments
+        else:
+            fragments = self.__frame(payload=ship.payload, flagged=flagging)
+        if not self.__offered and self.__compressor is not None:
+            # offer compression before the first frame
+            self.__offered = True
+            offer = self._pack_control(payload=DEFLATE_OFFER)
+            if offer is not None:
+                fragments = offer + fragments
+        ship.reframe(fragments=fragments, flagged=flagging)
+        if ship is self.__accept_ship:
+            # the frames after the reply will start with a flag byte
+            self.__accept_ship = None
+            self.__flagging = True
+
+    # Override
+    def _get_arrivals(self, data: bytes) -> List[Arrival]:
+        buffer = self.__buffer
+        if data is not None:
+            buffer.append(data)
+        try:
+            frames = self._get_frames(buffer=buffer)
+        finally:
+            buffer.compact()
+        arrivals = []
+        for item, control in frames:
+            if control:
+                self.__process_control(frame=item)
+                continue
+            elif self.__flagged:
+                item = self.__unpack_payload(frame=item, compressor=self.__compressor)
+            arrivals.append(self._create_arrival(payload=item))
+        return arrivals
+
+    def __process_control(self, frame: bytes):
+        if frame == DEFLATE_OFFER:
+            # the peer can inflate, reply if compression enabled here too
+            self.__accepting = self.__compressor is not None and not self.__flagging
+        elif frame == DEFLATE_ACCEPT and self.__offered:
+            # the frames after the reply will start with a flag byte
+            self.__flagged = True
+        # else:
+        #     unknown control frame, ignore it
+
+    # noinspection PyMethodMayBeStatic
+    def __unpack_payload(self, frame: bytes, compressor: Compressor) -> bytes:
+        """ Remove the flag byte, inflate the payload if deflated """
+        if len(frame) == 0:
+            raise ValueError('flag byte not found')
+        flag = frame[:1]
+        if flag == RAW_FLAG:
+            return frame[1:]
+        elif flag != DEFLATED_FLAG:
+            raise ValueError('flag byte error: %s' % flag)
+        with memoryview(frame) as view:
+            payload = compressor.decompress(chunks=[view[1:]])
+        if payload is None:
+            raise ValueError('failed to inflate: %d byte(s)' % (len(frame) - 1))
+        return payload
+
+    # Override
+    async def process_received(self, data: bytes):
+        try:
+            await super().process_received(data=data)
+        except (OverflowError, ValueError) as error:
+            self.error('frame error: %s, closing %s', error, self.remote_address)
+            self.__buffer.clear()
+            await self.close()
+            return
+        if self.__accepting:
+            self.__accepting = False
+            # reply the offer (control frame), switch to flagged frames after it sent
+            priority = DeparturePriority.URGENT.value
+            ship = FramedDeparture(payload=DEFLATE_ACCEPT, priority=priority, needs_respond=False,
+                                   fragments=self._pack_control(payload=DEFLATE_ACCEPT), flagged=False)
+            self.__accept_ship = ship
+            await self._dock_departure(ship=ship)
+
+
+RAW_FLAG = b'\x00'
+DEFLATED_FLAG = b'\x01'
+
+DEFLATE_OFFER = b'ZIP?'   # control frame
+DEFLATE_ACCEPT = b'ZIP!'  # control frame
+
+
+#
+#   Length-prefix framing
+#
+
+def varint_to_bytes(value: int) -> bytes:
+    """ Encode integer value in LEB128 """
+    data = bytearray()
+    while value > 0x7F:
+        data.append((value & 0x7F) | 0x80)
+        value >>= 7
+    data.append(value)
+    return bytes(data)
+
+
+def varint_from_buffer(buffer: StreamBuffer, max_len: int = 5) -> Tuple[int, int]:
+    """ Decode integer value from the head, return (value, length); length is 0 on waiting for more data """
+    value = 0
+    bits = 0
+    size = min(buffer.size, max_len)
+    for pos in range(size):
+        ch = buffer.get_byte(pos)
+        value |= (ch & 0x7F) << bits
+        if ch & 0x80 == 0:
+            return value, pos + 1
+        bits += 7
+    if size == max_len:
+        raise OverflowError('varint too long: %d bytes' % max_len)
+    return 0, 0
+
+
+class VarintFramedPorter(FramedPorter):
+    """
+        Frame: [length (varint)] + [payload]
+        Control Frame: [(1 << 32) | length (varint)] + [payload]
+    """
+
+    CONTROL_BIT = 1 << 32  # never set in the length of payload
+
+    # Override
+    def _get_frames(self, buffer: StreamBuffer) -> List[Tuple[bytes, bool]]:
+        frames = []
+        while buffer.size > 0:
+            length, head_len = varint_from_buffer(buffer=buffer)
+            if head_len == 0:
+                break
+            control = length & self.CONTROL_BIT != 0
+            length &= ~self.CONTROL_BIT
+            if length > self.max_frame:
+                raise OverflowError('frame too large: %d > %d' % (length, self.max_frame))
+            elif buffer.size < head_len + length:
+                # waiting for more data
+                break
+            frames.append((buffer.take(length=length, skip=head_len), control))
+        return frames
+
+    # Override
+    def _pack_frame(self, payload: bytes) -> List[bytes]:
+        return [varint_to_bytes(len(payload)), payload]
+
+    # Override
+    def _pack_control(self, payload: bytes) -> Optional[List[bytes]]:
+        return [varint_to_bytes(self.CONTROL_BIT | len(payload)), payload]
+
+
+class LengthFramedPorter(FramedPorter):
+    """
+        Frame: [length (4 bytes, big endian)] + [payload]
+        Control Frame: [0x80000000 | length (4 bytes, big endian)] + [payload]
+    """
+
+    CONTROL_BIT = 0x80000000  # never set in the length of payload
+
+    # Override
+    def _get_frames(self, buffer: StreamBuffer) -> List[Tuple[bytes, bool]]:
+        frames = []
+        while buffer.size >= 4:
+            length = int.from_bytes(buffer.get_bytes(start=0, end=4), 'big')
+            control = length & self.CONTROL_BIT != 0
+            length &= ~self.CONTROL_BIT
+            if length > self.max_frame:
+                raise OverflowError('frame too large: %d > %d' % (length, self.max_frame))
+            elif buffer.size < 4 + length:
+                # waiting for more data
+                break
+            frames.append((buffer.take(length=length, skip=4), control))
+        return frames
+
+    # Override
+    def _pack_frame(self, payload: bytes) -> List[bytes]:
+        return [len(payload).to_bytes(4, 'big'), payload]
+
+    # Override
+    def _pack_control(self, payload: bytes) -> Optional[List[bytes]]:
+        return [(self.CONTROL_BIT | len(payload)).to_bytes(4, 'big'), payload]
+
+
+class DelimiterFramedPorter(FramedPorter):
+    """
+        Frame: [payload] + [delimiter], e.g.: lines of JsON
+        (no space for control frames, so compression is not supported)
+    """
+
+    DELIMITER = b'\n'
+
+    def __init__(self, remote: SocketAddress, local: Optional[SocketAddress], max_frame: int = None,
+                 delimiter: bytes = None):
+        super().__init__(remote=remote, local=local, max_frame=max_frame)
+        if self.compressor is not None:
+            raise ValueError('deflated payload may contain the delimiter')
+        self.__delimiter = self.DELIMITER if delimiter is None else delimiter
+        self.__checked = 0  # length of head data checked without delimiter
+
+    @property
+    def delimiter(self) -> bytes:
+        return self.__delimiter
+
+    # Override
+    def _get_frames(self, buffer: StreamBuffer) -> List[Tuple[bytes, bool]]:
+        delimiter = self.__delimiter
+        max_frame = self.max_frame
+        frames = []
+        while True:
+            # continue searching from the checked data, but not beyond the max frame
+            start = max(0, self.__checked - len(delimiter) + 1)
+            pos = buffer.find(delimiter, start, max_frame + len(delimiter))
+            if pos >= 0:
+                frames.append((buffer.take(length=pos), False))
+                buffer.skip(len(delimiter))
+                self.__checked = 0
+            elif buffer.size > max_frame:
+                raise OverflowError('frame too large: > %d' % max_frame)
+            else:
+                # waiting for more data
+                self.__checked = buffer.size
+                break
+        return frames
+
+    # Override
+    def _pack_frame(self, payload: bytes) -> List[bytes]:
+        return [payload, self.__delimiter]
@@ -28,6 +28,7 @@
 # SOFTWARE.
 # ==============================================================================
 
+import asyncio
 import socket
 import threading
 from abc import ABC
@@ -39,7 +40,7 @@ from startrek import SocketHelper
 from startrek import Channel, BaseChannel
 from startrek import Connection, ConnectionDelegate
 from startrek import BaseConnection, ActiveConnection
-from startrek import BaseHub
+from startrek import ChannelSelector, BaseHub
 
 from .channel import StreamChannel
 
@@ -80,6 +81,11 @@ class StreamHub(BaseHub, ABC):
     def _create_channel_pool(self):
         return ChannelPool()
 
+    # Override
+    def _create_selector(self) -> Optional[ChannelSelector]:
+        # drive the ready channels only
+        return ChannelSelector()
+
     #
     #   Channel
     #
@@ -98,7 +104,11 @@ class StreamHub(BaseHub, ABC):
     def _remove_channel(self, channel: Optional[Channel],
                         remote: Optional[SocketAddress], local: Optional[SocketAddress]) -> Optional[Channel]:
         """ remove cached channel """
-        return self.__channel_pool.remove(item=channel, remote=remote, local=local)
+        cached = self.__channel_pool.remove(item=channel, remote=remote, local=local)
+        self._unwatch_channel(channel=channel)
+        if cached is not None and cached is not channel:
+            self._unwatch_channel(channel=cached)
+        return cached
 
     def _get_channel(self, remote: Optional[SocketAddress], local: Optional[SocketAddress]) -> Optional[Channel]:
         """ get cached channel """
@@ -107,17 +117,32 @@ class StreamHub(BaseHub, ABC):
     def _set_channel(self, channel: Channel,
                      remote: Optional[SocketAddress], local: Optional[SocketAddress]) -> Optional[Channel]:
         """ cache channel """
-        return self.__channel_pool.set(item=channel, remote=remote, local=local)
+        cached = self.__channel_pool.set(item=channel, remote=remote, local=local)
+        if cached is not None and cached is not channel:
+            self._unwatch_channel(channel=cached)
+        self._watch_channel(channel=channel)
+        return cached
 
 
 class ServerHub(StreamHub, Runnable):
-    """ Stream Server Hub """
+    """
+        Stream Server Hub
+        ~~~~~~~~~~~~~~~~~
 
-    def __init__(self, delegate: ConnectionDelegate):
+        Accepting connections in a daemon thread (blocking master socket),
+        or on the event loop which starts this hub when 'threaded' is False.
+    """
+
+    BACKLOG = 128      # max connections pending in the listening queue
+    MAX_ACCEPTS = 64   # max connections accepted in one wakeup
+
+    def __init__(self, delegate: ConnectionDelegate, threaded: bool = True):
         super().__init__(delegate=delegate)
         self.__local = None   # SocketAddress
         self.__master = None  # socket.socket
+        self.__threaded = threaded
         self.__daemon = Daemon(target=self)
+        self.__task: Optional[asyncio.Task] = None
         self.__running = False
         self.__helper = SocketHelper()
 
@@ -132,8 +157,9 @@ class ServerHub(StreamHub, Runnable):
         return conn
 
     def bind(self, address: SocketAddress = None,
-             host: str = None, port: int = 0) -> socket.socket:
-        """ Bind to local address (host:port) """
+             host: str = None, port: int = 0,
+             reuse_port: bool = False, backlog: int = None) -> socket.socket:
+        """ Bind to local address (host:port), reuse port for multi processes """
         if address is None:
             if port > 0:
                 assert host is not None, 'host should not be empty'
@@ -145,10 +171,12 @@ class ServerHub(StreamHub, Runnable):
         if sock is None:
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            # sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            if reuse_port:
+                # shared with the other worker processes (sharded gates)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
             sock.setblocking(True)
             sock.bind(address)
-            sock.listen(1)
+            sock.listen(self.BACKLOG if backlog is None else backlog)
             # sock.setblocking(False)
             self._set_master(master=sock)
             self.__local = address
@@ -185,7 +213,14 @@ class ServerHub(StreamHub, Runnable):
         # 1. mark this hub to running
         self.__running = True
         # 2. start an async task for this hub
-        self.__daemon.start()
+        if self.__threaded:
+            self.__daemon.start()
+        else:
+            # accepting on current event loop
+            master = self._get_master()
+            assert master is not None, 'server hub not bound: %s' % self
+            master.setblocking(False)
+            self.__task = Runner.async_task(coro=self.run())
         # await self.run()
 
     async def stop(self):
@@ -194,28 +229,55 @@ class ServerHub(StreamHub, Runnable):
         # 2. waiting for the hub to stop
         await Runner.sleep(seconds=0.25)
         # 3. cancel the async task
+        task = self.__task
+        if task is not None:
+            self.__task = None
+            task.cancel()
         self.__daemon.stop()
+        # 4. stop watching channels
+        self.close_selector()
 
     # Override
     async def run(self):
         self.__running = True
+        helper = self.socket_helper
         while self.running:
             master = self._get_master()
             try:
-                sock, address = master.accept()
-                if sock is None:
-                    await Runner.sleep(seconds=Runner.INTERVAL_NORMAL)
+                if helper.is_blocking(sock=master):
+                    sock, address = master.accept()
+                    if sock is None:
+                        await Runner.sleep(seconds=Runner.INTERVAL_NORMAL)
+                    else:
+                        await self._accept(remote=address, local=self.local_address, sock=sock)
                 else:
-                    await self._accept(remote=address, local=self.local_address, sock=sock)
+                    await self._accept_pending(master=master)
             except (OSError, socket.error) as error:
                 if error.errno == socket.EAGAIN:  # error.strerror == 'Resource temporarily unavailable':
-                    helper = self.socket_helper
                     if not helper.is_blocking(sock=master):
                         continue
                 self.error('[TCP] socket error: %s', error)
+                # too many open files? have a rest
+                await Runner.sleep(seconds=Runner.INTERVAL_NORMAL)
             except Exception as error:
                 self.error('[TCP] accept error: %s', error)
 
+    async def _accept_pending(self, master: socket.socket) -> int:
+        """ Wait for the non-blocking master socket, and accept all pending connections """
+        loop = asyncio.get_event_loop()
+        sock, address = await loop.sock_accept(master)
+        await self._accept(remote=address, local=self.local_address, sock=sock)
+        count = 1
+        while count < self.MAX_ACCEPTS:
+            try:
+                sock, address = master.accept()
+            except BlockingIOError:
+                # listening queue is empty now
+                break
+            await self._accept(remote=address, local=self.local_address, sock=sock)
+            count += 1
+        return count
+
     async def _accept(self, remote: SocketAddress, local: SocketAddress, sock: socket.socket):
         # override for user-customized channel
         channel = self._create_channel(remote=remote, local=local)
@@ -28,8 +28,9 @@
 # SOFTWARE.
 # ==============================================================================
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+from startrek import Connection, BaseConnection
 from startrek import Arrival, ArrivalShip
 from startrek import Departure, DepartureShip, DeparturePriority
 from startrek import StarPorter
@@ -69,10 +70,12 @@ class PlainArrival(ArrivalShip):
 
 class PlainDeparture(DepartureShip):
 
-    def __init__(self, payload: bytes, priority: int = 0, needs_respond: bool = False):
+    def __init__(self, payload: bytes, priority: int = 0, needs_respond: bool = False,
+                 fragments: List[bytes] = None):
         super().__init__(priority=priority, max_tries=1)
         self.__completed = payload
-        self.__fragments = [payload]
+        # fragments for framing the payload (e.g.: [length, payload])
+        self.__fragments = [payload] if fragments is None else fragments
         self.__important = needs_respond
 
     def __str__(self) -> str:
@@ -144,11 +147,28 @@ class PlainPorter(StarPorter):
     #   Sending
     #
 
+    # Override
+    async def _send_fragments(self, fragments: List[bytes], conn: Connection) -> Tuple[int, int]:
+        if len(fragments) < 2 or not isinstance(conn, BaseConnection):
+            return await super()._send_fragments(fragments=fragments, conn=conn)
+        # stream has no boundaries, so
+        # write all fragments (small responses piggybacked) in one call
+        sent = await conn.send_stream(fragments=fragments)
+        index = 0
+        for fra in fragments:
+            if sent < len(fra):
+                # buffer overflow?
+                return index, max(sent, 0)
+            sent -= len(fra)
+            index += 1
+        return index, 0
+
     async def respond(self, payload: bytes) -> bool:
         """ sending response """
         priority = DeparturePriority.SLOWER.value
         ship = self._create_departure(payload=payload, priority=priority, needs_respond=False)
-        return await self.send_ship(ship=ship)
+        # responses will not be refused by the watermarks
+        return await self._dock_departure(ship=ship)
 
     async def send(self, payload: bytes, priority: int) -> bool:
         """ sending payload with priority """
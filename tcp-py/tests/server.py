@@ -1,11 +1,9 @@
 #! /usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import asyncio
 import socket
 import sys
 import os
-import threading
 from typing import Optional
 
 from startrek.types import SocketAddress
@@ -64,7 +62,8 @@ class Server(PorterDelegate, Logging):
         super().__init__()
         self.__local_address = (host, port)
         gate = TCPGate(delegate=self)
-        gate.hub = StreamServerHub(delegate=gate)
+        # accepting on the event loop of the gate
+        gate.hub = StreamServerHub(delegate=gate, threaded=False)
         self.__gate = gate
 
     @property
@@ -83,10 +82,7 @@ class Server(PorterDelegate, Logging):
         self.hub.bind(address=self.local_address)
         await self.gate.start()
         # start hub
-        loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
-        thr = threading.Thread(target=_start_thread_loop, args=(loop, self.hub), daemon=True)
-        # thr.daemon = True
-        thr.start()
+        await self.hub.start()
         while self.gate.running:
             await Runner.sleep(seconds=2.0)
 
@@ -138,11 +134,6 @@ class Server(PorterDelegate, Logging):
         await porter.close()
 
 
-def _start_thread_loop(loop: asyncio.AbstractEventLoop, runner: Runner):
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(runner.run())
-
-
 SERVER_HOST = Inet.inet_address()
 # SERVER_HOST = '0.0.0.0'
 SERVER_PORT = 9394
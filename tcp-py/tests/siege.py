@@ -31,6 +31,7 @@
 """
 
 import multiprocessing
+import socket
 import threading
 import time
 from typing import Optional
@@ -300,6 +301,40 @@ class Colonel(ThreadRunner):
         print('====================================================')
 
 
+class Storm:
+    """ Connect to the server all at once, for measuring the accept throughput """
+
+    CONNECTIONS = 500
+
+    def __init__(self, remote: SocketAddress):
+        super().__init__()
+        self.__remote_address = remote
+
+    def run(self):
+        remote = self.__remote_address
+        count = self.CONNECTIONS
+        print('**** storming %s with %d connections ...' % (remote, count))
+        start = time.time()
+        sockets = []
+        for i in range(count):
+            sock = socket.create_connection(remote, timeout=10)
+            sock.sendall(b'Hello world!')
+            sockets.append(sock)
+        connected = time.time()
+        responded = 0
+        for sock in sockets:
+            try:
+                if len(sock.recv(1024)) > 0:
+                    responded += 1
+            except (OSError, socket.error) as error:
+                print('**** socket error: %s' % error)
+            sock.close()
+        end = time.time()
+        print('**** connected: %d in %.3f seconds' % (count, connected - start))
+        print('**** responded: %d in %.3f seconds, %.1f connections/second'
+              % (responded, end - start, responded / (end - start)))
+
+
 Sergeant.LANDING_POINT = 'normandy'
 Sergeant.UNITS = 10
 Colonel.TROOPS = 10
@@ -318,5 +353,8 @@ test_station = all_stations[1]
 
 if __name__ == '__main__':
     print('**** Start testing ...')
-    g_commander = Colonel(remote=test_station)
-    g_commander.start()
+    if len(sys.argv) > 1 and sys.argv[1] == 'storm':
+        Storm(remote=test_station).run()
+    else:
+        g_commander = Colonel(remote=test_station)
+        g_commander.start()
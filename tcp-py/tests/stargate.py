@@ -7,7 +7,7 @@ from startrek.types import SocketAddress
 from startrek.skywalker import Runnable, Runner, Daemon
 from startrek import Connection, ConnectionState
 from startrek import ActiveConnection
-from startrek import Hub
+from startrek import Hub, BaseHub
 from startrek import Arrival
 from startrek import Porter, PorterDelegate
 from startrek import StarGate
@@ -124,6 +124,9 @@ class AutoGate(CommonGate, Runnable, Generic[H], ABC):
 
     async def finish(self):
         self.__running = False
+        hub = self.hub
+        if isinstance(hub, BaseHub):
+            hub.close_selector()
 
     async def handle(self):
         while self.running:
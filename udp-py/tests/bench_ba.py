@@ -0,0 +1,106 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+    Byte Array Benchmark
+    ~~~~~~~~~~~~~~~~~~~~
+
+    Micro-benchmarks for the primitives in 'udp.ba.utils',
+    compared with the byte by byte loops they replaced.
+"""
+
+import timeit
+
+import sys
+import os
+
+curPath = os.path.abspath(os.path.dirname(__file__))
+rootPath = os.path.split(curPath)[0]
+sys.path.append(rootPath)
+
+from udp.ba.array import Endian
+from udp.ba.utils import array_copy, array_equal
+from udp.ba.utils import int_from_buffer, int_to_buffer
+
+
+#
+#   Loops
+#
+
+def loop_copy(src, src_pos: int, dest, dest_pos: int, length: int):
+    for i in range(length):
+        dest[dest_pos+i] = src[src_pos+i]
+    return True
+
+
+def loop_equal(left_buffer, left_offset: int, left_size: int,
+               right_buffer, right_offset: int, right_size: int) -> bool:
+    if left_size != right_size:
+        return False
+    pos1 = left_offset + left_size - 1
+    pos2 = right_offset + right_size - 1
+    while pos2 >= right_offset:
+        if left_buffer[pos1] != right_buffer[pos2]:
+            return False
+        pos1 -= 1
+        pos2 -= 1
+    return True
+
+
+def loop_int_from(buffer, offset: int, size: int) -> int:
+    value = 0
+    pos = offset
+    end = offset + size
+    while pos < end:
+        value = (value << 8) | (buffer[pos] & 0xFF)
+        pos += 1
+    return value
+
+
+def loop_int_to(value: int, buffer, offset: int, size: int):
+    pos = offset + size - 1
+    while pos >= offset:
+        buffer[pos] = value & 0xFF
+        value >>= 8
+        pos -= 1
+
+
+SMALL = bytes(range(24))          # MTP header
+LARGE = bytes(range(256)) * 2     # MTP fragment body
+TARGET = bytearray(len(LARGE))
+LARGE_COPY = bytes(LARGE)
+
+CASES = [
+    ('copy  (512 bytes)',
+     lambda: loop_copy(LARGE, 0, TARGET, 0, 512),
+     lambda: array_copy(LARGE, 0, TARGET, 0, 512)),
+    ('equal (512 bytes)',
+     lambda: loop_equal(LARGE, 0, 512, LARGE_COPY, 0, 512),
+     lambda: array_equal(LARGE, 0, 512, LARGE_COPY, 0, 512)),
+    ('equal (4 bytes)',
+     lambda: loop_equal(SMALL, 4, 4, SMALL, 4, 4) and loop_equal(SMALL, 4, 4, LARGE, 4, 4),
+     lambda: array_equal(SMALL, 4, 4, SMALL, 4, 4) and array_equal(SMALL, 4, 4, LARGE, 4, 4)),
+    ('int_from_buffer (4 bytes)',
+     lambda: loop_int_from(SMALL, 4, 4),
+     lambda: int_from_buffer(SMALL, 4, 4, Endian.BIG_ENDIAN)),
+    ('int_to_buffer   (4 bytes)',
+     lambda: loop_int_to(0x12345678, TARGET, 4, 4),
+     lambda: int_to_buffer(0x12345678, TARGET, 4, 4, Endian.BIG_ENDIAN)),
+]
+
+
+def bench(func, number: int) -> float:
+    """ return microseconds per call """
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1000000
+
+
+def main():
+    print('%-28s %10s %10s %8s' % ('', 'loop (us)', 'fast (us)', 'speedup'))
+    for name, slow, fast in CASES:
+        t1 = bench(slow, number=2000)
+        t2 = bench(fast, number=2000)
+        print('%-28s %10.3f %10.3f %7.1fx' % (name, t1, t2, t1 / t2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+    Channel Benchmark
+    ~~~~~~~~~~~~~~~~~
+
+    Packets per second received on loopback by:
+        1. PacketChannel   (recvfrom via thread pool executor)
+        2. DatagramChannel (asyncio datagram transport)
+"""
+
+import multiprocessing
+import socket
+import time
+
+import sys
+import os
+
+curPath = os.path.abspath(os.path.dirname(__file__))
+rootPath = os.path.split(curPath)[0]
+sys.path.append(rootPath)
+
+from udp import PacketChannel, DatagramChannel
+from startrek.skywalker import Runner
+from startrek.utils import Log
+
+from tests.log import init_logger
+
+
+SERVER_ADDRESS = ('127.0.0.1', 9395)
+
+PACKET = b'x' * 64
+DURATION = 3.0  # seconds
+
+
+def blast(address, duration: float):
+    """ Keep sending packets to the address """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    expired = time.time() + duration
+    while time.time() < expired:
+        for _ in range(64):
+            try:
+                sock.sendto(PACKET, address)
+            except OSError:
+                pass
+    sock.close()
+
+
+async def bench(channel_class) -> float:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(SERVER_ADDRESS)
+    sock.setblocking(False)
+    channel = channel_class(remote=None, local=SERVER_ADDRESS)
+    await channel.set_socket(sock=sock)
+    # start sender
+    sender = multiprocessing.Process(target=blast, args=(SERVER_ADDRESS, DURATION + 1.0), daemon=True)
+    sender.start()
+    await Runner.sleep(seconds=0.5)
+    # count received packets
+    count = 0
+    start = time.time()
+    expired = start + DURATION
+    while time.time() < expired:
+        data, remote = await channel.receive(max_len=1472)
+        if data is None:
+            await Runner.sleep(seconds=0)
+        else:
+            count += 1
+    elapsed = time.time() - start
+    sender.join()
+    sock.close()
+    return count / elapsed
+
+
+async def main():
+    pps1 = await bench(channel_class=PacketChannel)
+    Log.info('PacketChannel   : %10.0f packets/second', pps1)
+    pps2 = await bench(channel_class=DatagramChannel)
+    Log.info('DatagramChannel : %10.0f packets/second', pps2)
+    Log.info('speed up        : %10.1fx', pps2 / pps1)
+
+
+if __name__ == '__main__':
+    init_logger(name='Benchmark')
+    Runner.sync_run(main=main())
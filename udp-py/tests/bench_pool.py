@@ -0,0 +1,85 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+    Channel Pool Benchmark
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Latency of looking up the channel for a new remote address (no channel
+    connected to it, so the unconnected master channel should be returned)
+    against the count of connected channels:
+        1. scanning all items for a channel not connected (old way)
+        2. index of channels not connected
+"""
+
+import time
+from typing import Optional
+
+import sys
+import os
+
+curPath = os.path.abspath(os.path.dirname(__file__))
+rootPath = os.path.split(curPath)[0]
+sys.path.append(rootPath)
+
+from startrek import SocketAddress, AddressPairMap
+from startrek import Channel
+
+from udp import PacketChannel
+from udp.hub import ChannelPool
+
+
+MASTER = ('0.0.0.0', 9394)
+LOCAL = ('192.168.1.2', 9394)
+
+LOOKUPS = 2000
+
+
+class ScanningPool(AddressPairMap[Channel]):
+
+    # Override
+    def get(self, remote: Optional[SocketAddress], local: Optional[SocketAddress]) -> Optional[Channel]:
+        channel = super().get(remote=remote, local=local)
+        if channel is not None:
+            return channel
+        elif remote is None:
+            return None
+        for item in self.items:
+            if item.remote_address is None:
+                return item
+
+
+def remote_address(index: int):
+    return '10.%d.%d.%d' % ((index >> 16) & 0xFF, (index >> 8) & 0xFF, index & 0xFF), 10000 + index % 50000
+
+
+def fill(pool, count: int):
+    for index in range(count):
+        remote = remote_address(index=index)
+        pool.set(item=PacketChannel(remote=remote, local=LOCAL), remote=remote, local=LOCAL)
+    # master channel bound after others (e.g.: rebound after network changed)
+    master = PacketChannel(remote=None, local=MASTER)
+    pool.set(item=master, remote=None, local=MASTER)
+    return master
+
+
+def bench(pool, count: int) -> float:
+    master = fill(pool, count=count)
+    remotes = [remote_address(index=count + index) for index in range(LOOKUPS)]
+    start = time.time()
+    for remote in remotes:
+        channel = pool.get(remote=remote, local=None)
+        assert channel is master, 'channel error: %s' % channel
+    return (time.time() - start) / LOOKUPS
+
+
+def main():
+    print('%10s %14s %14s' % ('channels', 'scanning(us)', 'indexed(us)'))
+    for count in [100, 1000, 10000, 50000]:
+        t1 = bench(ScanningPool(), count=count)
+        t2 = bench(ChannelPool(), count=count)
+        print('%10d %14.3f %14.3f' % (count, t1 * 1e6, t2 * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+    Window Benchmark
+    ~~~~~~~~~~~~~~~~
+
+    Goodput of large messages through a lossy link (bottleneck queue with
+    tail drop, random loss, and delay) between two package porters:
+        1. sending all pages at once, resending the rest after expired
+        2. sending pages within the congestion window
+
+    DepartureShip.EXPIRES is shortened to 2 seconds here,
+    otherwise the first way will wait 2 minutes for each retry.
+"""
+
+import asyncio
+import random
+import time
+from typing import Optional
+
+import sys
+import os
+
+curPath = os.path.abspath(os.path.dirname(__file__))
+rootPath = os.path.split(curPath)[0]
+sys.path.append(rootPath)
+
+from startrek import DepartureShip
+
+from udp import CongestionWindow
+from udp import PackagePorter
+
+
+SENDER = ('192.168.0.1', 9394)
+RECEIVER = ('192.168.0.2', 9394)
+
+RATE = 5000         # packets per second through the bottleneck
+QUEUE = 64          # packets waiting in the bottleneck queue
+DELAY = 0.02        # seconds, one way
+LOSS = 0.01         # random loss
+
+MESSAGES = 8
+MESSAGE_SIZE = 64 * 1024
+TIMEOUT = 60        # seconds
+
+
+class Link:
+    """ One way link with a bottleneck queue """
+
+    def __init__(self, loss: float):
+        super().__init__()
+        self.loss = loss
+        self.peer: Optional[PackagePorter] = None
+        self.__busy_until = 0.0
+        self.sent = 0
+        self.dropped = 0
+
+    def transmit(self, data: bytes) -> bool:
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        start = max(now, self.__busy_until)
+        if (start - now) * RATE >= QUEUE:
+            # queue full, tail drop
+            self.dropped += 1
+            return False
+        self.__busy_until = start + 1.0 / RATE
+        self.sent += 1
+        if random.random() < self.loss:
+            self.dropped += 1
+            return False
+        loop.call_at(self.__busy_until + DELAY, self.__deliver, data)
+        return True
+
+    def __deliver(self, data: bytes):
+        asyncio.ensure_future(self.peer.process_received(data=data))
+
+
+class Connection:
+    """ Connection via the link """
+
+    def __init__(self, link: Link):
+        super().__init__()
+        self.__link = link
+
+    vacant = True
+    closed = False
+    alive = True
+    state = None
+
+    async def send_data(self, data: bytes) -> int:
+        self.__link.transmit(data=data)
+        return len(data)
+
+    async def close(self):
+        pass
+
+
+class Delegate:
+
+    def __init__(self):
+        super().__init__()
+        self.received = 0
+        self.sent = 0
+        self.failed = 0
+
+    async def porter_received(self, ship, porter):
+        self.received += 1
+
+    async def porter_sent(self, ship, porter):
+        self.sent += 1
+
+    async def porter_failed(self, error, ship, porter):
+        self.failed += 1
+
+    async def porter_error(self, error, ship, porter):
+        pass
+
+    async def porter_drained(self, porter):
+        pass
+
+
+class BlastPorter(PackagePorter):
+
+    # Override
+    def _create_window(self) -> Optional[CongestionWindow]:
+        return None
+
+
+async def bench(porter_class) -> dict:
+    delegate = Delegate()
+    sender = porter_class(remote=RECEIVER, local=SENDER)
+    receiver = porter_class(remote=SENDER, local=RECEIVER)
+    forward = Link(loss=LOSS)
+    backward = Link(loss=LOSS)
+    forward.peer = receiver
+    backward.peer = sender
+    sender.delegate = delegate
+    receiver.delegate = delegate
+    # porters keep weak references to the connections
+    connections = [Connection(link=forward), Connection(link=backward)]
+    await sender.set_connection(conn=connections[0])
+    await receiver.set_connection(conn=connections[1])
+    for index in range(MESSAGES):
+        body = (b'%d ' % index) + os.urandom(MESSAGE_SIZE)
+        await sender.send_message(body=body)
+    start = time.time()
+    while delegate.received + delegate.failed < MESSAGES and time.time() - start < TIMEOUT:
+        busy1 = await sender.process()
+        busy2 = await receiver.process()
+        await asyncio.sleep(0 if busy1 or busy2 else 0.001)
+    elapsed = time.time() - start
+    assert len(connections) == 2
+    return {
+        'received': delegate.received,
+        'elapsed': elapsed,
+        'goodput': delegate.received * MESSAGE_SIZE / elapsed / 1024,
+        'packets': forward.sent,
+        'dropped': forward.dropped,
+        'window': sender.window,
+    }
+
+
+async def main():
+    DepartureShip.EXPIRES = 2
+    random.seed(1)
+    print('link: %d pkt/s, queue %d, delay %d ms, loss %.1f%%; %d messages x %d KB'
+          % (RATE, QUEUE, DELAY * 1000, LOSS * 100, MESSAGES, MESSAGE_SIZE // 1024))
+    print('%10s %10s %10s %14s %10s %10s' % ('sender', 'received', 'time(s)', 'goodput(KB/s)', 'packets', 'dropped'))
+    for name, porter_class in [('blast', BlastPorter), ('window', PackagePorter)]:
+        res = await bench(porter_class=porter_class)
+        print('%10s %10d %10.2f %14.1f %10d %10d' % (name, res['received'], res['elapsed'], res['goodput'],
+                                                     res['packets'], res['dropped']))
+        if res['window'] is not None:
+            print('           %s' % res['window'])
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+    Sharded Server
+    ~~~~~~~~~~~~~~
+
+    Forks worker processes binding the same address with 'SO_REUSEPORT',
+    data for peers owned by other workers go through shared memory arrows.
+"""
+
+import sys
+import os
+
+from ipx import SharedMemoryArrow
+from ipx.shm.mp import MpSharedMemoryController
+
+from startrek.types import SocketAddress
+from startrek.utils import Log
+from startrek import BaseChannel
+
+curPath = os.path.abspath(os.path.dirname(__file__))
+rootPath = os.path.split(curPath)[0]
+sys.path.append(rootPath)
+
+from udp import Shard, ShardGate, ShardSupervisor
+
+from tests.stargate import UDPGate
+from tests.server import Server, PacketServerHub
+from tests.server import SERVER_HOST, SERVER_PORT
+from tests.log import init_logger
+
+
+class ShardedGate(ShardGate, UDPGate):
+    pass
+
+
+class ShardedServer(Server):
+
+    def __init__(self, host: str, port: int, shard: Shard):
+        super().__init__(host=host, port=port)
+        gate = ShardedGate(delegate=self)
+        gate.hub = PacketServerHub(delegate=gate)
+        gate.shard = shard
+        self.__gate = gate
+
+    @property  # Override
+    def gate(self) -> ShardedGate:
+        return self.__gate
+
+    # Override
+    async def bind(self, local: SocketAddress):
+        channel, sock = self.hub.bind(address=local, reuse_port=True)
+        if sock is not None:
+            assert isinstance(channel, BaseChannel), 'channel error: %s' % channel
+            # set socket for this channel
+            await channel.set_socket(sock=sock)
+
+
+class Supervisor(ShardSupervisor):
+
+    ARROW_SIZE = 1 << 20
+
+    # Override
+    def _create_arrow(self, source: int, target: int):
+        controller = MpSharedMemoryController.new(size=self.ARROW_SIZE)
+        return SharedMemoryArrow(controller=controller)
+
+    # Override
+    def _destroy_arrow(self, arrow: SharedMemoryArrow):
+        arrow.destroy()
+
+    # Override
+    async def _run_worker(self, shard: Shard):
+        Log.warning('worker %d (pid=%d) starting ...', shard.index, os.getpid())
+        server = ShardedServer(host=SERVER_HOST, port=SERVER_PORT, shard=shard)
+        await server.start()
+
+
+if __name__ == '__main__':
+    init_logger(name='UDP')
+
+    Log.warning('UDP sharded server (%s:%d) starting ...', SERVER_HOST, SERVER_PORT)
+
+    g_supervisor = Supervisor()
+    g_supervisor.start()
+    try:
+        g_supervisor.join()
+    except KeyboardInterrupt:
+        g_supervisor.stop()
+        g_supervisor.join()
+
+    Log.warning('UDP sharded server (%s:%d) stopped.', SERVER_HOST, SERVER_PORT)
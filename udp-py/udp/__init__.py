@@ -30,9 +30,13 @@
 
 from startrek import *
 
-from .startrek import PackageArrival, PackageDeparture, PackagePorter
+from .window import CongestionWindow
+from .sack import AckCollector
+from .startrek import PackageArrival, PackageDeparture, WindowDeparture
+from .startrek import PackagePorter, StreamPackagePorter
 # from .aio import DatagramHelper
 from .channel import PacketChannel, PacketChannelReader, PacketChannelWriter
+from .channel import DatagramChannel, DatagramChannelReader, DatagramChannelWriter
 from .connection import PacketConnection
 from .hub import PacketHub, ServerHub, ClientHub
 
@@ -46,7 +50,7 @@ __all__ = [
     'SocketAddress',
     'AddressPairObject',
 
-    'PairMap', 'AbstractPairMap', 'HashPairMap',
+    'PairMap', 'AbstractPairMap', 'HashPairMap', 'FlatPairMap',
     'AddressPairMap',
 
     #
@@ -59,17 +63,20 @@ __all__ = [
 
     'SocketReader', 'SocketWriter',
     'SocketHelper',
-    'BaseChannel',
+    'ReceiveSizer', 'BaseChannel',
     'BaseHub', 'BaseConnection', 'ActiveConnection',
+    'ChannelSelector',
 
     'Ship', 'Arrival', 'Departure',
     'ShipStatus', 'DeparturePriority',
     'Porter', 'PorterStatus', 'PorterDelegate',
     'Gate',
 
-    'ArrivalShip', 'ArrivalHall', 'DepartureShip', 'DepartureHall',
-    'Dock', 'LockedDock',
+    'ArrivalShip', 'ArrivalHall', 'BoundedArrivalHall',
+    'RttEstimator', 'DepartureShip', 'DepartureHall', 'TimedDepartureHall',
+    'Dock', 'LockedDock', 'TimedDock', 'Compressor',
     'StarPorter', 'StarGate',
+    'ShardRouter', 'Shard', 'ShardGate', 'ShardSupervisor',
 
 
     ################
@@ -78,10 +85,13 @@ __all__ = [
     #
     ################
 
-    'PackageArrival', 'PackageDeparture', 'PackagePorter',
+    'CongestionWindow', 'AckCollector',
+    'PackageArrival', 'PackageDeparture', 'WindowDeparture',
+    'PackagePorter', 'StreamPackagePorter',
 
     # 'DatagramHelper',
     'PacketChannel', 'PacketChannelReader', 'PacketChannelWriter',
+    'DatagramChannel', 'DatagramChannelReader', 'DatagramChannelWriter',
     'PacketConnection',
 
     'PacketHub', 'ServerHub', 'ClientHub',
@@ -30,13 +30,17 @@
 
 import asyncio
 import socket
+import threading
 import traceback
-from typing import Optional, Tuple
+from collections import deque
+from typing import Optional, Tuple, List, Deque
 
 from startrek.utils import Log
 from startrek import SocketAddress
 from startrek import SocketHelper
 
+from .ba import BufferPool
+
 
 # noinspection PyMethodMayBeStatic
 class DatagramHelper(SocketHelper):
@@ -105,3 +109,245 @@ class DatagramHelper(SocketHelper):
             raise
         except Exception as error:
             raise OSError('Failed to receive datagram: %s' % error)
+
+    async def receive_batch(self, sock: socket.socket, max_len: int, max_count: int,
+                            pool: Optional[BufferPool] = None) -> List[Tuple[bytes, SocketAddress]]:
+        """ Receive datagram packages, at most 'max_count' in one call """
+        loop = asyncio.get_event_loop()
+        try:
+            return await loop.run_in_executor(
+                None,
+                _receive_batch,
+                sock,
+                max_len,
+                max_count,
+                pool,
+            )
+        except BlockingIOError:
+            await asyncio.sleep(0.01)
+            raise
+        except OSError:
+            raise
+        except Exception as error:
+            raise OSError('Failed to receive datagrams: %s' % error)
+
+    async def send_batch(self, sock: socket.socket, packets: List[Tuple[bytes, Optional[SocketAddress]]]) -> int:
+        """ Send datagram packages in one call, return count of packages sent """
+        loop = asyncio.get_event_loop()
+        try:
+            count, error = await loop.run_in_executor(
+                None,
+                _send_batch,
+                sock,
+                packets,
+            )
+        except BlockingIOError:
+            await asyncio.sleep(0.01)
+            raise
+        except OSError:
+            raise
+        except Exception as e:
+            raise OSError('Failed to send datagrams: %s' % e)
+        if error is not None:
+            Log.warning('[UDP] only %d/%d datagram(s) sent: %s', count, len(packets), error)
+        return count
+
+
+# not waiting for more datagrams after the first one
+_MSG_DONTWAIT = getattr(socket, 'MSG_DONTWAIT', 0)
+
+
+def _receive_into(sock: socket.socket, max_len: int, pool: BufferPool,
+                  flags: int = 0) -> Tuple[memoryview, SocketAddress]:
+    """ recvfrom_into() a buffer from the pool, return the view of received data """
+    view = pool.acquire()
+    if max_len > len(view):
+        max_len = len(view)
+    size, remote = sock.recvfrom_into(view, max_len, flags)  # raise OSError
+    return view[:size], remote
+
+
+def _receive_batch(sock: socket.socket, max_len: int, max_count: int,
+                   pool: Optional[BufferPool]) -> List[Tuple[bytes, SocketAddress]]:
+    """ Keep calling recvfrom() until the reading buffer is empty """
+    if pool is None:
+        packets = [sock.recvfrom(max_len)]  # raise OSError
+    else:
+        packets = [_receive_into(sock, max_len, pool)]  # raise OSError
+    if _MSG_DONTWAIT == 0 and sock.gettimeout() != 0:
+        # blocking socket, cannot check the buffer without waiting
+        return packets
+    while len(packets) < max_count:
+        try:
+            if pool is None:
+                packets.append(sock.recvfrom(max_len, _MSG_DONTWAIT))
+            else:
+                packets.append(_receive_into(sock, max_len, pool, _MSG_DONTWAIT))
+        except OSError:
+            # no more datagrams now ('BlockingIOError'),
+            # other errors will be raised again in next time
+            break
+    return packets
+
+
+def _send_batch(sock: socket.socket,
+                packets: List[Tuple[bytes, Optional[SocketAddress]]]) -> Tuple[int, Optional[OSError]]:
+    """ Keep sending datagrams until the writing buffer is full,
+        return count of datagrams sent, and the error which stopped it """
+    count = 0
+    for data, target in packets:
+        try:
+            if target is None:
+                sock.send(data)
+            else:
+                sock.sendto(data, target)
+        except (BlockingIOError, InterruptedError):
+            if count == 0:
+                raise
+            # buffer overflow, the rest ones will be sent in next time
+            break
+        except OSError as error:
+            if count == 0:
+                raise
+            # sent some, the caller should know why the rest ones failed
+            return count, error
+        count += 1
+    return count, None
+
+
+class DatagramProtocol(asyncio.DatagramProtocol):
+    """
+        Datagram Protocol
+        ~~~~~~~~~~~~~~~~~
+
+        Datagrams are pushed into the queue by the transport callbacks
+        on the event loop, so receiving a packet needs no executor thread.
+    """
+
+    # max datagrams waiting in the queue,
+    # new datagrams will be dropped when the queue is full (like the kernel buffer)
+    MAX_QUEUE = 8192
+
+    def __init__(self):
+        super().__init__()
+        self.__queue: Deque[Tuple[bytes, SocketAddress]] = deque()
+        self.__transport: Optional[asyncio.DatagramTransport] = None
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__thread: Optional[int] = None  # ident of the thread running the loop
+        self.__error: Optional[OSError] = None
+        self.__closed = False
+        self.__paused = False
+        self.__dropped = 0
+
+    @property
+    def transport(self) -> Optional[asyncio.DatagramTransport]:
+        return self.__transport
+
+    @property
+    def closed(self) -> bool:
+        return self.__closed
+
+    @property
+    def paused(self) -> bool:
+        """ writing buffer is full """
+        return self.__paused
+
+    @property
+    def available(self) -> bool:
+        """ datagrams waiting to be received """
+        return len(self.__queue) > 0
+
+    @property
+    def dropped(self) -> int:
+        """ count of datagrams dropped for the queue is full """
+        return self.__dropped
+
+    def close(self):
+        transport = self.__transport
+        if transport is not None:
+            transport.close()
+        self.__closed = True
+
+    #
+    #   asyncio callbacks
+    #
+
+    # Override
+    def connection_made(self, transport: asyncio.DatagramTransport):
+        self.__transport = transport
+        self.__loop = asyncio.get_event_loop()
+        self.__thread = threading.get_ident()
+
+    # Override
+    def connection_lost(self, exc: Optional[Exception]):
+        self.__closed = True
+        self.__transport = None
+
+    # Override
+    def datagram_received(self, data: bytes, addr: SocketAddress):
+        queue = self.__queue
+        if len(queue) < self.MAX_QUEUE:
+            queue.append((data, addr))
+        else:
+            self.__dropped += 1
+
+    # Override
+    def error_received(self, exc: OSError):
+        transport = self.__transport
+        if transport is None or transport.get_extra_info('peername') is None:
+            # ICMP error (e.g. 'port unreachable') from one of the peers,
+            # the shared socket is still working for the others, drop it
+            Log.warning('[UDP] datagram error: %s', exc)
+        else:
+            # connected socket, report it to the channel
+            self.__error = exc
+
+    # Override
+    def pause_writing(self):
+        self.__paused = True
+
+    # Override
+    def resume_writing(self):
+        self.__paused = False
+
+    #
+    #   I/O
+    #
+
+    def receive(self) -> Tuple[Optional[bytes], Optional[SocketAddress]]:
+        """ Get a received datagram from the queue """
+        error = self.__error
+        if error is not None:
+            self.__error = None
+            raise error
+        try:
+            return self.__queue.popleft()
+        except IndexError:
+            # received nothing
+            return None, None
+
+    def receive_batch(self, max_count: int) -> List[Tuple[bytes, SocketAddress]]:
+        """ Get received datagrams from the queue, at most 'max_count' """
+        error = self.__error
+        if error is not None:
+            self.__error = None
+            raise error
+        queue = self.__queue
+        count = min(max_count, len(queue))
+        return [queue.popleft() for _ in range(count)]
+
+    def send_to(self, data: bytes, target: Optional[SocketAddress]) -> int:
+        """ Send datagram via the transport, return 0 when the buffer is full """
+        transport = self.__transport
+        if transport is None or self.__closed:
+            raise ConnectionError('transport closed')
+        elif self.__paused:
+            # buffer overflow
+            return 0
+        loop = self.__loop
+        if loop is None or self.__thread == threading.get_ident():
+            transport.sendto(data, target)
+        else:
+            # called from another thread
+            loop.call_soon_threadsafe(transport.sendto, data, target)
+        return len(data)
@@ -42,6 +42,7 @@ from .mutable import MutableData
 from .integer import IntData, UInt8Data, UInt16Data, UInt32Data, VarIntData
 
 from .convert import Convert
+from .pool import BufferPool, retain_buffer, release_buffer
 
 
 name = "BA"
@@ -55,4 +56,5 @@ __all__ = [
     'Data', 'MutableData',
     'IntData', 'UInt8Data', 'UInt16Data', 'UInt32Data', 'VarIntData',
     'Convert',
+    'BufferPool', 'retain_buffer', 'release_buffer',
 ]
@@ -135,10 +135,11 @@ class Data(ByteArray):
     def get_bytes(self, start: int = 0, end: int = None) -> bytes:
         start, end = adjust_positions(size=self._size, start=start, end=end)
         sub = get_slice(data=self, start=start, end=end)
-        if isinstance(sub, bytearray):
-            return bytes(sub)
-        else:
+        if isinstance(sub, bytes):
             return sub
+        else:
+            # bytearray, memoryview
+            return bytes(sub)
 
     # Override
     def slice(self, start: int, end: int = None) -> ByteArray:
@@ -166,6 +167,8 @@ class Data(ByteArray):
 
     def mutable_copy(self) -> MutableByteArray:
         data = get_slice(data=self, start=0, end=self._size)
+        if isinstance(data, memoryview):
+            data = bytearray(data)
         from .mutable import MutableData
         return MutableData(buffer=data)
 
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+#
+#   BA: Byte Array
+#
+#                                Written in 2020 by Moky <albert.moky@gmail.com>
+#
+# ==============================================================================
+# MIT License
+#
+# Copyright (c) 2020 Albert Moky
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ==============================================================================
+
+import weakref
+from collections import deque
+from typing import Optional, List, Deque
+
+
+class BufferPool:
+    """
+        Buffer Pool
+        ~~~~~~~~~~~
+
+        Ring of preallocated buffers for 'recv_into()',
+        received data will be exposed as memoryview slices without copying.
+
+        Each buffer acquired is leased with a reference count,
+        it goes back to the ring when all the holders released it
+        (the hub after dispatching, and the arrival ship built on it).
+    """
+
+    def __init__(self, count: int = 64, capacity: int = 1472):
+        super().__init__()
+        assert count > 0 and capacity > 0, 'pool size error: %d x %d' % (count, capacity)
+        self.__buffers: List[PooledBuffer] = [PooledBuffer(capacity, pool=self, index=i) for i in range(count)]
+        self.__free: Deque[int] = deque(range(count))
+        self.__capacity = capacity
+        # count of buffers temporarily allocated for the ring is exhausted
+        self.__missed = 0
+
+    @property
+    def capacity(self) -> int:
+        """ size of each buffer """
+        return self.__capacity
+
+    @property
+    def count(self) -> int:
+        """ count of preallocated buffers """
+        return len(self.__buffers)
+
+    @property
+    def missed(self) -> int:
+        return self.__missed
+
+    @property
+    def vacancy(self) -> int:
+        """ count of buffers ready for reusing """
+        return len(self.__free)
+
+    def acquire(self) -> memoryview:
+        """
+        Get a view of the next free buffer in the ring,
+        or of a new buffer when all buffers are still in use
+
+        :return: writable view of the whole buffer
+        """
+        try:
+            index = self.__free.popleft()
+        except IndexError:
+            # all buffers are busy
+            self.__missed += 1
+            return memoryview(bytearray(self.__capacity))
+        buffer = self.__buffers[index]
+        if is_exported(buffer=buffer):
+            # some view is still kept after the buffer released,
+            # leave it to the holders, and replace it with a new one
+            buffer = PooledBuffer(self.__capacity, pool=self, index=index)
+            self.__buffers[index] = buffer
+        buffer.refs = 1
+        return memoryview(buffer)
+
+    def recycle(self, buffer):
+        """ Put the released buffer back to the ring """
+        index = buffer.index
+        if self.__buffers[index] is buffer:
+            self.__free.append(index)
+
+
+class PooledBuffer(bytearray):
+    """ Buffer in the pool, with reference count of the lease """
+
+    def __init__(self, capacity: int, pool: BufferPool, index: int):
+        super().__init__(capacity)
+        self.__pool = weakref.ref(pool)
+        self.index = index
+        self.refs = 0
+
+    @property
+    def pool(self) -> Optional[BufferPool]:
+        return self.__pool()
+
+
+def pooled_buffer(data) -> Optional[PooledBuffer]:
+    """ Get the pooled buffer which the view belongs to """
+    if isinstance(data, memoryview):
+        data = data.obj
+    if isinstance(data, PooledBuffer):
+        return data
+
+
+def retain_buffer(data) -> bool:
+    """ Hold the pooled buffer of the view, return False if not pooled """
+    buffer = pooled_buffer(data=data)
+    if buffer is None or buffer.refs <= 0:
+        return False
+    buffer.refs += 1
+    return True
+
+
+def release_buffer(data) -> bool:
+    """ Release the pooled buffer of the view, return False if not pooled """
+    buffer = pooled_buffer(data=data)
+    if buffer is None or buffer.refs <= 0:
+        return False
+    buffer.refs -= 1
+    if buffer.refs == 0:
+        pool = buffer.pool
+        if pool is not None:
+            pool.recycle(buffer=buffer)
+    return True
+
+
+def is_exported(buffer: bytearray) -> bool:
+    """ Check whether any view of the buffer is alive """
+    try:
+        buffer.append(0)
+    except BufferError:
+        # Existing exports of data: object cannot be re-sized
+        return True
+    buffer.pop()
+    return False
@@ -30,7 +30,8 @@
 
 import binascii
 import random
-from typing import Union, Tuple
+import struct
+from typing import Optional, Union, Tuple
 
 from .array import Endian
 
@@ -94,13 +95,15 @@ def array_copy(src: Union[bytes, bytearray], src_pos: int, dest: bytearray, dest
         #          src:  ........********
         #          dest: ########........
         #
+        # slicing the source makes a temporary copy,
+        # so all the intersected cases are safe
+    if length > 0:
         src_end = src_pos + length
-        if src_pos < dest_pos < src_end:
-            # copy to a temporary buffer
-            src = src[src_pos:src_end]
-            src_pos = 0
-    for i in range(length):
-        dest[dest_pos+i] = src[src_pos+i]
+        dest_end = dest_pos + length
+        if src_end > len(src) or dest_end > len(dest):
+            raise IndexError('out of range: src=[%d, %d) len=%d, dest=[%d, %d) len=%d'
+                             % (src_pos, src_end, len(src), dest_pos, dest_end, len(dest)))
+        dest[dest_pos:dest_end] = src[src_pos:src_end]
     return True
 
 
@@ -114,16 +117,8 @@ def array_equal(left_buffer: Union[bytes, bytearray], left_offset: int, left_siz
         if left_offset == right_offset and left_size == right_size:
             # same range
             return True
-    pos1 = left_offset + left_size - 1
-    pos2 = right_offset + right_size - 1
-    while pos2 >= right_offset:
-        if left_buffer[pos1] != right_buffer[pos2]:
-            # not matched
-            return False
-        pos1 -= 1
-        pos2 -= 1
-    # all items matched
-    return True
+    # compare the slices by memcmp()
+    return left_buffer[left_offset:left_offset + left_size] == right_buffer[right_offset:right_offset + right_size]
 
 
 def array_hash(buffer: Union[bytes, bytearray], offset: int, size: int) -> int:
@@ -159,6 +154,10 @@ def array_concat(left_buffer: Union[bytes, bytearray],
     if 0 < right_offset or right_end < len(right_buffer):
         right_buffer = right_buffer[right_offset:right_end]
     # check types
+    if isinstance(left_buffer, memoryview):
+        left_buffer = left_buffer.tobytes()
+    if isinstance(right_buffer, memoryview):
+        right_buffer = right_buffer.tobytes()
     if isinstance(left_buffer, bytearray):
         if not isinstance(right_buffer, bytearray):
             # bytearray + bytes
@@ -200,6 +199,12 @@ def array_find(sub_buffer: Union[bytes, bytearray], sub_offset: int, sub_size: i
     else:
         sub = sub_buffer
     # do searching
+    if isinstance(buffer, memoryview):
+        # memoryview cannot be searched directly
+        buffer = buffer[start:end].tobytes()
+        offset -= start
+        start = 0
+        end = len(buffer)
     pos = buffer.find(sub, start, end)
     if pos == -1:
         return found
@@ -219,8 +224,7 @@ def array_set(index: int, value: int, buffer: bytearray, offset: int, size: int)
     buffer[pos] = value & 0xFF
     # clean the gaps if exist?
     if tail < pos:
-        for i in range(tail, pos):
-            buffer[i] = 0
+        buffer[tail:pos] = bytes(pos - tail)
     # return the maximum size
     if index < size:
         return size
@@ -266,19 +270,16 @@ def array_update(index: int, src: Union[bytes, bytearray], src_offset: int, src_
     elif buf_len < end:
         # the target range is partially outside of the current buffer
         mid = buf_len - start
-        for i in range(mid):
-            # copy the left part
-            buffer[start+i] = src[i]
+        # copy the left part
+        buffer[start:buf_len] = src[:mid]
         # append the right part to tail
         buffer.extend(src[mid:])
     else:
         # the target range is totally inside the current buffer
-        for i in range(src_size):
-            buffer[start+i] = src[i]
+        buffer[start:end] = src
     # clean the gaps if exist?
     if tail < start:
-        for i in range(tail, start):
-            buffer[i] = 0
+        buffer[tail:start] = bytes(start - tail)
     # return the new size
     if tail < end:
         return end - offset
@@ -291,8 +292,7 @@ def array_insert(index: int, src: Union[bytes, bytearray], src_offset: int, src_
     """ Insert src at index, return new size """
     if index < size:
         start = offset + index
-        for i in range(src_size):
-            buffer.insert(start+i, src[src_offset+i])
+        buffer[start:start] = src[src_offset:src_offset + src_size]
         return size + src_size
     else:
         return array_update(index=index,
@@ -319,6 +319,24 @@ def array_remove(index: int, buffer: bytearray, offset: int, size: int) -> Tuple
 #  Converting
 #
 
+# precompiled codecs for the common integer sizes, indexed by size
+_LITTLE_CODECS = [None, struct.Struct('<B'), struct.Struct('<H'), None, struct.Struct('<I'),
+                  None, None, None, struct.Struct('<Q')]
+_BIG_CODECS = [None, struct.Struct('>B'), struct.Struct('>H'), None, struct.Struct('>I'),
+               None, None, None, struct.Struct('>Q')]
+_INT_MASKS = [0, 0xFF, 0xFFFF, 0, 0xFFFFFFFF, 0, 0, 0, 0xFFFFFFFFFFFFFFFF]
+
+_LITTLE_ENDIAN = Endian.LITTLE_ENDIAN
+_BIG_ENDIAN = Endian.BIG_ENDIAN
+
+
+def _byte_order(endian: Endian) -> Optional[str]:
+    if endian == _BIG_ENDIAN:
+        return 'big'
+    elif endian == _LITTLE_ENDIAN:
+        return 'little'
+
+
 def int_from_buffer(buffer: Union[bytes, bytearray], offset: int, size: int, endian: Endian) -> int:
     """
     Get integer value from data buffer with range [offset, offset + size)
@@ -329,21 +347,28 @@ def int_from_buffer(buffer: Union[bytes, bytearray], offset: int, size: int, end
     :param endian  byte order
     :return: int value
     """
-    value = 0
-    if endian == Endian.LITTLE_ENDIAN:
-        # [12 34 56 78] => 0x78563412
-        pos = offset + size - 1
-        while pos >= offset:
-            value = (value << 8) | (buffer[pos] & 0xFF)
-            pos -= 1
-    elif endian == Endian.BIG_ENDIAN:
-        # [12 34 56 78] => 0x12345678
-        pos = offset
-        end = offset + size
-        while pos < end:
-            value = (value << 8) | (buffer[pos] & 0xFF)
-            pos += 1
-    return value
+    if size <= 0 or size > 8:
+        codec = None
+    elif endian is _BIG_ENDIAN:
+        codec = _BIG_CODECS[size]
+    elif endian is _LITTLE_ENDIAN:
+        codec = _LITTLE_CODECS[size]
+    else:
+        codec = None
+    if codec is not None:
+        # [12 34 56 78] => 0x78563412 (little endian)
+        # [12 34 56 78] => 0x12345678 (big endian)
+        try:
+            return codec.unpack_from(buffer, offset)[0]
+        except struct.error:
+            raise IndexError('out of range: [%d, %d), len=%d' % (offset, offset + size, len(buffer)))
+    byte_order = _byte_order(endian=endian)
+    if byte_order is None or size <= 0:
+        return 0
+    end = offset + size
+    if end > len(buffer):
+        raise IndexError('out of range: [%d, %d), len=%d' % (offset, end, len(buffer)))
+    return int.from_bytes(buffer[offset:end], byte_order)
 
 
 def int_to_buffer(value: int, buffer: bytearray, offset: int, size: int, endian: Endian):
@@ -356,21 +381,31 @@ def int_to_buffer(value: int, buffer: bytearray, offset: int, size: int, endian:
     :param size:   data view size
     :param endian  byte order
     """
-    if endian == Endian.LITTLE_ENDIAN:
-        # 0x12345678 => [78 56 34 12]
-        pos = offset
-        end = offset + size
-        while pos < end:
-            buffer[pos] = value & 0xFF
-            value >>= 8
-            pos += 1
-    elif endian == Endian.BIG_ENDIAN:
-        # 0x12345678 => [12 34 56 78]
-        pos = offset + size - 1
-        while pos >= offset:
-            buffer[pos] = value & 0xFF
-            value >>= 8
-            pos -= 1
+    if size <= 0 or size > 8:
+        codec = None
+    elif endian is _BIG_ENDIAN:
+        codec = _BIG_CODECS[size]
+    elif endian is _LITTLE_ENDIAN:
+        codec = _LITTLE_CODECS[size]
+    else:
+        codec = None
+    if codec is not None:
+        # 0x12345678 => [78 56 34 12] (little endian)
+        # 0x12345678 => [12 34 56 78] (big endian)
+        try:
+            codec.pack_into(buffer, offset, value & _INT_MASKS[size])
+            return
+        except struct.error:
+            raise IndexError('out of range: [%d, %d), len=%d' % (offset, offset + size, len(buffer)))
+    byte_order = _byte_order(endian=endian)
+    if byte_order is None or size <= 0:
+        return
+    end = offset + size
+    if end > len(buffer):
+        raise IndexError('out of range: [%d, %d), len=%d' % (offset, end, len(buffer)))
+    # keep the lowest bytes only
+    value &= (1 << (size << 3)) - 1
+    buffer[offset:end] = value.to_bytes(size, byte_order)
 
 
 """
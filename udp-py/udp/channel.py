@@ -28,16 +28,19 @@
 # SOFTWARE.
 # ==============================================================================
 
+import asyncio
 import socket
 import weakref
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List
 
+from startrek.utils import Log
 from startrek import SocketAddress
 from startrek import SocketReader, SocketWriter
 from startrek import SocketHelper
 from startrek import BaseChannel
 
-from .aio import DatagramHelper
+from .ba import BufferPool
+from .aio import DatagramHelper, DatagramProtocol
 
 
 class ChannelChecker:
@@ -129,15 +132,28 @@ class Controller:
         if isinstance(channel, BaseChannel):
             return channel.sock
 
+    def _is_available(self, sock: socket.socket) -> bool:
+        """ Check reading buffer, via the readiness cached in channel if possible """
+        channel = self.channel
+        if isinstance(channel, BaseChannel):
+            return channel.available
+        return self.socket_helper.is_available(sock=sock)
+
 
 class PacketChannelReader(Controller, SocketReader):
     """ Datagram Packet Channel Reader """
 
+    @property
+    def buffer_pool(self) -> Optional[BufferPool]:
+        channel = self.channel
+        if isinstance(channel, PacketChannel):
+            return channel.buffer_pool
+
     async def _socket_receive(self, sock: socket.socket, max_len: int) -> Optional[bytes]:
         helper = self.socket_helper
         if helper.is_closed(sock=sock):
             raise ConnectionError('socket closed')
-        elif not helper.is_available(sock=sock):
+        elif not self._is_available(sock=sock):
             # TODO: check 'broken pipe'
             return None
         # elif helper.is_blocking(sock=sock):
@@ -150,7 +166,7 @@ class PacketChannelReader(Controller, SocketReader):
         helper = self.socket_helper
         if helper.is_closed(sock=sock):
             raise ConnectionError('socket closed')
-        elif not helper.is_available(sock=sock):
+        elif not self._is_available(sock=sock):
             # TODO: check 'broken pipe'
             return None, None
         else:
@@ -222,6 +238,40 @@ class PacketChannelReader(Controller, SocketReader):
             # connected (TCP/UDP)
             return await self.read(max_len=max_len), remote
 
+    async def receive_batch(self, max_len: int, max_count: int) -> List[Tuple[bytes, SocketAddress]]:
+        """ Receive datagrams as many as possible, at most 'max_count' """
+        sock = self.sock
+        if sock is None:
+            raise ConnectionError('channel not ready')
+        helper = self.socket_helper
+        if helper.is_closed(sock=sock):
+            raise ConnectionError('socket closed')
+        elif not self._is_available(sock=sock):
+            return []
+        try:
+            packets = await helper.receive_batch(sock=sock, max_len=max_len, max_count=max_count,
+                                                 pool=self.buffer_pool)  # raise OSError
+        except OSError as error:
+            error = await ChannelChecker.check_error(error=error, sock=sock)
+            if error is None:
+                # received nothing
+                return []
+            else:
+                # connection lost?
+                raise error
+        if len(packets[0][0]) == 0:
+            error = await ChannelChecker.check_data(data=None, sock=sock)
+            if error is not None:
+                # connection lost!
+                raise error
+        remote = self.remote_address
+        if remote is None:
+            # not connect (UDP)
+            return packets
+        else:
+            # connected (UDP)
+            return [(data, remote) for data, _ in packets]
+
 
 class PacketChannelWriter(Controller, SocketWriter):
     """ Datagram Packet Channel Writer """
@@ -323,10 +373,51 @@ class PacketChannelWriter(Controller, SocketWriter):
             # return sock.send(data)
             return await self._try_write(data=data, sock=self.sock)  # raise OSError
 
+    async def send_batch(self, packets: List[Tuple[bytes, Optional[SocketAddress]]]) -> int:
+        """ Send datagrams in one batch, return count of datagrams sent """
+        sock = self.sock
+        if sock is None:
+            raise ConnectionError('channel not ready')
+        helper = self.socket_helper
+        if helper.is_closed(sock=sock):
+            raise ConnectionError('socket closed')
+        remote = self.remote_address
+        if remote is not None:
+            # connected (UDP)
+            packets = [(data, None) for data, _ in packets]
+        try:
+            return await helper.send_batch(sock=sock, packets=packets)  # raise OSError
+        except OSError as error:
+            error = await ChannelChecker.check_error(error=error, sock=sock)
+            if error is None:
+                # buffer overflow!
+                return 0
+            else:
+                # connection lost?
+                raise error
+
 
 class PacketChannel(BaseChannel):
     """ Datagram Packet Channel """
 
+    def __init__(self, remote: Optional[SocketAddress], local: Optional[SocketAddress]):
+        super().__init__(remote=remote, local=local)
+        self.__pool = self._create_buffer_pool()
+
+    # noinspection PyMethodMayBeStatic
+    def _create_buffer_pool(self) -> Optional[BufferPool]:
+        """
+        Override to return a BufferPool for receiving in batch with 'recv_into()',
+        then the received data will be memoryview slices of the pooled buffers
+        instead of new bytes objects, and the hub will release them after
+        processed (see 'release_buffer()'); default is None.
+        """
+        return None
+
+    @property  # protected
+    def buffer_pool(self) -> Optional[BufferPool]:
+        return self.__pool
+
     # Override
     def _create_reader(self) -> SocketReader:
         return PacketChannelReader(channel=self)
@@ -353,3 +444,218 @@ class PacketChannel(BaseChannel):
                 return old
         # OK, replace the inner socket
         return await super().set_socket(sock=sock)
+
+    async def receive_batch(self, max_len: int, max_count: int) -> List[Tuple[bytes, SocketAddress]]:
+        """
+        Receive datagrams as many as possible
+
+        :param max_len:   max length of each datagram
+        :param max_count: max count of datagrams
+        :return: received datagrams with remote addresses
+        """
+        try:
+            packets = await self.reader.receive_batch(max_len=max_len, max_count=max_count)
+        except OSError as error:
+            # socket error, the cached states are not trusted now
+            self._clear_state()
+            await self.close()
+            raise error
+        self._consume_readiness()
+        return packets
+
+    async def send_batch(self, packets: List[Tuple[bytes, Optional[SocketAddress]]]) -> int:
+        """
+        Send datagrams in one batch
+
+        :param packets: outgo datagrams with target addresses
+        :return: count of datagrams sent, the rest ones should be sent later
+        """
+        try:
+            count = await self.writer.send_batch(packets=packets)
+        except OSError as error:
+            # socket error, the cached states are not trusted now
+            self._clear_state()
+            await self.close()
+            raise error
+        if count < len(packets):
+            # buffer overflow
+            self.update_readiness(writable=False)
+        return count
+
+
+"""
+    Datagram Channel
+    ~~~~~~~~~~~~~~~~
+
+    Packet channel backed by the asyncio datagram transport
+"""
+
+
+class DatagramController(Controller):
+    """ Datagram Channel Controller """
+
+    async def _get_protocol(self) -> DatagramProtocol:
+        channel = self.channel
+        if not isinstance(channel, DatagramChannel):
+            raise ConnectionError('channel not ready')
+        protocol = await channel.get_protocol()
+        if protocol is None:
+            raise ConnectionError('channel not ready')
+        return protocol
+
+
+class DatagramChannelReader(DatagramController, SocketReader):
+    """ Reading datagrams queued by the protocol """
+
+    # Override
+    async def read(self, max_len: int) -> Optional[bytes]:
+        data, _ = await self.receive(max_len=max_len)
+        return data
+
+    # Override
+    async def receive(self, max_len: int) -> Tuple[Optional[bytes], Optional[SocketAddress]]:
+        protocol = await self._get_protocol()
+        data, remote = protocol.receive()  # raise OSError
+        if data is None:
+            # received nothing
+            return None, None
+        elif len(data) > max_len:
+            # same as 'recvfrom()', the rest of datagram will be discarded
+            data = data[:max_len]
+        connected = self.remote_address
+        if connected is None:
+            # not connect (UDP)
+            return data, remote
+        else:
+            # connected (UDP)
+            return data, connected
+
+    async def receive_batch(self, max_len: int, max_count: int) -> List[Tuple[bytes, SocketAddress]]:
+        protocol = await self._get_protocol()
+        packets = protocol.receive_batch(max_count=max_count)  # raise OSError
+        connected = self.remote_address
+        if connected is None:
+            # not connect (UDP)
+            return [(data[:max_len], remote) for data, remote in packets]
+        else:
+            # connected (UDP)
+            return [(data[:max_len], connected) for data, _ in packets]
+
+
+class DatagramChannelWriter(DatagramController, SocketWriter):
+    """ Sending datagrams via the transport """
+
+    # Override
+    async def write(self, data: bytes) -> int:
+        protocol = await self._get_protocol()
+        return protocol.send_to(data=data, target=None)  # raise OSError
+
+    # Override
+    async def send(self, data: bytes, target: SocketAddress) -> int:
+        protocol = await self._get_protocol()
+        remote = self.remote_address
+        if remote is None:
+            # not connect (UDP)
+            assert target is not None, 'target missed for unbound channel'
+            return protocol.send_to(data=data, target=target)  # raise OSError
+        else:
+            # connected (UDP)
+            assert target is None or target == remote, 'target error: %s, remote=%s' % (target, remote)
+            return protocol.send_to(data=data, target=None)  # raise OSError
+
+    async def send_batch(self, packets: List[Tuple[bytes, Optional[SocketAddress]]]) -> int:
+        protocol = await self._get_protocol()
+        connected = self.remote_address is not None
+        count = 0
+        for data, target in packets:
+            if connected:
+                target = None
+            try:
+                if protocol.send_to(data=data, target=target) <= 0:  # raise OSError
+                    # buffer overflow
+                    break
+            except OSError as error:
+                if count == 0:
+                    raise error
+                # sent some, the rest ones will be sent in next time
+                Log.warning('[UDP] only %d/%d datagram(s) sent: %s', count, len(packets), error)
+                break
+            count += 1
+        return count
+
+
+class DatagramChannel(PacketChannel):
+    """
+        Datagram Channel
+        ~~~~~~~~~~~~~~~~
+
+        The inner socket will be attached to an asyncio datagram transport
+        on the event loop which first reading/writing the channel, and
+        the received datagrams will be queued by the protocol callbacks,
+        so no thread pool is needed for each packet.
+
+        Because the transport drains the socket itself, this channel should
+        be polled by the hub, not watched by a ChannelSelector.
+    """
+
+    def __init__(self, remote: Optional[SocketAddress], local: Optional[SocketAddress]):
+        super().__init__(remote=remote, local=local)
+        self.__protocol: Optional[DatagramProtocol] = None
+
+    @property  # Override
+    def selectable(self) -> bool:
+        # the transport drains the inner socket itself
+        return False
+
+    # Override
+    def _create_reader(self) -> SocketReader:
+        return DatagramChannelReader(channel=self)
+
+    # Override
+    def _create_writer(self) -> SocketWriter:
+        return DatagramChannelWriter(channel=self)
+
+    # noinspection PyMethodMayBeStatic
+    def _create_protocol(self) -> DatagramProtocol:
+        """ Override for user-customized protocol """
+        return DatagramProtocol()
+
+    async def get_protocol(self) -> Optional[DatagramProtocol]:
+        """ Get protocol for the inner socket, create the transport if not exists """
+        protocol = self.__protocol
+        if protocol is not None and not protocol.closed:
+            return protocol
+        sock = self.sock
+        if sock is None or self.socket_helper.is_closed(sock=sock):
+            return None
+        loop = asyncio.get_event_loop()
+        _, protocol = await loop.create_datagram_endpoint(self._create_protocol, sock=sock)
+        self.__protocol = protocol
+        return protocol
+
+    # Override
+    async def set_socket(self, sock: Optional[socket.socket]) -> Optional[socket.socket]:
+        if self.sock is not sock:
+            # socket replaced, close the transport before the old socket closed,
+            # so the event loop stops watching it first
+            protocol = self.__protocol
+            if protocol is not None:
+                self.__protocol = None
+                protocol.close()
+        return await super().set_socket(sock=sock)
+
+    @property  # Override
+    def available(self) -> bool:
+        protocol = self.__protocol
+        if protocol is None:
+            # transport not created yet, check the inner socket
+            return super().available
+        return protocol.available
+
+    @property  # Override
+    def vacant(self) -> bool:
+        protocol = self.__protocol
+        if protocol is None:
+            # transport not created yet, check the inner socket
+            return super().vacant
+        return not (protocol.closed or protocol.paused)
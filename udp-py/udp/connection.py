@@ -28,12 +28,15 @@
 # SOFTWARE.
 # ==============================================================================
 
-from typing import Optional
+import time
+from typing import Optional, List
 
 from startrek import SocketAddress
 from startrek import Channel
 from startrek import BaseConnection
 
+from .channel import PacketChannel
+
 
 class PacketConnection(BaseConnection):
 
@@ -54,3 +57,54 @@ class PacketConnection(BaseConnection):
             self.__closed = True
         # replace old channel
         return await super()._set_channel(channel=channel)
+
+    async def _send_batch(self, fragments: List[bytes], target: Optional[SocketAddress]) -> int:
+        channel = self.channel
+        if channel is None or not channel.alive:
+            # raise OSError('socket channel lost: %s' % channel)
+            return -1
+        elif target is None:
+            # assert False, 'target address empty'
+            return -1
+        elif isinstance(channel, PacketChannel):
+            count = await channel.send_batch(packets=[(data, target) for data in fragments])
+        else:
+            # channel not support sending batch
+            count = 0
+            for data in fragments:
+                if await channel.send(data=data, target=target) < len(data):
+                    break
+                count += 1
+        if count > 0:
+            # update sent time
+            self._update_sent_time(now=time.time())
+        return count
+
+    async def send_batch(self, fragments: List[bytes]) -> int:
+        """
+        Send datagrams in one batch
+
+        :param fragments: outgo datagrams
+        :return: count of datagrams sent, the rest ones should be sent later
+        """
+        # try to send data
+        error = None
+        count = -1
+        try:
+            count = await self._send_batch(fragments=fragments, target=self.remote_address)
+            if count < 0:  # == -1:
+                raise OSError('failed to send: %d datagram(s) to %s' % (len(fragments), self.remote_address))
+        except OSError as e:
+            error = e
+            # socket error, close current channel
+            await self._set_channel(channel=None)
+        # callback
+        delegate = self.delegate
+        if delegate is not None:
+            if error is None:
+                for index in range(count):
+                    data = fragments[index]
+                    await delegate.connection_sent(sent=len(data), data=data, connection=self)
+            else:
+                await delegate.connection_failed(error=error, data=fragments[0], connection=self)
+        return count
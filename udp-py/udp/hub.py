@@ -30,20 +30,26 @@
 
 import socket
 from abc import ABC
-from typing import Optional, Iterable, Tuple
+from typing import Optional, Iterable, Tuple, List, Dict
 
 from startrek import SocketAddress, AddressPairMap
-from startrek import Channel, BaseChannel
+from startrek import Channel, ChannelStatus, BaseChannel
 from startrek import Connection, ConnectionDelegate
 from startrek import ActiveConnection
-from startrek import BaseHub
+from startrek import ChannelSelector, BaseHub
 
+from .ba import release_buffer
 from .channel import PacketChannel
 from .connection import PacketConnection
 
 
 class ChannelPool(AddressPairMap[Channel]):
 
+    def __init__(self):
+        super().__init__()
+        # channels not connected (e.g.: the master channel), in binding order
+        self.__unconnected: Dict[Tuple[SocketAddress, SocketAddress], Channel] = {}
+
     # Override
     def get(self, remote: Optional[SocketAddress], local: Optional[SocketAddress]) -> Optional[Channel]:
         assert not (remote is None and local is None), 'both addresses are empty'
@@ -79,10 +85,8 @@ class ChannelPool(AddressPairMap[Channel]):
         #     (remote, null)
         #         try to get a channel that bound to any local address, but
         #         not connected yet;
-        array = self.items
-        for item in array:
-            if item.remote_address is None:
-                return item
+        for item in self.__unconnected.values():
+            return item
         # not found
 
     # Override
@@ -94,8 +98,20 @@ class ChannelPool(AddressPairMap[Channel]):
         #     Runner.async_task(coro=cached.close())
         old = super().set(item=item, remote=remote, local=local)
         assert old is None, 'should not happen: %s' % old
+        # update index for channels not connected
+        keys = self._keys(remote=remote, local=local)
+        if item is not None and item.remote_address is None:
+            self.__unconnected[keys] = item
+        else:
+            self.__unconnected.pop(keys, None)
         return cached
 
+    # Override
+    def remove(self, item: Optional[Channel],
+               remote: Optional[SocketAddress], local: Optional[SocketAddress]) -> Optional[Channel]:
+        self.__unconnected.pop(self._keys(remote=remote, local=local), None)
+        return super().remove(item=item, remote=remote, local=local)
+
     # # Override
     # def remove(self, item: Optional[Channel],
     #            remote: Optional[SocketAddress], local: Optional[SocketAddress]) -> Optional[Channel]:
@@ -111,6 +127,9 @@ class ChannelPool(AddressPairMap[Channel]):
 class PacketHub(BaseHub, ABC):
     """ Base Datagram Hub """
 
+    # max datagrams received from one channel for each driving
+    BATCH_SIZE = 64
+
     def __init__(self, delegate: ConnectionDelegate):
         super().__init__(delegate=delegate)
         self.__channel_pool = self._create_channel_pool()
@@ -119,9 +138,15 @@ class PacketHub(BaseHub, ABC):
     def _create_channel_pool(self):
         return ChannelPool()
 
+    # Override
+    def _create_selector(self) -> Optional[ChannelSelector]:
+        # drive the ready channels only
+        return ChannelSelector()
+
     def bind(self, address: SocketAddress = None,
-             host: str = None, port: int = 0) -> Tuple[Channel, Optional[socket.socket]]:
-        """ Bind to local address (host:port) """
+             host: str = None, port: int = 0,
+             reuse_port: bool = False) -> Tuple[Channel, Optional[socket.socket]]:
+        """ Bind to local address (host:port), reuse port for multi processes """
         if address is None:
             assert host is not None and port > 0, 'address error: (%s:%d)' % (host, port)
             address = (host, port)
@@ -132,7 +157,9 @@ class PacketHub(BaseHub, ABC):
             sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             # sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
             sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            # sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            if reuse_port:
+                # shared with the other worker processes (sharded gates)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
             sock.setblocking(True)
             sock.bind(address)
             sock.setblocking(False)
@@ -146,6 +173,60 @@ class PacketHub(BaseHub, ABC):
         # OK
         return channel, sock
 
+    #
+    #   Process
+    #
+
+    # Override
+    async def _drive_channel(self, channel: Channel) -> bool:
+        if not isinstance(channel, PacketChannel):
+            return await super()._drive_channel(channel=channel)
+        cs = channel.status
+        if cs == ChannelStatus.INIT:
+            # preparing
+            return False
+        elif cs == ChannelStatus.CLOSED:
+            # finished
+            return False
+        # cs == opened
+        # cs == alive
+        try:
+            # try to receive a batch of datagrams
+            packets = await channel.receive_batch(max_len=self.MSS, max_count=self.BATCH_SIZE)
+        except OSError as error:
+            await self._channel_error(error=error, channel=channel)
+            return False
+        if len(packets) == 0:
+            # received nothing
+            return False
+        try:
+            return await self._dispatch_packets(packets=packets, channel=channel)
+        finally:
+            for data, _ in packets:
+                # recycle the pooled buffer, unless the arrival ship keeps it
+                release_buffer(data)
+
+    async def _dispatch_packets(self, packets: List[Tuple[bytes, SocketAddress]], channel: Channel) -> bool:
+        # group datagrams by remote address, keep the order for each remote
+        groups: Dict[SocketAddress, List[bytes]] = {}
+        for data, remote in packets:
+            if remote is None or data is None or len(data) == 0:
+                continue
+            array = groups.get(remote)
+            if array is None:
+                groups[remote] = [data]
+            else:
+                array.append(data)
+        # get connection for processing received data
+        local = channel.local_address
+        for remote, array in groups.items():
+            conn = await self.connect(remote=remote, local=local)
+            if conn is None:
+                continue
+            for data in array:
+                await conn.received_data(data=data)
+        return len(groups) > 0
+
     #
     #   Channel
     #
@@ -164,7 +245,11 @@ class PacketHub(BaseHub, ABC):
     def _remove_channel(self, channel: Optional[Channel],
                         remote: Optional[SocketAddress], local: Optional[SocketAddress]) -> Optional[Channel]:
         """ remove cached channel """
-        return self.__channel_pool.remove(item=channel, remote=remote, local=local)
+        cached = self.__channel_pool.remove(item=channel, remote=remote, local=local)
+        self._unwatch_channel(channel=channel)
+        if cached is not None and cached is not channel:
+            self._unwatch_channel(channel=cached)
+        return cached
 
     def _get_channel(self, remote: Optional[SocketAddress], local: Optional[SocketAddress]) -> Optional[Channel]:
         """ get cached channel """
@@ -173,7 +258,11 @@ class PacketHub(BaseHub, ABC):
     def _set_channel(self, channel: Channel,
                      remote: Optional[SocketAddress], local: Optional[SocketAddress]) -> Optional[Channel]:
         """ cache channel """
-        return self.__channel_pool.set(item=channel, remote=remote, local=local)
+        cached = self.__channel_pool.set(item=channel, remote=remote, local=local)
+        if cached is not None and cached is not channel:
+            self._unwatch_channel(channel=cached)
+        self._watch_channel(channel=channel)
+        return cached
 
 
 class ServerHub(PacketHub):
@@ -35,9 +35,10 @@
     Data format in UDP payload
 """
 
-from typing import Optional, Union
+import struct
+from typing import Optional, Union, List, Dict
 
-from ..ba import ByteArray, Data, Convert, MutableData
+from ..ba import ByteArray, Data, MutableData
 
 from .protocol import DataType, TransactionID
 
@@ -145,6 +146,10 @@ class Header(Data):
     def is_fragment(self) -> bool:
         return self.__type.is_fragment
 
+    @property
+    def is_deflated(self) -> bool:
+        return self.__type.is_deflated
+
     @property
     def is_command(self) -> bool:
         return self.__type.is_command
@@ -189,13 +194,22 @@ class Header(Data):
         if data_type is None:
             # not a DIM package?
             return None
-        head_len = get_header_length(data=data)
+        buffer = data.buffer
+        offset = data.offset
+        # header length shared the byte with data type
+        head_len = (buffer[offset+3] & 0xF0) >> 2  # in bytes
+        layout = _LAYOUTS.get(head_len)
+        if layout is None:
+            # raise ValueError('header length error: %d' % head_len)
+            return None
         if data.size < head_len:
             # waiting for more data
             return None
         pages = 1
         index = 0
         body_len = -1
+        # decode all fields in one call
+        fields = layout.unpack_from(buffer, offset)
         if head_len == 4:
             """ simple header (for UDP only)
                 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
@@ -212,7 +226,7 @@ class Header(Data):
                 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
             """
             sn = TransactionID.ZERO
-            body_len = Convert.int32_from_data(data=data, start=4)
+            body_len = fields[2]
         elif head_len == 12:
             """ command/message header without body length (for UDP only)
                 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
@@ -223,7 +237,7 @@ class Header(Data):
                                      Transaction ID (64 bits)                   |
                 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
             """
-            sn = TransactionID.from_data(data=data.slice(start=4, end=12))
+            sn = TransactionID(data=fields[2])
         elif head_len == 16:
             """ command/message header with body length
                 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
@@ -237,8 +251,8 @@ class Header(Data):
                 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
 
             """
-            sn = TransactionID.from_data(data=data.slice(start=4, end=12))
-            body_len = Convert.int32_from_data(data=data, start=12)
+            sn = TransactionID(data=fields[2])
+            body_len = fields[3]
         elif head_len == 20:
             """ fragment header without body length (for UDP only)
                 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
@@ -253,10 +267,10 @@ class Header(Data):
                 |               Fragment Index (32 bits) OPTIONAL               |
                 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
             """
-            sn = TransactionID.from_data(data=data.slice(start=4, end=12))
-            pages = Convert.int32_from_data(data=data, start=12)
-            index = Convert.int32_from_data(data=data, start=16)
-        elif head_len == 24:
+            sn = TransactionID(data=fields[2])
+            pages = fields[3]
+            index = fields[4]
+        else:
             """ fragment header with body length
                 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
                 |      'D'      |      'I'      |      'M'      | H-Len |  Type |
@@ -272,14 +286,11 @@ class Header(Data):
                 |                 Body Length (32 bits) OPTIONAL                |
                 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
             """
-            sn = TransactionID.from_data(data=data.slice(start=4, end=12))
-            pages = Convert.int32_from_data(data=data, start=12)
-            index = Convert.int32_from_data(data=data, start=16)
-            body_len = Convert.int32_from_data(data=data, start=20)
-        else:
-            # raise ValueError('header length error: %d' % head_len)
-            return None
-        assert sn is not None, 'Transaction ID error: %s' % data
+            assert head_len == 24, 'header length error: %d' % head_len
+            sn = TransactionID(data=fields[2])
+            pages = fields[3]
+            index = fields[4]
+            body_len = fields[5]
         if pages < 1 or pages > cls.MAX_PAGES:
             # raise ValueError('pages error: %d' % pages)
             return None
@@ -290,53 +301,104 @@ class Header(Data):
             # raise ValueError('body length error: %d' % body_len)
             return None
         # create header
-        return cls(data=data.slice(start=0, end=head_len),
+        return cls(data=Data(buffer=buffer, offset=offset, size=head_len),
                    data_type=data_type, sn=sn, pages=pages, index=index, body_length=body_len)
 
     @classmethod
-    def new(cls, data_type: DataType, sn: TransactionID = None, pages: int = 1, index: int = 0, body_length: int = -1):
+    def new(cls, data_type: DataType, sn: TransactionID = None, pages: int = 1, index: int = 0, body_length: int = -1,
+            buffer: bytearray = None, offset: int = 0):
+        """
+        Create package header
+
+        :param data_type:   package body data type
+        :param sn:          transaction ID, generate a new one if it's None
+        :param pages:       fragment count
+        :param index:       fragment index
+        :param body_length: length of body, -1 means unlimited (UDP)
+        :param buffer:      buffer to write the header into [OPTIONAL],
+                            must have 'Header.length()' bytes from the offset
+        :param offset:      start position in the buffer
+        :return: header
+        """
         assert data_type is not None, 'data type should not be None'
         assert 0 <= index < pages, 'pages error: %d, index: %d' % (pages, index)
         assert -1 <= body_length < cls.MAX_BODY_LENGTH, 'body length error: %d' % body_length
-        head_len = 4  # in bytes
         # 1. transaction ID
         if sn is None:
             # generate transaction ID
             sn = TransactionID.generate()
-            head_len += sn.size  # 8 bytes
         elif sn == TransactionID.ZERO:
             # simple header
             sn = None
-        else:
-            head_len += sn.size  # 8 bytes
-        options = None
+        head_len = 4  # in bytes
+        fields = [cls.MAGIC_CODE, 0]
+        options = 0
+        if sn is not None:
+            fields.append(sn.get_bytes())
+            head_len += 8
+            options |= 4
         # 2. pages & index
         if pages > 1:
             # message fragment (or its respond)
-            d1 = Convert.uint32data_from_value(value=pages)
-            d2 = Convert.uint32data_from_value(value=index)
-            options = d1.concat(d2)
-            head_len += d1.size + d2.size  # 8 bytes
+            fields.append(pages)
+            fields.append(index)
+            head_len += 8
+            options |= 2
         # 3. body length
         if body_length >= 0:
             # for TCP
-            d3 = Convert.uint32data_from_value(value=body_length)
-            if options is None:
-                options = d3
-            else:
-                options = options.concat(d3)
-            head_len += d3.size  # 4 bytes
+            fields.append(body_length)
+            head_len += 4
+            options |= 1
+        # header length & data type
+        fields[1] = (head_len << 2) | (data_type.value & 0x0F)
         # generate header data
-        hl_ty = (head_len << 2) | (data_type.value & 0x0F)
-        data = MutableData(capacity=head_len)
-        data.append(source=cls.MAGIC_CODE)  # 'DIM'
-        data.push(element=hl_ty)
-        if sn is not None:
-            data.append(source=sn)
-        if options is not None:
-            data.append(source=options)
+        if buffer is None:
+            buffer = bytearray(head_len)
+            offset = 0
+        _PACKERS[options].pack_into(buffer, offset, *fields)
+        data = MutableData(buffer=buffer, offset=offset, size=head_len)
         return cls(data=data, data_type=data_type, sn=sn, pages=pages, index=index, body_length=body_length)
 
+    @classmethod
+    def length(cls, sn: Optional[TransactionID], pages: int = 1, body_length: int = -1) -> int:
+        """ Get length of the header with these fields ('sn' is None or ZERO means simple header) """
+        head_len = 4  # in bytes
+        if sn is not None and sn != TransactionID.ZERO:
+            head_len += 8
+        if pages > 1:
+            head_len += 8
+        if body_length >= 0:
+            head_len += 4
+        return head_len
+
+
+#
+#   Header layouts: 'DIM', H-Len & Type, [Transaction ID], [Pages, Index], [Body Length]
+#
+
+# parsing, indexed by header length
+_LAYOUTS: Dict[int, struct.Struct] = {
+    4: struct.Struct('>3sB'),
+    8: struct.Struct('>3sBI'),
+    12: struct.Struct('>3sB8s'),
+    16: struct.Struct('>3sB8sI'),
+    20: struct.Struct('>3sB8sII'),
+    24: struct.Struct('>3sB8sIII'),
+}
+
+# packing, indexed by options: 4 = Transaction ID, 2 = Pages & Index, 1 = Body Length
+_PACKERS: List[struct.Struct] = [
+    struct.Struct('>3sB'),
+    struct.Struct('>3sBI'),
+    struct.Struct('>3sBII'),
+    struct.Struct('>3sBIII'),
+    struct.Struct('>3sB8s'),
+    struct.Struct('>3sB8sI'),
+    struct.Struct('>3sB8sII'),
+    struct.Struct('>3sB8sIII'),
+]
+
 
 def get_data_type(data: ByteArray) -> Optional[DataType]:
     if data.size < 4:
@@ -347,7 +409,18 @@ def get_data_type(data: ByteArray) -> Optional[DataType]:
     if buffer[offset:(offset+3)] != Header.MAGIC_CODE:
         # raise ValueError('not a DIM package: %s' % data)
         return None
-    return DataType.from_data(data=data.slice(start=3, end=4))
+    # data type shared the byte with header length
+    ch = buffer[offset+3]
+    data_type = _data_types.get(ch)
+    if data_type is None:
+        data_type = DataType.from_int(value=ch)
+        if data_type is not None:
+            _data_types[ch] = data_type
+    return data_type
+
+
+# byte value => DataType
+_data_types: Dict[int, DataType] = {}
 
 
 def get_header_length(data: ByteArray) -> int:
@@ -30,7 +30,7 @@
 
 from typing import Union
 
-from ..ba import ByteArray, Data
+from ..ba import ByteArray, Data, MutableData
 
 from .protocol import DataType, TransactionID
 from .header import Header
@@ -70,6 +70,10 @@ class Package(Data):
     def is_fragment(self) -> bool:
         return self.__head.data_type.is_fragment
 
+    @property
+    def is_deflated(self) -> bool:
+        return self.__head.data_type.is_deflated
+
     @property
     def is_command(self) -> bool:
         return self.__head.data_type.is_command
@@ -119,11 +123,19 @@ class Package(Data):
     @classmethod
     def new(cls, data_type: DataType, sn: TransactionID = None, pages: int = 1, index: int = 0, body_length: int = -1,
             body: ByteArray = None):
-        # create package with header
-        head = Header.new(data_type=data_type, sn=sn, pages=pages, index=index, body_length=body_length)
         if body is None:
-            data = head
-            body = Data.ZERO
-        else:
-            data = head.concat(body)
+            # create package with header only
+            head = Header.new(data_type=data_type, sn=sn, pages=pages, index=index, body_length=body_length)
+            return cls(data=head, head=head, body=Data.ZERO)
+        if sn is None:
+            # generate transaction ID
+            sn = TransactionID.generate()
+        # allocate buffer for header and body once
+        head_len = Header.length(sn=sn, pages=pages, body_length=body_length)
+        body_len = body.size
+        buffer = bytearray(head_len + body_len)
+        head = Header.new(data_type=data_type, sn=sn, pages=pages, index=index, body_length=body_length,
+                          buffer=buffer, offset=0)
+        buffer[head_len:] = memoryview(body.buffer)[body.offset:body.offset + body_len]
+        data = MutableData(buffer=buffer, offset=0, size=head_len + body_len)
         return cls(data=data, head=head, body=body)
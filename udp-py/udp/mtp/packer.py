@@ -28,7 +28,7 @@
 # SOFTWARE.
 # ==============================================================================
 
-from typing import List, Optional
+from typing import List, Dict, Optional
 
 from ..ba import ByteArray, MutableData
 
@@ -43,8 +43,9 @@ class Packer:
         self.__sn = sn
         self.__pages = pages
         # assert sn is not None and pages > 1, 'pages error: %d' % pages
-        self.__assembling: List[Package] = []      # message fragments
-        self.__complete: Optional[Package] = None  # origin message package
+        self.__assembling: Dict[int, Package] = {}  # index => message fragment
+        self.__length = 0                           # total length of fragment bodies
+        self.__complete: Optional[Package] = None   # origin message package
 
     @property
     def sn(self) -> TransactionID:
@@ -54,15 +55,22 @@ class Packer:
     def completed(self) -> bool:
         return len(self.__assembling) == self.__pages
 
+    @property
+    def length(self) -> int:
+        """ total length of received fragment bodies """
+        return self.__length
+
     @property
     def package(self) -> Optional[Package]:
         if self.__complete is None and self.completed:
-            self.__complete = self.join(fragments=self.__assembling)
+            self.__complete = self.join(fragments=self.fragments)
         return self.__complete
 
     @property
     def fragments(self) -> List[Package]:
-        return self.__assembling
+        """ received fragments sorted by index """
+        assembling = self.__assembling
+        return [assembling[index] for index in sorted(assembling)]
 
     def insert(self, fragment: Package) -> Optional[Package]:
         if self.__complete is not None:
@@ -73,20 +81,12 @@ class Packer:
         assert head.is_fragment, 'Package only for fragments: %s' % head.data_type
         assert head.pages == self.__pages, 'pages error: %d, %d' % (head.pages, self.__pages)
         assert head.index < self.__pages, 'index error: %d, %d' % (head.index, self.__pages)
-        count = len(self.__assembling)
-        index = count - 1
-        while index >= 0:
-            item = self.__assembling[index]
-            if item.head.index < head.index:
-                # got the position
-                break
-            elif item.head.index == head.index:
-                # raise IndexError('duplicated: %s' % item.head)
-                return self.__complete
-            else:
-                index -= 1
-        # insert after the position
-        self.__assembling.insert(index + 1, fragment)
+        index = head.index
+        if index in self.__assembling:
+            # raise IndexError('duplicated: %s' % head)
+            return self.__complete
+        self.__assembling[index] = fragment
+        self.__length += fragment.body.size
         return self.package
 
     """
@@ -130,16 +130,24 @@ class Packer:
             assert item.head.index == index, 'fragment missed: %d' % index
             array.append(item.body)
             length += item.body.size
-        # join fragments
-        body = MutableData(capacity=length)
-        for index in range(count):
-            body.append(source=array[index])
+        # join fragments into a buffer allocated once
+        buffer = bytearray(length)
+        start = 0
+        for item in array:
+            end = start + item.size
+            buffer[start:end] = memoryview(item.buffer)[item.offset:item.offset + item.size]
+            start = end
+        body = MutableData(buffer=buffer, offset=0, size=length)
+        msg_type = DataType.MESSAGE
+        if first.head.data_type.is_deflated:
+            # inflate after joined
+            msg_type = msg_type.deflated
         if first.head.body_length < 0:
             # UDP (unlimited)
             assert first.head.body_length == -1, 'body length error: %d' % first.head.body_length
-            return Package.new(data_type=DataType.MESSAGE, sn=sn, pages=1, index=0, body_length=-1, body=body)
+            return Package.new(data_type=msg_type, sn=sn, pages=1, index=0, body_length=-1, body=body)
         else:
-            return Package.new(data_type=DataType.MESSAGE, sn=sn, pages=1, index=0, body_length=body.size, body=body)
+            return Package.new(data_type=msg_type, sn=sn, pages=1, index=0, body_length=body.size, body=body)
 
     @classmethod
     def split(cls, package: Package) -> List[Package]:
@@ -171,6 +179,8 @@ class Packer:
         # create packages with fragments
         sn = head.sn
         msg_fra = DataType.MESSAGE_FRAGMENT
+        if head.data_type.is_deflated:
+            msg_fra = msg_fra.deflated
         packages: List[Package] = []
         if pages == 1:
             # package too small, no need to split
@@ -45,9 +45,9 @@ from ..ba import ByteArray, Data, Convert, UInt8Data
     
           0   1   2   3   4   5   6   7
         +---+---+---+---+---+---+---+---+
-        |               | F |   | M | A |
-        |               | R |   | S | C |
-        |               | G |   | G | K |
+        |               | F | Z | M | A |
+        |               | R | I | S | C |
+        |               | G | P | G | K |
         +---+---+---+---+---+---+---+---+
     
         Command                  : 0x00 (0000 0000)
@@ -55,11 +55,17 @@ from ..ba import ByteArray, Data, Convert, UInt8Data
         Message                  : 0x02 (0000 0010)
         Message Respond          : 0x03 (0000 0011)
         Message Fragment         : 0x0A (0000 1010)
+
+        ZIP flag (0x04) means the body was deflated (zlib), e.g.:
+        Deflated Message         : 0x06 (0000 0110)
+        Deflated Fragment        : 0x0E (0000 1110)
 """
 
 
 class DataType(UInt8Data):
 
+    DEFLATED = 0x04  # ZIP flag
+
     def __init__(self, data: Union[bytes, bytearray, ByteArray], value: int, name: str):
         super().__init__(data=data, value=value)
         self.__name = name
@@ -82,25 +88,43 @@ class DataType(UInt8Data):
     def is_fragment(self) -> bool:
         return (self.value & 0x08) != 0
 
+    @property
+    def is_deflated(self) -> bool:
+        return (self.value & 0x04) != 0
+
     @property
     def is_command(self) -> bool:
-        return (self.value & 0x0F) == 0x00
+        return (self.value & 0x0B) == 0x00
 
     @property
     def is_command_response(self) -> bool:
-        return (self.value & 0x0F) == 0x01
+        return (self.value & 0x0B) == 0x01
 
     @property
     def is_message(self) -> bool:
-        return (self.value & 0x0F) == 0x02
+        return (self.value & 0x0B) == 0x02
 
     @property
     def is_message_response(self) -> bool:
-        return (self.value & 0x0F) == 0x03
+        return (self.value & 0x0B) == 0x03
 
     @property
     def is_message_fragment(self) -> bool:
-        return (self.value & 0x0F) == 0x0A
+        return (self.value & 0x0B) == 0x0A
+
+    @property
+    def deflated(self):  # -> DataType
+        """ this type with ZIP flag """
+        if self.is_deflated:
+            return self
+        return self.from_int(value=self.value | self.DEFLATED)
+
+    @property
+    def inflated(self):  # -> DataType
+        """ this type without ZIP flag """
+        if self.is_deflated:
+            return self.from_int(value=self.value & ~self.DEFLATED)
+        return self
 
     #
     #   Factories
@@ -125,6 +149,10 @@ class DataType(UInt8Data):
         if fixed is not None:
             # assert isinstance(fixed, DataType)
             return cls(data=data, value=value, name=fixed.name)
+        fixed = cls.__data_types.get(value & ~cls.DEFLATED)
+        if fixed is not None:
+            # deflated body
+            return cls(data=data, value=value, name='%s (deflated)' % fixed.name)
 
     @classmethod
     def cache(cls, value: int, data_type):
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+#
+#   UDP: User Datagram Protocol
+#
+#                                Written in 2020 by Moky <albert.moky@gmail.com>
+#
+# ==============================================================================
+# MIT License
+#
+# Copyright (c) 2020 Albert Moky
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ==============================================================================
+
+
+from typing import Optional, Any, Iterable, List, Dict, Set, Tuple
+
+
+"""
+    Selective Acknowledgement
+    ~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Fragments of a message are acked together in one MessageResponse,
+    the body carries ranges of all page indexes received (so a lost
+    response will be covered by the next one):
+
+        +------+---------+---------+---------+---------+-----
+        | SACK |  first  |  last   |  first  |  last   | ...
+        +------+---------+---------+---------+---------+-----
+          4 B     4 B       4 B       4 B       4 B
+
+    'first' & 'last' are page indexes (big endian), both included.
+"""
+
+SACK = b'SACK'
+
+MAX_RANGES = 128  # keep the response in one datagram
+
+
+def pack_ranges(indexes: Set[int], max_ranges: int = MAX_RANGES) -> bytes:
+    """ Build body with ranges of page indexes (the highest ones kept if too many) """
+    ranges: List[Tuple[int, int]] = []
+    for index in sorted(indexes):
+        if len(ranges) > 0 and ranges[-1][1] + 1 == index:
+            ranges[-1] = (ranges[-1][0], index)
+        else:
+            ranges.append((index, index))
+    if len(ranges) > max_ranges:
+        ranges = ranges[-max_ranges:]
+    data = bytearray(SACK)
+    for first, last in ranges:
+        data.extend(first.to_bytes(4, 'big'))
+        data.extend(last.to_bytes(4, 'big'))
+    return bytes(data)
+
+
+def is_sack(body: bytes) -> bool:
+    """ Check whether the body is ranges of page indexes """
+    return len(body) >= 4 and body[:4] == SACK
+
+
+def parse_ranges(body: bytes, pages: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Get ranges of page indexes from body
+
+    :param body:  'SACK' + ranges
+    :param pages: page count of the message, indexes beyond will be dropped
+    :return: ascending ranges (first, last), None on body error
+    """
+    size = len(body)
+    if size < 4 or body[:4] != SACK or (size - 4) % 8 != 0 or (size - 4) // 8 > MAX_RANGES:
+        return None
+    ranges = []
+    prev = -1
+    for pos in range(4, size, 8):
+        first = int.from_bytes(body[pos:pos+4], 'big')
+        last = int.from_bytes(body[pos+4:pos+8], 'big')
+        if first > last or first <= prev:
+            # reversed or overlapped
+            return None
+        prev = last
+        if first >= pages:
+            break
+        ranges.append((first, min(last, pages - 1)))
+    return ranges
+
+
+def range_indexes(first: int, last: int, candidates: Iterable[int], count: int) -> Iterable[int]:
+    """ Get indexes in range, checking the candidates instead if the range is larger """
+    if last - first + 1 <= count:
+        return range(first, last + 1)
+    return [index for index in candidates if first <= index <= last]
+
+
+class AckCollector:
+    """
+        Collecting received pages for each message (SN),
+        respond after ACK_PAGES pages received, or ACK_DELAY seconds
+        after the first page not responded, or all pages received.
+    """
+
+    ACK_PAGES = 16
+    ACK_DELAY = 0.02  # seconds
+
+    EXPIRES = 60  # seconds, forget the message after no page received
+
+    def __init__(self):
+        super().__init__()
+        # SN => [pages, received indexes, pending count, first pending time, last received time]
+        self.__messages: Dict[Any, list] = {}
+
+    def received(self, sn: Any, pages: int, index: int, now: float) -> bool:
+        """ Page received, return True if it should be responded now """
+        item = self.__messages.get(sn)
+        if item is None:
+            item = [pages, set(), 0, now, now]
+            self.__messages[sn] = item
+        item[1].add(index)
+        if item[2] == 0:
+            item[3] = now
+        item[2] += 1
+        item[4] = now
+        return item[2] >= self.ACK_PAGES or len(item[1]) >= item[0]
+
+    def due(self, now: float) -> List[Any]:
+        """ Get SN of messages waited long enough for responding, and forget the expired ones """
+        array = []
+        expired = []
+        for sn, item in self.__messages.items():
+            if item[2] > 0:
+                if now - item[3] >= self.ACK_DELAY:
+                    array.append(sn)
+            elif now - item[4] > self.EXPIRES:
+                expired.append(sn)
+        for sn in expired:
+            self.__messages.pop(sn, None)
+        return array
+
+    def respond(self, sn: Any) -> Optional[Tuple[int, bytes]]:
+        """ Get (pages, body) for responding the message, and clear the pending count """
+        item = self.__messages.get(sn)
+        if item is None:
+            return None
+        item[2] = 0
+        return item[0], pack_ranges(indexes=item[1])
@@ -28,20 +28,36 @@
 # SOFTWARE.
 # ==============================================================================
 
-from typing import List, Optional, Union
-
+import time
+import weakref
+import zlib
+from collections import deque
+from typing import List, Optional, Union, Tuple, Dict, Deque, Set
+
+from startrek.utils import Log
+from startrek import SocketAddress
+from startrek import Connection
 from startrek import Arrival, ArrivalShip
-from startrek import Departure, DepartureShip, DeparturePriority
+from startrek import Departure, DepartureShip, DeparturePriority, ShipStatus
 from startrek import StarPorter
+from startrek import Compressor
 
-from .ba import Data
-from .mtp import DataType, TransactionID, Package, Packer
+from .ba import Data, retain_buffer, release_buffer
+from .mtp import DataType, TransactionID, Header, Package, Packer
+from .connection import PacketConnection
+from .window import CongestionWindow
+from .sack import AckCollector, is_sack, parse_ranges, range_indexes
 
 
 class PackageArrival(ArrivalShip):
 
     def __init__(self, pack: Package, now: float = 0):
         super().__init__(now=now)
+        # pooled receive buffers of the packages, released with this ship
+        self.__buffers: List[memoryview] = []
+        self.__finalizer = None
+        if retain_buffer(pack.buffer):
+            self.__hold(buffers=[pack.buffer])
         # head & body of the received package (or first fragment)
         self.__head = pack.head
         self.__body = pack.body
@@ -52,6 +68,13 @@ class PackageArrival(ArrivalShip):
             self.__packer = None
             self.__completed = pack
 
+    def __hold(self, buffers: List[memoryview]):
+        if len(buffers) == 0:
+            return
+        self.__buffers.extend(buffers)
+        if self.__finalizer is None:
+            self.__finalizer = weakref.finalize(self, release_buffers, self.__buffers)
+
     def __str__(self) -> str:
         cname = self.__class__.__name__
         size = len(self.__completed)
@@ -76,6 +99,14 @@ class PackageArrival(ArrivalShip):
     def sn(self) -> TransactionID:
         return self.__head.sn
 
+    @property  # Override
+    def size(self) -> int:
+        packer: Packer = self.__packer
+        if packer is None:
+            pack = self.__completed
+            return 0 if pack is None else pack.size
+        return packer.length
+
     # Override
     def assemble(self, ship):  # -> Optional[PackageArrival]:
         if self.__completed is None and ship is not self:
@@ -86,6 +117,9 @@ class PackageArrival(ArrivalShip):
             # assert fragments is not None and len(fragments) > 0, 'fragments error: %s' % ship
             for item in fragments:
                 self.__completed = packer.insert(fragment=item)
+            # take over the buffers of the fragments
+            self.__hold(buffers=ship.__buffers)
+            ship.__buffers.clear()
         if self.__completed is None:
             # extend expired time, wait for more fragments
             return None
@@ -94,6 +128,12 @@ class PackageArrival(ArrivalShip):
             return self
 
 
+def release_buffers(buffers: List[memoryview]):
+    for data in buffers:
+        release_buffer(data)
+    buffers.clear()
+
+
 class PackageDeparture(DepartureShip):
 
     def __init__(self, pack: Package, priority: int = 0, max_tries: int = None):
@@ -102,6 +142,7 @@ class PackageDeparture(DepartureShip):
         self.__body = pack.body
         self.__completed = pack
         self.__packages = self._split_package(pack=pack)
+        self.__pages = len(self.__packages)
         self.__fragments: List[bytes] = []
 
     # noinspection PyMethodMayBeStatic
@@ -125,6 +166,11 @@ class PackageDeparture(DepartureShip):
     def package(self) -> Package:
         return self.__completed
 
+    @property  # protected
+    def packages(self) -> List[Package]:
+        """ pages not responded yet """
+        return self.__packages
+
     @property  # Override
     def sn(self) -> TransactionID:
         return self.__head.sn
@@ -139,29 +185,26 @@ class PackageDeparture(DepartureShip):
 
     # Override
     def check_response(self, ship: Arrival) -> bool:
-        count = 0
         assert isinstance(ship, PackageArrival), 'arrival ship error: %s' % ship
-        fragments = ship.fragments
-        if fragments is None:
-            # it's a completed data package
-            pack = ship.package
-            if self.__remove_page(index=pack.head.index):
-                count += 1
-        else:
-            for pack in fragments:
-                if self.__remove_page(index=pack.head.index):
-                    count += 1
-        if count > 0:
-            self.__fragments.clear()
-            return len(self.__packages) == 0
-
-    def __remove_page(self, index: int) -> bool:
-        packages = list(self.__packages)
+        ranges = response_ranges(ship=ship, pages=self.__pages)
+        packages = self.__packages
+        # both sorted by index
+        remaining = []
+        pos = 0
         for pack in packages:
-            if pack.head.index == index:
-                # got it
-                self.__packages.remove(pack)
-                return True
+            index = pack.head.index
+            while pos < len(ranges) and ranges[pos][1] < index:
+                pos += 1
+            if pos < len(ranges) and ranges[pos][0] <= index:
+                # responded
+                continue
+            remaining.append(pack)
+        if len(remaining) < len(packages):
+            packages[:] = remaining
+            self.__fragments.clear()
+            if len(packages) > 0:
+                self._progress(now=time.time())
+            return len(packages) == 0
 
     @property
     def is_important(self) -> bool:
@@ -171,8 +214,233 @@ class PackageDeparture(DepartureShip):
         return head.is_message
 
 
+class WindowDeparture(PackageDeparture):
+    """
+        Departure for Large Message
+        ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+        Pages are sent by the porter within its congestion window,
+        a page will be resent when it's lost (later pages acked before it)
+        or not acked in RTO, instead of resending all pages after expired;
+        the task fails only when no page acked for a whole lifetime.
+    """
+
+    def __init__(self, pack: Package, window: CongestionWindow, priority: int = 0, max_tries: int = None):
+        super().__init__(pack=pack, priority=priority, max_tries=max_tries)
+        self.__window = window
+        # lifetime since the last page acked (EXPIRES for each try)
+        self.__lifetime = self.EXPIRES * ((1 + self.RETRIES) if max_tries is None else max_tries)
+        self.__progressed = 0  # time of first sent, or last page acked
+        packages = self.packages
+        self.__pages: Dict[int, bytes] = {}  # index => data, not acked yet
+        for item in packages:
+            self.__pages[item.head.index] = item.get_bytes()
+        self.__order = [item.head.index for item in packages]
+        self.__next = 0  # position of next new page in order
+        self.__lost: Deque[int] = deque()  # pages to be resent
+        self.__flight: Dict[int, List] = {}  # index => [seq, sent time, later pages acked]; in sending order
+        self.__resent: Set[int] = set()
+        self.__fragments: Optional[List[bytes]] = None
+
+    @property  # Override
+    def fragments(self) -> List[bytes]:
+        """ data of all pages not acked """
+        fragments = self.__fragments
+        if fragments is None:
+            fragments = list(self.__pages.values())
+            self.__fragments = fragments
+        return fragments
+
+    @property  # Override
+    def expired(self) -> float:
+        progressed = self.__progressed
+        return 0 if progressed == 0 else progressed + self.__lifetime
+
+    # Override
+    def touch(self, now: float):
+        # pages are resent by the window with their own RTO,
+        # so the task itself is sent once, without backing off the window
+        if self.__progressed == 0:
+            self.__progressed = now
+
+    # Override
+    def _progress(self, now: float):
+        self.__progressed = now
+
+    # Override
+    def get_status(self, now: float) -> ShipStatus:
+        if len(self.__pages) == 0:
+            return ShipStatus.DONE
+        elif self.__progressed == 0:
+            return ShipStatus.NEW
+        elif now < self.expired:
+            return ShipStatus.WAITING
+        else:
+            # no page acked for a whole lifetime
+            return ShipStatus.FAILED
+
+    def check_timeout(self, now: float) -> int:
+        """ Mark pages not acked in RTO to be resent """
+        window = self.__window
+        rto = window.rto
+        expired = []
+        for index, item in self.__flight.items():
+            if now - item[1] < rto:
+                # the rest pages were sent later
+                break
+            expired.append(index)
+        for index in expired:
+            item = self.__flight.pop(index)
+            window.on_timeout(seq=item[0])
+            self.__lost.append(index)
+        return len(expired)
+
+    def next_fragments(self, now: float, max_count: int) -> List[bytes]:
+        """ Get data of lost pages & new pages to be sent """
+        window = self.__window
+        pages = self.__pages
+        order = self.__order
+        fragments = []
+        while len(fragments) < max_count:
+            if len(self.__lost) > 0:
+                index = self.__lost.popleft()
+                self.__resent.add(index)
+            elif self.__next < len(order):
+                index = order[self.__next]
+                self.__next += 1
+            else:
+                break
+            data = pages.get(index)
+            if data is None or index in self.__flight:
+                # acked already
+                continue
+            seq = window.on_sent()
+            self.__flight[index] = [seq, now, 0]
+            fragments.append(data)
+        return fragments
+
+    # Override
+    def rtt_sample(self, now: float) -> Optional[float]:
+        # RTT is sampled from each page by the window
+        return None
+
+    def abandon(self):
+        """ Stop tracking pages in flight """
+        self.__window.on_dropped(count=len(self.__flight))
+        self.__flight.clear()
+        self.__lost.clear()
+
+    # Override
+    def check_response(self, ship: Arrival) -> bool:
+        assert isinstance(ship, PackageArrival), 'arrival ship error: %s' % ship
+        now = time.time()
+        pages = self.__pages
+        count = 0
+        for first, last in response_ranges(ship=ship, pages=len(self.__order)):
+            for index in range_indexes(first=first, last=last, candidates=pages, count=len(pages)):
+                if self.__ack(index=index, now=now):
+                    count += 1
+        if count > 0:
+            self.__fragments = None
+            self._progress(now=now)
+            return len(self.__pages) == 0
+
+    def __ack(self, index: int, now: float) -> bool:
+        if self.__pages.pop(index, None) is None:
+            # duplicated response
+            return False
+        window = self.__window
+        item = self.__flight.pop(index, None)
+        if item is None:
+            # responded after it was marked to be resent
+            return True
+        seq = item[0]
+        rtt = None if index in self.__resent else now - item[1]
+        window.on_acked(rtt=rtt)
+        # pages sent before this one are not acked yet
+        lost = []
+        for other, value in self.__flight.items():
+            if value[0] > seq:
+                break
+            value[2] += 1
+            if value[2] >= window.DUP_THRESHOLD:
+                lost.append(other)
+        for other in lost:
+            value = self.__flight.pop(other)
+            window.on_lost(seq=value[0])
+            self.__lost.append(other)
+        return True
+
+
+def response_ranges(ship: PackageArrival, pages: int) -> List[Tuple[int, int]]:
+    """ Get ranges of page indexes responded by the income ship (MessageResponse) """
+    fragments = ship.fragments
+    if fragments is not None:
+        return [(pack.head.index, pack.head.index) for pack in fragments]
+    pack = ship.package
+    body = pack.body.get_bytes()
+    if is_sack(body=body):
+        ranges = parse_ranges(body=body, pages=pages)
+        # ignore the broken response
+        return [] if ranges is None else ranges
+    # response for one page
+    return [(pack.head.index, pack.head.index)]
+
+
 class PackagePorter(StarPorter):
 
+    MAX_PROBES = 3  # deflated PINGs sent before giving up compression
+
+    def __init__(self, remote: SocketAddress, local: Optional[SocketAddress]):
+        super().__init__(remote=remote, local=local)
+        self.__window = self._create_window()
+        self.__sending: Dict[WindowDeparture, bool] = {}  # large messages being sent in the window
+        self.__acks = self._create_ack_collector()
+        self.__compressor = self._create_compressor()
+        self.__inflatable = False  # whether the remote peer can inflate
+        self.__probes = 0          # deflated PINGs sent to the remote peer
+
+    # noinspection PyMethodMayBeStatic
+    def _create_compressor(self) -> Optional[Compressor]:
+        """ Override for deflating message bodies, None means sending them raw """
+        return None
+
+    @property
+    def compressor(self) -> Optional[Compressor]:
+        return self.__compressor
+
+    @property
+    def inflatable(self) -> bool:
+        """ whether the remote peer can inflate the deflated bodies """
+        return self.__inflatable
+
+    # noinspection PyMethodMayBeStatic
+    def _create_ack_collector(self) -> Optional[AckCollector]:
+        """
+        Override to respond fragments in batch (SACK)
+
+        Old senders take a SACK as the response for page 0 only,
+        so return a collector only when all remote peers understand it.
+
+        :return: None means responding each fragment
+        """
+        return None
+
+    # noinspection PyMethodMayBeStatic
+    def _create_window(self) -> Optional[CongestionWindow]:
+        """ Override for user-customized window, None means sending all pages at once """
+        return CongestionWindow(estimator=self.rtt_estimator)
+
+    @property
+    def window(self) -> Optional[CongestionWindow]:
+        return self.__window
+
+    # Override
+    def _received_view(self, view: memoryview) -> Union[bytes, memoryview]:
+        # parse the package on the view without copying,
+        # the arrival ship holds the pooled buffer until it released
+        return view
+
     # noinspection PyMethodMayBeStatic
     def _parse_package(self, data: bytes) -> Optional[Package]:
         if data is not None:  # and len(data) > 0:
@@ -182,9 +450,12 @@ class PackagePorter(StarPorter):
     def _create_arrival(self, pack: Package) -> Arrival:
         return PackageArrival(pack=pack)
 
-    # noinspection PyMethodMayBeStatic
     def _create_departure(self, pack: Package, priority: int = 0) -> Departure:
         if pack.is_message:
+            window = self.__window
+            if window is not None and pack.body.size > Packer.OPTIMAL_BODY_LENGTH:
+                # large message, pages will be sent within the window
+                return WindowDeparture(pack=pack, window=window, priority=priority)
             # normal package
             return PackageDeparture(pack=pack, priority=priority)
         else:
@@ -211,6 +482,15 @@ class PackagePorter(StarPorter):
                 raise ValueError('fragments error: %s' % ship)
             # each ship can carry one fragment only
             pack = fragments[0]
+        deflated = pack.is_deflated
+        if deflated:
+            # the remote peer sends deflated bodies, so it can inflate too
+            self.__inflatable = True
+            if ship.package is not None:
+                ship = self._inflate_arrival(ship=ship)
+                if ship is None:
+                    return None
+                pack = ship.package
         # check data type in package header
         head = pack.head
         body = pack.body
@@ -231,7 +511,8 @@ class PackagePorter(StarPorter):
             #       '...'
             if body == PING:
                 # PING -> PONG
-                await self._respond_command(sn=head.sn, body=PONG)
+                # (deflated PING is asking whether this peer can inflate)
+                await self._respond_command(sn=head.sn, body=PONG, deflated=deflated)
                 return None
             else:
                 # respond for Command
@@ -246,18 +527,25 @@ class PackagePorter(StarPorter):
                 # TODO: reset retries?
                 return None
             await self._check_response(ship=ship)
-            if body == OK:
-                # message responded
+            if body == OK or is_sack(body=body.get_bytes()):
+                # message (or fragments) responded
                 return None
             # extra data in MessageResponse?
             # let the caller to process it
+        elif data_type.is_message_fragment and self.__acks is not None:
+            # respond for Fragments in batch
+            if self.__acks.received(sn=head.sn, pages=head.pages, index=head.index, now=time.time()):
+                await self._respond_fragments(sn=head.sn)
+            # assemble MessageFragment with cached fragments to completed Message
+            # let the caller to process the completed message
+            return self._assemble_fragments(ship=ship)
         else:
             # respond for Message/Fragment
             await self._respond_message(sn=head.sn, pages=head.pages, index=head.index)
             if data_type.is_message_fragment:
                 # assemble MessageFragment with cached fragments to completed Message
                 # let the caller to process the completed message
-                return self._assemble_arrival(ship=ship)
+                return self._assemble_fragments(ship=ship)
             assert data_type.is_message, 'unknown data type: %s' % data_type
             # let the caller to process the message
 
@@ -271,48 +559,193 @@ class PackagePorter(StarPorter):
                 return None
         return ship
 
+    def _assemble_fragments(self, ship: PackageArrival) -> Optional[Arrival]:
+        completed = self._assemble_arrival(ship=ship)
+        if completed is None:
+            # waiting for more fragments
+            return None
+        return self._inflate_arrival(ship=completed)
+
+    def _inflate_arrival(self, ship: PackageArrival) -> Optional[Arrival]:
+        """ Inflate the body of completed ship, None on error """
+        pack = ship.package
+        if pack is None or not pack.is_deflated:
+            return ship
+        compressor = self.__compressor
+        max_size = Compressor.MAX_SIZE if compressor is None else compressor.max_size
+        body = pack.body
+        with memoryview(body.buffer) as view:
+            # inflating stops as soon as it's too large
+            data = Compressor.inflate(chunks=[view[body.offset:body.offset + body.size]], max_size=max_size)
+        if data is None:
+            # data error, or zip bomb?
+            return None
+        head = pack.head
+        body_length = -1 if head.body_length < 0 else len(data)
+        pack = Package.new(data_type=head.data_type.inflated, sn=head.sn, body_length=body_length,
+                           body=Data(buffer=data))
+        return self._create_arrival(pack=pack)
+
     #
     #   Packing
     #
 
     # noinspection PyMethodMayBeStatic
-    def _create_command(self, body: Union[bytes, bytearray]) -> Package:
-        return Package.new(data_type=DataType.COMMAND, body=Data(buffer=body))
+    def _create_command(self, body: Union[bytes, bytearray], deflated: bool = False) -> Package:
+        data_type = DataType.COMMAND.deflated if deflated else DataType.COMMAND
+        return Package.new(data_type=data_type, body=Data(buffer=body))
 
     # noinspection PyMethodMayBeStatic
-    def _create_message(self, body: Union[bytes, bytearray]) -> Package:
-        return Package.new(data_type=DataType.MESSAGE, body=Data(buffer=body))
+    def _create_message(self, body: Union[bytes, bytearray], deflated: bool = False) -> Package:
+        data_type = DataType.MESSAGE.deflated if deflated else DataType.MESSAGE
+        return Package.new(data_type=data_type, body=Data(buffer=body))
 
     # noinspection PyMethodMayBeStatic
-    def _create_command_response(self, sn: TransactionID, body: bytes) -> Package:
-        return Package.new(data_type=DataType.COMMAND_RESPONSE, sn=sn, body=Data(buffer=body))
+    def _create_command_response(self, sn: TransactionID, body: bytes, deflated: bool = False) -> Package:
+        data_type = DataType.COMMAND_RESPONSE.deflated if deflated else DataType.COMMAND_RESPONSE
+        return Package.new(data_type=data_type, sn=sn, body=Data(buffer=body))
 
     # noinspection PyMethodMayBeStatic
     def _create_message_response(self, sn: TransactionID, pages: int, index: int) -> Package:
         return Package.new(data_type=DataType.MESSAGE_RESPONSE, sn=sn, pages=pages, index=index, body=Data(buffer=OK))
 
+    # noinspection PyMethodMayBeStatic
+    def _create_fragments_response(self, sn: TransactionID, pages: int, body: bytes) -> Package:
+        return Package.new(data_type=DataType.MESSAGE_RESPONSE, sn=sn, pages=pages, body=Data(buffer=body))
+
     #
     #   Sending
     #
 
+    # Override
+    def _next_departure(self, now: float) -> Optional[Departure]:
+        # large messages are sent by pages within the congestion window,
+        # take them out before counting the send budget for the others
+        while True:
+            outgo = super()._next_departure(now=now)
+            if not isinstance(outgo, WindowDeparture):
+                return outgo
+            elif outgo.get_status(now=now) == ShipStatus.FAILED:
+                # let the caller callback for mission failed
+                self.__sending.pop(outgo, None)
+                outgo.abandon()
+                return outgo
+            # new task, it won't be touched again while pages acked
+            self.__sending[outgo] = True
+
+    # Override
+    async def process(self) -> bool:
+        busy = await super().process()
+        acks = self.__acks
+        if acks is not None:
+            # respond for fragments waited long enough
+            for sn in acks.due(now=time.time()):
+                await self._respond_fragments(sn=sn)
+                busy = True
+        if len(self.__sending) == 0:
+            return busy
+        count = await self._drive_window(now=time.time())
+        return busy or count > 0
+
+    async def _drive_window(self, now: float) -> int:
+        """ Send pages of large messages within the congestion window """
+        conn = self.connection
+        if conn is None or not conn.vacant:
+            return 0
+        window = self.__window
+        sending = self.__sending
+        # 1. remove finished tasks, check timeout for the others
+        for outgo in list(sending.keys()):
+            status = outgo.get_status(now=now)
+            if status == ShipStatus.DONE or status == ShipStatus.FAILED:
+                sending.pop(outgo, None)
+                outgo.abandon()
+                await self._release_departure(ship=outgo)
+            else:
+                outgo.check_timeout(now=now)
+        # 2. get pages to be sent
+        fragments = []
+        for outgo in sending:
+            count = window.available
+            if count <= 0:
+                break
+            fragments.extend(outgo.next_fragments(now=now, max_count=count))
+        if len(fragments) == 0:
+            return 0
+        # 3. send out, pages failed to be sent will be resent after RTO
+        try:
+            await self._send_fragments(fragments=fragments, conn=conn)
+        except OSError as error:
+            Log.warning('[UDP] failed to send %d page(s) to %s: %s', len(fragments), self.remote_address, error)
+        return len(fragments)
+
+    # Override
+    async def _send_fragments(self, fragments: List[bytes], conn: Connection) -> Tuple[int, int]:
+        if len(fragments) > 1 and isinstance(conn, PacketConnection):
+            # send all fragments of the split package in one batch
+            count = await conn.send_batch(fragments=fragments)
+            return max(count, 0), 0
+        return await super()._send_fragments(fragments=fragments, conn=conn)
+
     # protected
-    async def _respond_command(self, sn: TransactionID, body: bytes) -> bool:
-        pack = self._create_command_response(sn=sn, body=body)
-        return await self.send_package(pack=pack)
+    async def _respond_command(self, sn: TransactionID, body: bytes, deflated: bool = False) -> bool:
+        if deflated:
+            body = zlib.compress(body)
+        pack = self._create_command_response(sn=sn, body=body, deflated=deflated)
+        outgo = self._create_departure(pack=pack)
+        # responses will not be refused by the watermarks
+        return await self._dock_departure(ship=outgo)
 
     # protected
     async def _respond_message(self, sn: TransactionID, pages: int, index: int) -> bool:
         pack = self._create_message_response(sn=sn, pages=pages, index=index)
-        return await self.send_package(pack=pack)
+        outgo = self._create_departure(pack=pack)
+        # responses will not be refused by the watermarks
+        return await self._dock_departure(ship=outgo)
+
+    # protected
+    async def _respond_fragments(self, sn: TransactionID) -> bool:
+        """ Respond with ranges of all fragments received for the message """
+        res = self.__acks.respond(sn=sn)
+        if res is None:
+            return False
+        pages, body = res
+        pack = self._create_fragments_response(sn=sn, pages=pages, body=body)
+        outgo = self._create_departure(pack=pack)
+        # responses will not be refused by the watermarks
+        return await self._dock_departure(ship=outgo)
 
     async def send_command(self, body: Union[bytes, bytearray]) -> bool:
         pack = self._create_command(body=body)
         return await self.send_package(pack=pack, priority=DeparturePriority.SLOWER)
 
     async def send_message(self, body: Union[bytes, bytearray]) -> bool:
-        pack = self._create_message(body=body)
+        data = await self._deflate_body(body=body)
+        if data is None:
+            pack = self._create_message(body=body)
+        else:
+            pack = self._create_message(body=data, deflated=True)
         return await self.send_package(pack=pack, priority=DeparturePriority.NORMAL)
 
+    async def _deflate_body(self, body: Union[bytes, bytearray]) -> Optional[bytes]:
+        """ Deflate message body, None on compressor not set, or not worth it """
+        compressor = self.__compressor
+        if compressor is None or len(body) < compressor.threshold:
+            return None
+        elif not self.__inflatable:
+            # not sure whether the remote peer can inflate, ask it first
+            if self.__probes == 0:
+                await self._probe_inflatable()
+            return None
+        return compressor.compress(data=body)
+
+    async def _probe_inflatable(self) -> bool:
+        """ Send a deflated PING, the remote peer will respond a deflated PONG if it can inflate """
+        self.__probes += 1
+        # old peers will drop the unknown data type silently
+        pack = self._create_command(body=zlib.compress(PING), deflated=True)
+        return await self.send_package(pack=pack, priority=DeparturePriority.SLOWER)
+
     async def send_package(self, pack: Package, priority: int = 0) -> bool:
         """ send data package with priority """
         outgo = self._create_departure(pack=pack, priority=priority)
@@ -325,6 +758,113 @@ class PackagePorter(StarPorter):
     # Override
     async def heartbeat(self):
         await self.send_command(body=PING)
+        if self.__compressor is None or self.__inflatable:
+            pass
+        elif 0 < self.__probes < self.MAX_PROBES:
+            # the probe may be lost, ask again (but not forever)
+            await self._probe_inflatable()
+
+
+class StreamPackagePorter(PackagePorter):
+    """
+        Package Porter for Stream
+        ~~~~~~~~~~~~~~~~~~~~~~~~~
+
+        MTP over TCP: the received data will be cached in a buffer,
+        and all completed packages (with body length) will be taken out;
+        the garbage before the next magic code 'DIM' will be dropped,
+        so as a header with body length exceeds 'max_body' bytes.
+    """
+
+    MAX_BODY = 1 << 20  # 1 MB
+
+    def __init__(self, remote: SocketAddress, local: Optional[SocketAddress], max_body: int = None):
+        super().__init__(remote=remote, local=local)
+        self.__max_body = self.MAX_BODY if max_body is None else max_body
+        self.__buffer = bytearray()
+
+    @property
+    def max_body(self) -> int:
+        return self.__max_body
+
+    # Override
+    def _create_window(self) -> Optional[CongestionWindow]:
+        # the stream is reliable, no need to resend lost pages
+        return None
+
+    # Override
+    def _get_arrivals(self, data: bytes) -> List[Arrival]:
+        buffer = self.__buffer
+        buffer.extend(data)
+        arrivals = []
+        pos = 0
+        size = len(buffer)
+        magic = Header.MAGIC_CODE
+        max_body = self.__max_body
+        # parse from the view, the buffer must not be resized before it released
+        with memoryview(buffer) as view:
+            while size - pos >= 4:
+                if view[pos:pos+3] != magic:
+                    # garbage, seek for next magic code
+                    pos = buffer.find(magic, pos + 1)
+                    if pos < 0:
+                        # keep the tail which may be a part of the magic code
+                        pos = size - 2
+                        break
+                    continue
+                head_len = (view[pos+3] & 0xF0) >> 2  # in bytes
+                if 4 <= head_len <= size - pos:
+                    head = Header.parse(data=Data(buffer=buffer, offset=pos, size=size-pos))
+                elif head_len < 4 or head_len > 24:
+                    head = None
+                else:
+                    # waiting for more header data
+                    break
+                if head is None or head.body_length < 0 or head.body_length > max_body:
+                    # not a stream package (or a corrupted one), seek for next one
+                    pos += 1
+                    continue
+                end = pos + head_len + head.body_length
+                if end > size:
+                    # waiting for more body data
+                    break
+                pack = Package.parse(data=Data(buffer=view[pos:end].tobytes()))
+                if pack is not None:
+                    arrivals.append(self._create_arrival(pack=pack))
+                pos = end
+        if pos > 0:
+            # compact the buffer once for all packages taken out
+            del buffer[:pos]
+        return arrivals
+
+    #
+    #   Packing (with body length)
+    #
+
+    # Override
+    def _create_command(self, body: Union[bytes, bytearray], deflated: bool = False) -> Package:
+        data_type = DataType.COMMAND.deflated if deflated else DataType.COMMAND
+        return Package.new(data_type=data_type, body_length=len(body), body=Data(buffer=body))
+
+    # Override
+    def _create_message(self, body: Union[bytes, bytearray], deflated: bool = False) -> Package:
+        data_type = DataType.MESSAGE.deflated if deflated else DataType.MESSAGE
+        return Package.new(data_type=data_type, body_length=len(body), body=Data(buffer=body))
+
+    # Override
+    def _create_command_response(self, sn: TransactionID, body: bytes, deflated: bool = False) -> Package:
+        data_type = DataType.COMMAND_RESPONSE.deflated if deflated else DataType.COMMAND_RESPONSE
+        return Package.new(data_type=data_type, sn=sn, body_length=len(body), body=Data(buffer=body))
+
+    # Override
+    def _create_message_response(self, sn: TransactionID, pages: int, index: int) -> Package:
+        return Package.new(data_type=DataType.MESSAGE_RESPONSE, sn=sn, pages=pages, index=index,
+                           body_length=len(OK), body=Data(buffer=OK))
+
+    # Override
+    def _create_fragments_response(self, sn: TransactionID, pages: int, body: bytes) -> Package:
+        return Package.new(data_type=DataType.MESSAGE_RESPONSE, sn=sn, pages=pages,
+                           body_length=len(body), body=Data(buffer=body))
 
 
 PING = b'PING'
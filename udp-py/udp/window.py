@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+#
+#   UDP: User Datagram Protocol
+#
+#                                Written in 2020 by Moky <albert.moky@gmail.com>
+#
+# ==============================================================================
+# MIT License
+#
+# Copyright (c) 2020 Albert Moky
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ==============================================================================
+
+
+from typing import Optional
+
+from startrek import RttEstimator
+
+
+class CongestionWindow:
+    """
+        Congestion Window
+        ~~~~~~~~~~~~~~~~~
+
+        Pages (message fragments) in flight to one peer are limited by the window (AIMD):
+            1. slow start           - increase 1 page for each page acked;
+            2. congestion avoidance - increase 1 page for each window acked;
+            3. fast retransmit      - halve the window when a page lost
+                                      (later pages acked before it);
+            4. timeout              - shrink to 1 page, and double the RTO.
+
+        RTT is sampled from pages acked without retransmission (Karn),
+        the estimator is shared with the porter for retrying other tasks.
+    """
+
+    INITIAL = 4      # pages
+    MINIMUM = 2      # pages, after loss
+    MAXIMUM = 1024   # pages
+
+    DUP_THRESHOLD = 3  # count of later pages acked before a page is considered lost
+
+    def __init__(self, estimator: RttEstimator = None):
+        super().__init__()
+        self.__estimator = RttEstimator() if estimator is None else estimator
+        self.__cwnd = float(self.INITIAL)
+        self.__ssthresh = float(self.MAXIMUM)
+        self.__flight = 0    # pages sent but not acked/lost yet
+        self.__seq = 0       # sequence number of pages sent
+        self.__recovery = 0  # losses of pages sent before this are in the same congestion event
+        # statistics
+        self.__sent = 0
+        self.__acked = 0
+        self.__losses = 0
+        self.__timeouts = 0
+
+    def __str__(self) -> str:
+        cname = self.__class__.__name__
+        estimator = self.__estimator
+        return '<%s cwnd=%.1f flight=%d srtt=%s rto=%.3f sent=%d acked=%d losses=%d timeouts=%d />'\
+               % (cname, self.__cwnd, self.__flight, estimator.srtt, estimator.rto,
+                  self.__sent, self.__acked, self.__losses, self.__timeouts)
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    @property
+    def size(self) -> int:
+        """ max pages in flight """
+        return int(self.__cwnd)
+
+    @property
+    def flight(self) -> int:
+        return self.__flight
+
+    @property
+    def available(self) -> int:
+        """ count of pages can be sent now """
+        return int(self.__cwnd) - self.__flight
+
+    @property
+    def estimator(self) -> RttEstimator:
+        return self.__estimator
+
+    @property
+    def rto(self) -> float:
+        """ retransmission timeout """
+        return self.__estimator.rto
+
+    @property
+    def sent(self) -> int:
+        return self.__sent
+
+    @property
+    def acked(self) -> int:
+        return self.__acked
+
+    @property
+    def losses(self) -> int:
+        return self.__losses
+
+    @property
+    def timeouts(self) -> int:
+        return self.__timeouts
+
+    def on_sent(self) -> int:
+        """ Page sent, return its sequence number """
+        self.__seq += 1
+        self.__sent += 1
+        self.__flight += 1
+        return self.__seq
+
+    def on_acked(self, rtt: Optional[float]):
+        """ Page acked, with RTT sample (None for retransmitted page) """
+        self.__flight -= 1
+        self.__acked += 1
+        if rtt is not None:
+            self.__estimator.update(rtt=rtt)
+        if self.__cwnd < self.__ssthresh:
+            # slow start
+            self.__cwnd += 1
+        else:
+            # congestion avoidance
+            self.__cwnd += 1 / self.__cwnd
+        if self.__cwnd > self.MAXIMUM:
+            self.__cwnd = float(self.MAXIMUM)
+
+    def on_lost(self, seq: int):
+        """ Page lost, it will be retransmitted immediately """
+        self.__flight -= 1
+        if seq <= self.__recovery:
+            # already reduced for this congestion event
+            return
+        self.__recovery = self.__seq
+        self.__losses += 1
+        self.__ssthresh = max(self.__cwnd / 2, self.MINIMUM)
+        self.__cwnd = self.__ssthresh
+
+    def on_timeout(self, seq: int):
+        """ Page not acked within RTO """
+        self.__flight -= 1
+        if seq <= self.__recovery:
+            # already reduced for this congestion event
+            return
+        self.__recovery = self.__seq
+        self.__timeouts += 1
+        self.__ssthresh = max(self.__cwnd / 2, self.MINIMUM)
+        self.__cwnd = 1.0
+        # exponential backoff
+        self.__estimator.backoff()
+
+    def on_dropped(self, count: int):
+        """ Pages in flight will not be tracked anymore (task finished or failed) """
+        self.__flight -= count